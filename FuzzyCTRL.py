@@ -1,6 +1,7 @@
 import matplotlib.pyplot as plt
 import numpy as np, skfuzzy as fuzz
 from skfuzzy import control as ctrl
+from fuzzyzones.rules import RuleBase
 
 # define domain interval and resolution of fuzzy sets inputs-output
 x_err      = np.arange(-4,4, 0.1)
@@ -55,56 +56,39 @@ plt.tight_layout(pad=0.4, w_pad=2, h_pad=2)
 # specifying crisp input values
 err, errRate = -1, 2.5
 
+# rule base table: rows err N/Z/P, columns errRate N/Z/P --> outPower set
+rule_table = [['C', 'C',  'C'],   # err N
+              ['H', 'NC', 'C'],   # err Z
+              ['H', 'H',  'H']]   # err P
+
+rulebase = RuleBase.from_table(
+    [('err', x_err, [('N', err_N), ('Z', err_Z), ('P', err_P)]),
+     ('errRate', x_errRate, [('N', errRate_N), ('Z', errRate_Z), ('P', errRate_P)])],
+    ('outPower', x_outPower, [('C', outPower_C), ('NC', outPower_NC), ('H', outPower_H)]),
+    rule_table)
+
 # interpolate to get membership values
 # of all fuzzy sets from above inputs
-im_err_N = fuzz.interp_membership(x_err, err_N, err)
-im_err_Z = fuzz.interp_membership(x_err, err_Z, err)
-im_err_P = fuzz.interp_membership(x_err, err_P, err)
-
-im_errRate_N = fuzz.interp_membership(x_errRate, errRate_N, errRate)
-im_errRate_Z = fuzz.interp_membership(x_errRate, errRate_Z, errRate)
-im_errRate_P = fuzz.interp_membership(x_errRate, errRate_P, errRate)
+shape, memberships = rulebase.fuzzify(err, errRate)
 
-# activate Antecedent-input of all rules
+# activate Antecedent-input of all rules (R1..R9 from the table)
 # to get Consequent-output membership values
-R1 = min(im_err_N , im_errRate_N) # --> outPower_C 
-R2 = min(im_err_Z , im_errRate_N) # --> outPower_H
-R3 = min(im_err_P , im_errRate_N) # --> outPower_H
-R4 = min(im_err_N , im_errRate_Z) # --> outPower_C
-R5 = min(im_err_Z , im_errRate_Z) # --> outPower_NC
-R6 = min(im_err_P , im_errRate_Z) # --> outPower_H
-R7 = min(im_err_N , im_errRate_P) # --> outPower_C 
-R8 = min(im_err_Z , im_errRate_P) # --> outPower_C
-R9 = min(im_err_P , im_errRate_P) # --> outPower_H
-
-# clipping output fuzzy sets
-# with results from R1 to R9
-R1_activate = np.fmin(R1, outPower_C)
-R2_activate = np.fmin(R2, outPower_H)
-R3_activate = np.fmin(R3, outPower_H)
-R4_activate = np.fmin(R4, outPower_C)
-R5_activate = np.fmin(R5, outPower_NC)
-R6_activate = np.fmin(R6, outPower_H)
-R7_activate = np.fmin(R7, outPower_C)
-R8_activate = np.fmin(R8, outPower_C)
-R9_activate = np.fmin(R9, outPower_H)
+R = rulebase.fire(memberships)
 
-# aggregated all clipped areas of fuzzy sets
-outPower_C = np.fmax(R1_activate, np.fmax(R4_activate,
-             np.fmax(R7_activate, R8_activate)))
-
-outPower_NC = R5_activate
+# aggregate rule strengths of each output fuzzy set (maximum),
+# clipping per rule then taking the maximum is the same as
+# clipping each output fuzzy set at its strongest rule
+im_outPower_C, im_outPower_NC, im_outPower_H = rulebase.aggregate(R, 'max')[0]
 
-outPower_H = np.fmax(R2_activate, np.fmax(R3_activate,
-             np.fmax(R6_activate, R6_activate)))
-             
-clip_aggregated = np.fmax(outPower_C,
-                  np.fmax(outPower_NC, outPower_H))
+# aggregated all clipped areas of fuzzy sets
+clip_aggregated = np.fmax(np.fmin(im_outPower_C, outPower_C),
+                  np.fmax(np.fmin(im_outPower_NC, outPower_NC),
+                          np.fmin(im_outPower_H, outPower_H)))
 
 #Centroid of combined areas - COG                     
 powerLevel = fuzz.defuzz(x_outPower, clip_aggregated, 'centroid')
 
-print 'Percent Power Output: '  , powerLevel
+print('Percent Power Output: ', powerLevel)
 
 # graphical view of power output
 x_outPower0 = np.zeros_like(x_outPower) # define baseline interval for plotting
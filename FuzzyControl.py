@@ -53,7 +53,7 @@ powerLevel.input['errRate'] = 2.0
 # clipping, aggregation and centroid calculation
 powerLevel.compute()
 
-print 'Power ouput percentage: ', powerLevel.output['outPower']
+print('Power ouput percentage: ', powerLevel.output['outPower'])
 # graphical view of power output
 outPower.view(sim=powerLevel)
 plt.title('% Power output - vertical line')
@@ -1,6 +1,7 @@
 import matplotlib.pyplot as plt
 import numpy as np, skfuzzy as fuzz
 from skfuzzy import control as ctrl
+from fuzzyzones.rules import RuleBase
 
 # define domain interval and resolution of fuzzy sets inputs-output
 x_err      = np.arange(-4,4, 0.1)
@@ -55,32 +56,27 @@ plt.tight_layout(pad=0.4, w_pad=2, h_pad=2)
 # specifying crisp input values
 err, errRate = -1, 2.5
 
+# rule base table: rows err N/Z/P, columns errRate N/Z/P --> outPower set
+rule_table = [['C', 'C',  'C'],   # err N
+              ['H', 'NC', 'C'],   # err Z
+              ['H', 'H',  'H']]   # err P
+
+rulebase = RuleBase.from_table(
+    [('err', x_err, [('N', err_N), ('Z', err_Z), ('P', err_P)]),
+     ('errRate', x_errRate, [('N', errRate_N), ('Z', errRate_Z), ('P', errRate_P)])],
+    ('outPower', x_outPower, [('C', outPower_C), ('NC', outPower_NC), ('H', outPower_H)]),
+    rule_table)
+
 # interpolate to get membership values
 # of all fuzzy sets from above inputs
-im_err_N = fuzz.interp_membership(x_err, err_N, err)
-im_err_Z = fuzz.interp_membership(x_err, err_Z, err)
-im_err_P = fuzz.interp_membership(x_err, err_P, err)
-
-im_errRate_N = fuzz.interp_membership(x_errRate, errRate_N, errRate)
-im_errRate_Z = fuzz.interp_membership(x_errRate, errRate_Z, errRate)
-im_errRate_P = fuzz.interp_membership(x_errRate, errRate_P, errRate)
-
-# activate Antecedent-input of all rules
-# to get Consequent-output membership values
-R1 = min(im_err_N , im_errRate_N) # --> outPower_C 
-R2 = min(im_err_Z , im_errRate_N) # --> outPower_H
-R3 = min(im_err_P , im_errRate_N) # --> outPower_H
-R4 = min(im_err_N , im_errRate_Z) # --> outPower_C
-R5 = min(im_err_Z , im_errRate_Z) # --> outPower_NC
-R6 = min(im_err_P , im_errRate_Z) # --> outPower_H
-R7 = min(im_err_N , im_errRate_P) # --> outPower_C 
-R8 = min(im_err_Z , im_errRate_P) # --> outPower_C
-R9 = min(im_err_P , im_errRate_P) # --> outPower_H
+shape, memberships = rulebase.fuzzify(err, errRate)
+
+# activate Antecedent-input of all rules (R1..R9 from the table), use AND or
+# minimum operator to get Consequent-output membership values
+R = rulebase.fire(memberships)
 
 #Root Sum Squared Method - bypass clipping each rule output
-im_outPower_C  = (R1**2 + R4**2 + R7**2 + R8**2)**0.5
-im_outPower_NC = (R5**2)**0.5
-im_outPower_H  = (R2**2 + R3**2 + R6**2 + R9**2)**0.5
+im_outPower_C, im_outPower_NC, im_outPower_H = rulebase.aggregate(R, 'rss')[0]
 
 # clip each fuzzy set output with RSS Method value
 clip_outPower_C = np.fmin(im_outPower_C, outPower_C)
@@ -93,7 +89,7 @@ clip_aggregated = np.fmax(clip_outPower_C,
 #Centroid of combined areas - COG                 
 powerLevel = fuzz.defuzz(x_outPower, clip_aggregated, 'centroid')
 
-print 'Percent Power Output: ' , powerLevel
+print('Percent Power Output: ', powerLevel)
 
 # graphical view of power output
 x_outPower0 = np.zeros_like(x_outPower) # define baseline interval for plotting
@@ -0,0 +1 @@
+"""Fuzzy temperature control and molding DOE tools from the FuzzyZones blog."""
@@ -0,0 +1,237 @@
+"""Command line entry point: ``python -m fuzzyzones <command>``.
+
+Commands:
+
+- ``infer ERR ERRRATE`` prints outPower. ``--input FILE`` reads
+  err,errRate rows from a CSV instead and prints one outPower per row.
+  Inputs outside the universes are clipped to them.
+- ``anova [FILE]`` prints the ANOVA table of an experiment sheet, or of
+  the built-in blog data without a file. With ``--pool`` or
+  ``--pool-below`` it pools terms into error and adds p-values.
+- ``effects [FILE]`` prints every main and interaction effect from one
+  Yates pass, with the alias chains of a fractional design.
+- ``plot {sets,doe}`` draws the blog figures, shown or ``--save``d.
+- ``bench ...`` runs the benchmark suite; its options follow.
+- ``startup`` measures the cold-start time of the package.
+- ``export FILE`` saves the controller, and optionally compiled surfaces,
+  as a memory-mappable artifact.
+- ``tune`` optimizes the membership breakpoints on simulated plants.
+
+Only ``plot`` imports matplotlib. Only ``anova FILE`` and ``effects FILE``
+import pandas, and only when FILE is not in the table cache yet (see
+ingest.py) or with ``--no-cache``.
+"""
+import argparse
+import sys
+
+
+def _infer(args):
+    import numpy as np
+
+    from .inference import METHODS
+    from .sets import x_err, x_errRate
+
+    method = METHODS[args.method]
+
+    def f(err, errRate):
+        # clipped like a saturated sensor, as CompiledControl(clip_to_bounds=True)
+        return method(np.clip(err, x_err[0], x_err[-1]),
+                      np.clip(errRate, x_errRate[0], x_errRate[-1]), args.defuzz)
+
+    if args.input:
+        rows = np.loadtxt(args.input, delimiter=',', ndmin=2,
+                          skiprows=1 if args.header else 0)
+        out = np.atleast_1d(f(rows[:, 0], rows[:, 1]))
+        np.savetxt(sys.stdout, out, fmt='%.10g')
+    else:
+        if args.err is None or args.errRate is None:
+            raise SystemExit("infer needs ERR and ERRRATE, or --input")
+        print('{:.10g}'.format(float(f(args.err, args.errRate))))
+
+
+def _experiment(args, sheet='Mold_DOE'):
+    """The blog data, or FILE's sheet through the table cache."""
+    from . import doe
+
+    if args.file is None:
+        return doe.MOLD_RUNS
+    if args.no_cache:
+        return doe.read_experiment(args.file, sheet)
+    from .ingest import load
+
+    return load(args.file, sheet=sheet)
+
+
+def _anova(args):
+    from . import doe
+
+    data = _experiment(args, args.sheet)
+    sources = args.sources or doe.MOLD_SOURCES
+    table = doe.anova(data, sources, args.response, args.pool or (), args.pool_below)
+    pooling = args.pool or args.pool_below is not None
+    print(doe.format_table(doe.rounded(table),
+                           doe.ANOVA_COLUMNS + ('p',) if pooling else doe.ANOVA_COLUMNS))
+
+
+def _effects(args):
+    from . import doe
+    from .factorial import Design
+
+    data = _experiment(args, args.sheet)
+    design = Design.from_data(data, args.factors or doe.MOLD_FACTORS)
+    if design.p:
+        print('2^({}-{}) fraction, resolution {}'.format(len(design.factors), design.p,
+                                                      design.resolution()))
+    aliases = design.aliases()
+    for term, effect in design.effects(data[args.response]).items():
+        print('{:30s} {:12.6g}{}'.format(term, effect,
+                                          ''.join(' = ' + a for a in aliases[term])))
+
+
+def _plot(args):
+    if args.save:
+        import matplotlib
+        matplotlib.use('Agg')
+    from . import doe, plots
+    from .rsm import ResponseSurface
+
+    if args.what == 'sets':
+        figures = [plots.plot_sets(err=args.err, errRate=args.errRate)]
+    else:
+        data = _experiment(args)
+        figures = [plots.plot_level_means(data, doe.MOLD_FACTORS),
+                   plots.plot_effects(doe.effects(data)),
+                   plots.plot_contour(surface=ResponseSurface.fit(data))]
+    if args.save:
+        stem, dot, ext = args.save.rpartition('.')
+        for i, fig in enumerate(figures):
+            name = args.save if len(figures) == 1 else '{}{}.{}'.format(stem, i + 1, ext)
+            fig.savefig(name)
+    else:
+        import matplotlib.pyplot as plt
+        plt.show()
+
+
+def _startup(args):
+    from .bench import cold_start
+
+    for module, seconds in cold_start(args.modules, args.runs).items():
+        print('{:30s} {:8.1f} ms'.format(module, seconds * 1000))
+
+
+def _export(args):
+    from .artifact import save_controller
+    from .inference import make_controller
+    from .surface import compile_surface
+
+    surfaces = {method: compile_surface(method, args.tol, args.defuzz)
+                for method in args.surface or ()}
+    save_controller(args.file, make_controller(args.step), surfaces)
+
+
+def _tune(args):
+    from .montecarlo import FOPDTPlants
+    from .tune import optimize
+
+    duration = args.steps * args.dt
+    plants = FOPDTPlants.random(args.plants, seed=args.seed, duration=duration)
+
+    def show(entry):
+        print('generation {generation:4d}  best {best:.6f}  median {median:.6f}  '
+              'sigma {sigma:.4f}'.format(**entry), flush=True)
+
+    result = optimize(plants, args.setpoint, generations=args.generations,
+                      popsize=args.popsize, workers=args.workers,
+                      checkpoint=args.checkpoint, seed=args.seed, progress=show,
+                      variant=args.method, steps=args.steps, dt=args.dt,
+                      velocity=args.velocity)
+    print('cost {:.6f} (blog breakpoints {:.6f})'.format(result['cost'], result['baseline']))
+    for name, terms in zip(('err', 'errRate', 'outPower'), result['terms']):
+        for term, points in terms:
+            print('{:9s}{:3s}'.format(name, term), [round(v, 4) for v in points])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fuzzyzones',
+                                     description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('infer', help='outPower for err, errRate')
+    p.add_argument('err', type=float, nargs='?')
+    p.add_argument('errRate', type=float, nargs='?')
+    p.add_argument('--method', default='mamdani',
+                   choices=['mamdani', 'rss_cog', 'rss_wa', 'tsk'])
+    p.add_argument('--defuzz', default='grid', choices=['grid', 'exact'])
+    p.add_argument('--input', help='CSV with err,errRate columns')
+    p.add_argument('--header', action='store_true', help='CSV has a header row')
+    p.set_defaults(run=_infer)
+
+    p = commands.add_parser('anova', help='ANOVA table of a DOE sheet')
+    p.add_argument('file', nargs='?')
+    p.add_argument('--sheet', default='Mold_DOE')
+    p.add_argument('--response', default='Length')
+    p.add_argument('--sources', nargs='+')
+    p.add_argument('--pool', nargs='+', help='sources to pool into error')
+    p.add_argument('--pool-below', type=float, help='also pool sources with F below this')
+    p.add_argument('--no-cache', action='store_true', help='parse FILE, skipping the cache')
+    p.set_defaults(run=_anova)
+
+    p = commands.add_parser('effects', help='Yates effects and aliases of a DOE sheet')
+    p.add_argument('file', nargs='?')
+    p.add_argument('--sheet', default='Mold_DOE')
+    p.add_argument('--response', default='Length')
+    p.add_argument('--factors', nargs='+')
+    p.add_argument('--no-cache', action='store_true', help='parse FILE, skipping the cache')
+    p.set_defaults(run=_effects)
+
+    p = commands.add_parser('plot', help='draw the blog figures')
+    p.add_argument('what', choices=['sets', 'doe'])
+    p.add_argument('--file', help='DOE workbook for the doe figures')
+    p.add_argument('--no-cache', action='store_true', help='parse FILE, skipping the cache')
+    p.add_argument('--err', type=float)
+    p.add_argument('--errRate', type=float)
+    p.add_argument('--save', help='write to this file instead of showing')
+    p.set_defaults(run=_plot)
+
+    # handled before parsing so its own options pass through
+    commands.add_parser('bench', help='benchmark suite; see bench --help', add_help=False)
+
+    p = commands.add_parser('startup', help='measure cold-start import time')
+    p.add_argument('--modules', nargs='+', default=['fuzzyzones.inference'])
+    p.add_argument('--runs', type=int, default=5)
+    p.set_defaults(run=_startup)
+
+    p = commands.add_parser('export', help='save a memory-mappable controller file')
+    p.add_argument('file')
+    p.add_argument('--step', type=float, default=0.1, help='universe resolution')
+    p.add_argument('--surface', nargs='+', choices=['mamdani', 'rss_cog', 'rss_wa', 'tsk'],
+                   help='also compile and store these lookup surfaces')
+    p.add_argument('--tol', type=float, default=0.5, help='surface error bound')
+    p.add_argument('--defuzz', default='grid', choices=['grid', 'exact'])
+    p.set_defaults(run=_export)
+
+    p = commands.add_parser('tune', help='optimize the membership breakpoints')
+    p.add_argument('--plants', type=int, default=1000)
+    p.add_argument('--setpoint', type=float, default=25.0)
+    p.add_argument('--steps', type=int, default=600)
+    p.add_argument('--dt', type=float, default=1.0)
+    p.add_argument('--velocity', type=float, help='integrate outPower at this rate')
+    p.add_argument('--method', default='tsk', choices=['mamdani', 'rss_cog', 'rss_wa', 'tsk'])
+    p.add_argument('--generations', type=int, default=50)
+    p.add_argument('--popsize', type=int)
+    p.add_argument('--workers', type=int, help='processes, default all cores')
+    p.add_argument('--checkpoint', help='JSON state file, resumed if it exists')
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(run=_tune)
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ['bench']:
+        from .bench import main as bench
+        return bench(argv[1:])
+    args = parser.parse_args(argv)
+    args.run(args)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,201 @@
+"""Versioned binary controller files that workers memory-map read-only.
+
+A file has four parts:
+
+- a 16-byte preamble: the MAGIC bytes, then the format version and the
+  header length as little-endian uint32;
+- a JSON header, holding the metadata plus the dtype, shape and offset
+  of every array;
+- padding up to a 64-byte boundary;
+- the raw arrays, each starting on a 64-byte boundary.
+
+Artifact maps the file with ``np.memmap(mode='r')``. Its arrays are
+read-only views into that map and nothing is copied or parsed beyond
+the header. Every process that opens the same file therefore shares
+one physical copy of its pages through the OS page cache.
+
+save_controller() stores a RuleBase: the universes, sampled membership
+arrays, breakpoints, rules and rule index arrays. It can add any number
+of compiled Surface tables. load_controller() rebuilds them around the
+mapped arrays without evaluating a single membership function. Files
+are written to a temporary name and then renamed, so a reader never
+maps a half-written file.
+"""
+import contextlib
+import json
+import os
+import struct
+import tempfile
+import threading
+
+import numpy as np
+
+MAGIC = b'FZZONES\x00'
+FORMAT_VERSION = 1
+KIND = 'fuzzyzones.controller'
+
+_PREAMBLE = struct.Struct('<8sII')
+_ALIGN = 64
+
+# mkstemp() creates files 0600; replaced files get the mode a plain open()
+# would give them, found once by creating a file rather than by changing
+# the process-wide umask
+_MODE = None
+_MODE_LOCK = threading.Lock()
+
+
+def _default_mode(directory):
+    """Permission bits of a new file created with mode 0666 in ``directory``."""
+    global _MODE
+    with _MODE_LOCK:
+        if _MODE is None:
+            probe = tempfile.mktemp(dir=directory, prefix='.mode.')
+            fd = os.open(probe, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+            try:
+                _MODE = os.fstat(fd).st_mode & 0o777
+            finally:
+                os.close(fd)
+                os.unlink(probe)
+        return _MODE
+
+
+def _aligned(n):
+    return -(-n // _ALIGN) * _ALIGN
+
+
+@contextlib.contextmanager
+def replacing(path, mode='wb'):
+    """Open a new temporary file next to ``path`` that replaces it on success.
+
+    The name comes from tempfile.mkstemp(), so concurrent writers of the
+    same path never share a temporary file. On an error it is removed and
+    ``path`` is left as it was.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.',
+                               suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            os.fchmod(f.fileno(), _default_mode(directory))
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+def write_arrays(path, arrays, meta=None):
+    """Write a dict of arrays plus JSON-serializable ``meta`` as an artifact file."""
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    write_chunks(path, {name: (a.dtype, a.shape, [a]) for name, a in arrays.items()}, meta)
+
+
+def write_chunks(path, arrays, meta=None):
+    """write_arrays() for arrays given as (dtype, shape, pieces).
+
+    The pieces are an iterable of arrays whose rows follow each other;
+    each is cast to ``dtype`` as it is written, so no array is ever held
+    in memory whole.
+    """
+    layout, offset = {}, 0
+    for name, (dtype, shape, _) in arrays.items():
+        dtype = np.dtype(dtype)
+        if dtype.hasobject:
+            raise ValueError("Array {} has dtype object and cannot be mapped.".format(name))
+        layout[name] = {'dtype': dtype.str, 'shape': list(shape), 'offset': offset}
+        offset = _aligned(offset + dtype.itemsize * int(np.prod(shape)))
+    header = json.dumps({'meta': meta or {}, 'arrays': layout}).encode('utf-8')
+    start = _aligned(_PREAMBLE.size + len(header))
+
+    with replacing(path) as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, (dtype, _, pieces) in arrays.items():
+            f.seek(start + layout[name]['offset'])
+            for piece in pieces:
+                f.write(np.ascontiguousarray(piece, dtype=dtype).tobytes())
+        f.truncate(start + offset)
+
+
+class Artifact:
+    """An artifact file mapped read-only: ``meta`` and ``arrays`` (name --> view)."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            preamble = f.read(_PREAMBLE.size)
+            if len(preamble) < _PREAMBLE.size:
+                raise ValueError("{} is not a fuzzyzones artifact.".format(path))
+            magic, version, length = _PREAMBLE.unpack(preamble)
+            if magic != MAGIC:
+                raise ValueError("{} is not a fuzzyzones artifact.".format(path))
+            if version > FORMAT_VERSION:
+                raise ValueError("{} has format version {}; this version reads up "
+                                 "to {}.".format(path, version, FORMAT_VERSION))
+            header = json.loads(f.read(length).decode('utf-8'))
+        self.path = path
+        self.version = version
+        self.meta = header['meta']
+        start = _aligned(_PREAMBLE.size + length)
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+        self.arrays = {name: np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']),
+                                        buffer=self._map, offset=start + spec['offset'])
+                       for name, spec in header['arrays'].items()}
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+
+def _variable_arrays(prefix, var):
+    return ({prefix + '.universe': var.universe, prefix + '.mf': var.mf},
+            {'name': var.name, 'names': var.names, 'points': var.points})
+
+
+def save_controller(path, rulebase, surfaces=None, metadata=None):
+    """Save ``rulebase`` and a dict of named Surfaces to ``path``.
+
+    ``metadata`` is any JSON-serializable value kept with the file.
+    """
+    arrays = {'antecedents': rulebase.antecedents, 'consequents': rulebase.consequents}
+    inputs = []
+    for i, var in enumerate(rulebase.inputs):
+        a, spec = _variable_arrays('input{}'.format(i), var)
+        arrays.update(a)
+        inputs.append(spec)
+    a, output = _variable_arrays('output', rulebase.output)
+    arrays.update(a)
+    surface_meta = {}
+    for name, surface in (surfaces or {}).items():
+        arrays['surface.{}.err_grid'.format(name)] = surface.err_grid
+        arrays['surface.{}.errRate_grid'.format(name)] = surface.errRate_grid
+        arrays['surface.{}.table'.format(name)] = surface.table
+        surface_meta[name] = {'max_error': surface.max_error}
+    write_arrays(path, arrays, {'kind': KIND, 'inputs': inputs, 'output': output,
+                                'rules': [list(rule) for rule in rulebase.rules],
+                                'surfaces': surface_meta, 'user': metadata})
+
+
+def load_controller(path):
+    """The (RuleBase, {name: Surface}) saved in ``path``, on mapped arrays."""
+    from .rules import RuleBase, Variable
+    from .surface import Surface
+
+    art = Artifact(path)
+    meta = art.meta
+    if meta.get('kind') != KIND:
+        raise ValueError("{} does not hold a controller.".format(path))
+
+    def variable(prefix, spec):
+        return Variable.from_arrays(spec['name'], art[prefix + '.universe'], spec['names'],
+                                    spec['points'], art[prefix + '.mf'])
+    inputs = [variable('input{}'.format(i), spec) for i, spec in enumerate(meta['inputs'])]
+    rulebase = RuleBase(inputs, variable('output', meta['output']), meta['rules'])
+    if not (np.array_equal(rulebase.antecedents, art['antecedents'])
+            and np.array_equal(rulebase.consequents, art['consequents'])):
+        raise ValueError("{} has rule index arrays that do not match its "
+                         "rules.".format(path))
+    surfaces = {name: Surface(art['surface.{}.err_grid'.format(name)],
+                              art['surface.{}.errRate_grid'.format(name)],
+                              art['surface.{}.table'.format(name)], spec['max_error'])
+                for name, spec in meta['surfaces'].items()}
+    return rulebase, surfaces
@@ -0,0 +1,373 @@
+"""Latency, throughput, memory and accuracy benchmarks of every inference variant.
+
+Variants, all computing outPower(err, errRate) from the same rule base:
+
+- ``ctrl``: skfuzzy ``ControlSystemSimulation.compute()`` (FuzzyControl.py)
+- ``ctrl_native``: the same system through compile_control()
+- ``mamdani``, ``rss_cog``, ``rss_wa``, ``tsk``: RuleBase versions of
+  FuzzyCTRL.py, FuzzyRSS_COG.py, FuzzyRSS_WA.py and FuzzyTSK.py, each with
+  ``method='grid'`` and ``method='exact'``
+
+Every (variant, method, universe step, batch size) gets one record: the
+median and p99 single-call latency, the batch throughput, the peak traced
+memory of one batch call, and the max/RMS deviation from a reference. The
+reference is the closed-form ('exact') result on a fine universe. Nothing
+is plotted. run() returns the records and ``python -m fuzzyzones.bench``
+writes them as JSON or CSV. compare() lists records that got slower or
+less accurate between two runs. universe_report() compares the uniform
+and adaptive universes in float64 and float32. type2_report() puts the
+interval type-2 controller next to its type-1 counterpart.
+"""
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+RULEBASE_VARIANTS = ('mamdani', 'rss_cog', 'rss_wa', 'tsk')
+VARIANTS = ('ctrl', 'ctrl_native') + RULEBASE_VARIANTS
+
+# the ctrl variants are Mamdani inference, so they share its reference
+_REFERENCE = {'ctrl': 'mamdani', 'ctrl_native': 'mamdani'}
+
+
+def make_variant(variant, step=0.1, method='grid'):
+    """Vectorized ``f(err, errRate)`` for one variant at universe ``step``."""
+    if variant in RULEBASE_VARIANTS:
+        from .inference import make_controller
+
+        infer = getattr(make_controller(step), variant)
+        return lambda err, errRate: infer(err, errRate, method=method)
+
+    from .control import compile_control, temperature_system
+
+    system = temperature_system(step)
+    if variant == 'ctrl_native':
+        compiled = compile_control(system)
+        return lambda err, errRate: compiled(err=err, errRate=errRate)['outPower']
+    if variant == 'ctrl':
+        from skfuzzy import control as ctrl
+
+        # a simulation resets (and warns) when its input shape changes
+        sims = {}
+
+        def compute(err, errRate):
+            shape = np.broadcast_shapes(np.shape(err), np.shape(errRate))
+            if shape not in sims:
+                sims[shape] = ctrl.ControlSystemSimulation(system, cache=False)
+            sim = sims[shape]
+            sim.input['err'] = err
+            sim.input['errRate'] = errRate
+            sim.compute()
+            return sim.output['outPower']
+        return compute
+    raise ValueError("The input for `variant`, {}, was incorrect.".format(variant))
+
+
+def sample_inputs(n, seed=0):
+    """``n`` random (err, errRate) pairs inside every universe."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-4, 3.9, n), rng.uniform(-10, 9.9, n)
+
+
+def latency(f, err, errRate, repeats):
+    """Median and p99 seconds of scalar calls cycling through the inputs."""
+    times = np.empty(repeats)
+    for i in range(repeats):
+        e, r = float(err[i % len(err)]), float(errRate[i % len(err)])
+        start = time.perf_counter()
+        f(e, r)
+        times[i] = time.perf_counter() - start
+    p50, p99 = np.percentile(times, [50, 99])
+    return float(p50), float(p99)
+
+
+def throughput(f, err, errRate, min_time=0.2):
+    """Samples per second of batch calls, repeated for at least ``min_time``."""
+    calls, start = 0, time.perf_counter()
+    while True:
+        f(err, errRate)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls * len(err) / elapsed
+
+
+def peak_memory(f, err, errRate):
+    """Peak bytes traced by tracemalloc during one batch call."""
+    tracemalloc.start()
+    try:
+        f(err, errRate)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(variants=VARIANTS, methods=('grid', 'exact'), steps=(0.1, 0.01),
+        batches=(1, 1000, 100000), accuracy_samples=2000, reference_step=1e-4,
+        repeats=200, ctrl_limit=200, seed=0, progress=None):
+    """Benchmark records for every combination, as a list of dicts.
+
+    The ``ctrl`` variant defuzzifies one sample at a time, so it runs at
+    most ``ctrl_limit`` samples per batch, ``repeats // 10`` latency calls
+    and a ``ctrl_limit`` sample accuracy check. ``progress`` is called
+    with each record as it completes.
+    """
+    err, errRate = sample_inputs(accuracy_samples, seed)
+    references = {}
+    records = []
+    for variant in variants:
+        for method in (methods if variant in RULEBASE_VARIANTS else ('upsampled',)):
+            ref_name = _REFERENCE.get(variant, variant)
+            if ref_name not in references:
+                references[ref_name] = make_variant(ref_name, reference_step, 'exact')(err, errRate)
+            reference = references[ref_name]
+            for step in steps:
+                start = time.perf_counter()
+                f = make_variant(variant, step, method)
+                setup = time.perf_counter() - start
+                slow = variant == 'ctrl'
+                n = min(len(err), ctrl_limit) if slow else len(err)
+                deviation = np.abs(np.asarray(f(err[:n], errRate[:n])) - reference[:n])
+                p50, p99 = latency(f, err, errRate, repeats // 10 if slow else repeats)
+                for batch in batches:
+                    if slow and batch > ctrl_limit:
+                        continue
+                    e, r = sample_inputs(batch, seed + 1)
+                    record = {'variant': variant, 'method': method, 'step': step,
+                              'batch': batch, 'setup_s': setup,
+                              'latency_p50_s': p50, 'latency_p99_s': p99,
+                              'throughput_per_s': throughput(f, e, r),
+                              'peak_bytes': peak_memory(f, e, r),
+                              'max_deviation': float(np.nanmax(deviation)),
+                              'rms_deviation': float(np.sqrt(np.nanmean(deviation**2)))}
+                    records.append(record)
+                    if progress is not None:
+                        progress(record)
+    return records
+
+
+def universe_report(step=0.1, methods=('grid', 'exact'), batch=1000, accuracy_samples=2000,
+                    reference_step=1e-4, seed=0):
+    """Points, table bytes, accuracy and throughput of each universe kind.
+
+    One record per (dtype, uniform/adaptive, method) of the mamdani
+    controller. ``table_bytes`` counts the universes and sampled sets;
+    ``max_deviation`` is against the fine closed-form reference.
+    """
+    from .inference import make_controller
+
+    err, errRate = sample_inputs(accuracy_samples, seed)
+    reference = make_variant('mamdani', reference_step, 'exact')(err, errRate)
+    e, r = sample_inputs(batch, seed + 1)
+    records = []
+    for dtype in (np.float64, np.float32):
+        for adaptive in (False, True):
+            rb = make_controller(step, dtype=dtype, adaptive=adaptive)
+            variables = rb.inputs + [rb.output]
+            for method in methods:
+                f = lambda a, b: rb.mamdani(a, b, method=method)
+                deviation = np.abs(f(err, errRate) - reference)
+                records.append({'dtype': np.dtype(dtype).name,
+                                'universe': 'adaptive' if adaptive else 'uniform',
+                                'method': method, 'step': step,
+                                'points': [len(v.universe) for v in variables],
+                                'table_bytes': sum(v.universe.nbytes + v.mf.nbytes
+                                                   for v in variables),
+                                'max_deviation': float(np.nanmax(deviation)),
+                                'rms_deviation': float(np.sqrt(np.nanmean(deviation**2))),
+                                'throughput_per_s': throughput(f, e, r)})
+    return records
+
+
+def type2_report(step=0.1, batches=(1, 1000), adaptive=(False, True), seed=0, repeats=200):
+    """Latency and throughput of type-1 mamdani and interval type-2 inference.
+
+    One record per (universe kind, batch); ``overhead`` is the type-1
+    throughput over the type-2 one. ``width`` is the mean length of the
+    centroid interval.
+    """
+    from .inference import make_controller
+    from .type2 import make_type2_controller
+
+    records = []
+    for adapt in adaptive:
+        t1 = make_controller(step, adaptive=adapt)
+        t2 = make_type2_controller(step, adaptive=adapt)
+        f1 = lambda a, b: t1.mamdani(a, b, method='grid')
+        for batch in batches:
+            e, r = sample_inputs(batch, seed)
+            yl, yr = t2.interval(e, r)
+            p50, _ = latency(t2.mamdani, e, r, repeats)
+            rate1, rate2 = throughput(f1, e, r), throughput(t2.mamdani, e, r)
+            records.append({'universe': 'adaptive' if adapt else 'uniform', 'step': step,
+                            'batch': batch, 'points': len(t2.upper.output.universe),
+                            'type1_per_s': rate1, 'type2_per_s': rate2,
+                            'overhead': rate1 / rate2, 'type2_latency_p50_s': p50,
+                            'width': float(np.nanmean(yr - yl))})
+    return records
+
+
+_HEAVY = ('matplotlib', 'pandas', 'scipy', 'skfuzzy', 'networkx')
+
+_COLD_START = """import sys, time
+t = time.perf_counter()
+import {}
+t = time.perf_counter() - t
+print(t, ' '.join(m for m in {!r} if m in sys.modules))
+"""
+
+
+def cold_start(modules=('fuzzyzones.inference',), runs=5):
+    """Median seconds to import each module in a fresh interpreter.
+
+    Raises RuntimeError if the import pulls in matplotlib, pandas, scipy,
+    skfuzzy or networkx, which should all load lazily.
+    """
+    times = {}
+    for module in modules:
+        samples = []
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, '-c', _COLD_START.format(module, _HEAVY)],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            samples.append(float(out[0]))
+            if out[1:]:
+                raise RuntimeError("Importing {} loaded {}.".format(module, ', '.join(out[1:])))
+        times[module] = float(np.median(samples))
+    return times
+
+
+def environment():
+    """Versions the numbers depend on, stored next to the records."""
+    import skfuzzy
+
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'skfuzzy': skfuzzy.__version__, 'machine': platform.machine(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def _key(record):
+    return (record['variant'], record['method'], record['step'], record['batch'])
+
+
+def compare(old, new, slower=1.25, less_accurate=1e-9):
+    """Records of ``new`` that regressed against ``old``.
+
+    A regression is throughput below ``1/slower`` of the old one, or a
+    max deviation more than ``less_accurate`` above it. Returns a list of
+    (key, field, old value, new value).
+    """
+    before = {_key(r): r for r in old}
+    regressions = []
+    for record in new:
+        prior = before.get(_key(record))
+        if prior is None:
+            continue
+        if record['throughput_per_s'] * slower < prior['throughput_per_s']:
+            regressions.append((_key(record), 'throughput_per_s',
+                                prior['throughput_per_s'], record['throughput_per_s']))
+        if record['max_deviation'] > prior['max_deviation'] + less_accurate:
+            regressions.append((_key(record), 'max_deviation',
+                                prior['max_deviation'], record['max_deviation']))
+    return regressions
+
+
+def write(records, path, fmt=None):
+    """Write records as JSON (with the environment) or CSV, by ``fmt`` or suffix."""
+    fmt = fmt or ('csv' if str(path).endswith('.csv') else 'json')
+    if fmt == 'json':
+        with open(path, 'w') as f:
+            json.dump({'environment': environment(), 'records': records}, f, indent=1)
+    elif fmt == 'csv':
+        import csv
+
+        with open(path, 'w', newline='') as f:
+            if records:
+                writer = csv.DictWriter(f, fieldnames=list(records[0]))
+                writer.writeheader()
+                writer.writerows(records)
+    else:
+        raise ValueError("The input for `fmt`, {}, was incorrect.".format(fmt))
+
+
+def _cell(text):
+    """A CSV cell back as the int, float, None or string write() had."""
+    if text == '':
+        return None
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def read(path, fmt=None):
+    """Records from a JSON or CSV file written by write(), by ``fmt`` or suffix."""
+    fmt = fmt or ('csv' if str(path).endswith('.csv') else 'json')
+    if fmt == 'json':
+        with open(path) as f:
+            return json.load(f)['records']
+    if fmt == 'csv':
+        import csv
+
+        with open(path, newline='') as f:
+            return [{k: _cell(v) for k, v in row.items()} for row in csv.DictReader(f)]
+    raise ValueError("The input for `fmt`, {}, was incorrect.".format(fmt))
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m fuzzyzones.bench',
+                                     description=__doc__.splitlines()[0])
+    parser.add_argument('--variants', nargs='+', default=list(VARIANTS), choices=VARIANTS)
+    parser.add_argument('--methods', nargs='+', default=['grid', 'exact'])
+    parser.add_argument('--steps', nargs='+', type=float, default=[0.1, 0.01])
+    parser.add_argument('--batches', nargs='+', type=int, default=[1, 1000, 100000])
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--output', '-o', help='JSON or CSV file for the records')
+    parser.add_argument('--baseline', help='earlier JSON or CSV output to check for regressions')
+    parser.add_argument('--universes', action='store_true',
+                        help='compare uniform/adaptive float64/float32 universes instead')
+    parser.add_argument('--type2', action='store_true',
+                        help='compare interval type-2 with type-1 mamdani instead')
+    args = parser.parse_args(argv)
+
+    if args.universes:
+        for step in args.steps:
+            for r in universe_report(step):
+                print('{dtype:8s} {universe:9s} {method:6s} step={step:<6g} points={points} '
+                      '{table_bytes:>8d}B maxdev={max_deviation:.2e} '
+                      '{throughput_per_s:10.0f}/s'.format(**r), flush=True)
+        return 0
+    if args.type2:
+        for step in args.steps:
+            for r in type2_report(step, repeats=args.repeats):
+                print('{universe:9s} step={step:<6g} batch={batch:<7d} points={points:<5d} '
+                      'type1={type1_per_s:10.0f}/s type2={type2_per_s:10.0f}/s '
+                      'overhead={overhead:5.2f}x width={width:.3f}'.format(**r), flush=True)
+        return 0
+
+    def show(r):
+        print('{variant:12s} {method:9s} step={step:<6g} batch={batch:<7d} '
+              'p50={latency_p50_s:.2e}s {throughput_per_s:12.0f}/s '
+              'peak={peak_bytes:>11d}B maxdev={max_deviation:.2e}'.format(**r), flush=True)
+
+    records = run(args.variants, args.methods, args.steps, args.batches,
+                  repeats=args.repeats, progress=show)
+    if args.output:
+        write(records, args.output)
+    if args.baseline:
+        regressions = compare(read(args.baseline), records)
+        for key, field, before, after in regressions:
+            print('REGRESSION', key, field, before, '-->', after)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
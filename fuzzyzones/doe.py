@@ -0,0 +1,232 @@
+"""Two-level factorial DOE analysis of mold_DOE.py, without plotting.
+
+Experiments are column mappings (a dict of lists, or a pandas DataFrame)
+with one column per factor, interaction code and response, like the
+Mold_DOE sheet. Everything here is NumPy. pandas is only imported to read
+Excel files or when a DataFrame is asked for, and scipy only for the
+p-values of a table that has an error term.
+"""
+import numpy as np
+
+# the blog's 2^3 molding experiment, as in the Mold_DOE sheet
+MOLD_RUNS = {'moldTemp': [38, 38, 38, 38, 23, 23, 23, 23],
+             'coolTime': [28, 28, 18, 18, 28, 28, 18, 18],
+             'holdPress': [650, 400, 650, 400, 650, 400, 650, 400],
+             'Length': [40.85, 40.42, 40.72, 40.42, 40.95, 40.62, 40.75, 40.46],
+             'Temp*Time': [2, 2, 1, 1, 1, 1, 2, 2],
+             'Time*Press': [2, 1, 1, 2, 2, 1, 1, 2],
+             'Temp*Press': [2, 1, 2, 1, 1, 2, 1, 2]}
+
+MOLD_FACTORS = ('moldTemp', 'coolTime', 'holdPress')
+MOLD_SOURCES = MOLD_FACTORS + ('Temp*Time', 'Time*Press', 'Temp*Press')
+
+ANOVA_COLUMNS = ('Source', 'df', 'SS', 'MS', 'F', 'PS', 'PI')
+
+
+def read_experiment(path='Mold_DOE.xlsx', sheet='Mold_DOE'):
+    """Read one experiment sheet into a DataFrame indexed by run.
+
+    The header is the first row naming every column, so blank rows above
+    the table (as in Mold_DOE.xlsx) are skipped.
+    """
+    import pandas as pd
+
+    raw = pd.read_excel(path, sheet_name=sheet, header=None)
+    named = raw.apply(lambda row: row.notna().all() and
+                      all(isinstance(v, str) for v in row), axis=1)
+    if not named.any():
+        raise ValueError("No header row found in sheet {}.".format(sheet))
+    header = int(np.flatnonzero(named.to_numpy())[0])
+    data = raw.iloc[header + 1:].dropna(how='all')
+    data.columns = [str(c).strip() for c in raw.iloc[header]]
+    data = data.set_index(data.columns[0])
+    return data.apply(pd.to_numeric)
+
+
+def _column(data, name):
+    return np.asarray(data[name], dtype=float)
+
+
+def level_means(data, factor, response='Length'):
+    """Sorted levels of ``factor`` and the mean response at each."""
+    levels, index = np.unique(_column(data, factor), return_inverse=True)
+    y = _column(data, response)
+    return levels, np.bincount(index, y) / np.bincount(index)
+
+
+def interaction_effect(data, a, b, response='Length'):
+    """Half the difference of the like and unlike 2x2 cell means of ``a`` x ``b``."""
+    _, ia = np.unique(_column(data, a), return_inverse=True)
+    _, ib = np.unique(_column(data, b), return_inverse=True)
+    cell = ia * 2 + ib
+    y = _column(data, response)
+    m = np.bincount(cell, y, minlength=4) / np.bincount(cell, minlength=4)
+    return (m[0] + m[3] - m[1] - m[2]) / 2
+
+
+def effects(data, factors=MOLD_FACTORS, response='Length'):
+    """Main effect (high - low level mean) of every factor, plus each factor
+    pair's interaction, keyed like ``'moldTemp*holdPress'``."""
+    out = {}
+    for f in factors:
+        _, means = level_means(data, f, response)
+        out[f] = float(means[-1] - means[0])
+    for i, a in enumerate(factors):
+        for b in factors[i + 1:]:
+            out[a + '*' + b] = float(interaction_effect(data, a, b, response))
+    return out
+
+
+class Anova:
+    """ANOVA of any number of responses over the ``sources`` columns of ``data``.
+
+    The indicator matrix of every source level is built once. table()
+    then gets the level sums of all responses with one matrix product and
+    the sums of squares with one segmented reduction. Sources can be
+    factors or interaction code columns with any number of levels.
+    """
+
+    def __init__(self, data, sources=MOLD_SOURCES):
+        self.sources = tuple(sources)
+        index, counts, starts, df = [], [], [], []
+        offset = 0
+        for source in self.sources:
+            _, idx = np.unique(_column(data, source), return_inverse=True)
+            c = np.bincount(idx)
+            index.append(idx + offset)
+            counts.append(c)
+            starts.append(offset)
+            df.append(len(c) - 1)
+            offset += len(c)
+        if not index:
+            raise ValueError("The input for `sources`, {}, was incorrect.".format(sources))
+        self.runs = len(index[0])
+        self.Z = np.zeros((self.runs, offset))
+        self.Z[np.arange(self.runs)[:, None], np.column_stack(index)] = 1
+        self.counts = np.concatenate(counts)
+        self.starts = np.array(starts, dtype=np.intp)
+        self.df = np.array(df, dtype=int)
+
+    def table(self, Y, pool=(), pool_below=None):
+        """ANOVA_COLUMNS plus ``p`` and ``pooled`` for responses ``Y``.
+
+        ``Y`` is one response (runs,), a matrix (runs, responses), or
+        (runs, replicates, responses) with the replicates of each run side
+        by side. Replicates may also come as repeated runs. The sources
+        named in ``pool``, and per response those with F below
+        ``pool_below`` against the unpooled error, are pooled into Error:
+        their SS and df move to the error term and their F, PS, PI and p
+        come back NaN. Rows are the sources, then Error and Total; with a
+        matrix every column is a (rows, responses) array. With no degrees
+        of freedom left for error, MS/F/PS come back NaN.
+        """
+        Y = np.asarray(Y, dtype=float)
+        single = Y.ndim == 1
+        Y = Y.reshape(len(Y), 1, -1) if Y.ndim < 3 else Y
+        if len(Y) != self.runs:
+            raise ValueError("The input for `Y`, {} runs, was incorrect.".format(len(Y)))
+        r = Y.shape[1]
+        n = self.runs * r
+        T = Y.sum(axis=(0, 1))
+        CF = T**2 / n
+        SS_T = (Y**2).sum(axis=(0, 1)) - CF
+        S = self.Z.T @ Y.sum(axis=1)
+        SS = np.add.reduceat(S**2 / (self.counts[:, None] * r), self.starts, axis=0) - CF
+        fT = n - 1
+        SS_e = SS_T - SS.sum(axis=0)
+        return _table(self.sources, SS, self.df, SS_e, fT - self.df.sum(), SS_T, fT,
+                      pool, pool_below, single)
+
+
+def _table(sources, SS, df, SS_e, fe, SS_T, fT, pool=(), pool_below=None, single=False):
+    """The ANOVA dict of Anova.table() from its sums of squares.
+
+    ``SS`` (sources, responses) has the degrees of freedom ``df``; SS_e
+    and SS_T (responses,) are the error and total, with ``fe`` and ``fT``
+    degrees of freedom.
+    """
+    df = np.asarray(df)[:, None]
+    pooled = np.zeros(SS.shape, dtype=bool)
+    for name in pool:
+        pooled[list(sources).index(name)] = True
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if pool_below is not None:
+            MS_e = np.where(fe > 0, SS_e / max(fe, 1), np.nan)
+            pooled |= SS / df / MS_e < pool_below
+        fe = fe + (pooled * df).sum(axis=0)
+        SS_e = SS_e + np.where(pooled, SS, 0).sum(axis=0)
+        MS_e = np.where(fe > 0, SS_e / np.maximum(fe, 1), np.nan)
+        MS = SS / df
+        F = np.where(pooled, np.nan, MS / MS_e)
+        PS = np.where(pooled, np.nan, SS - MS_e * df)
+        PS_e = SS_e + (~pooled * df).sum(axis=0) * MS_e
+        p = np.full(F.shape, np.nan)
+        if np.isfinite(F).any():
+            from scipy.special import fdtrc
+
+            p = fdtrc(df, fe, F)
+    nan = np.full_like(SS_T, np.nan)
+    table = {'Source': list(sources) + ['Error', 'Total'],
+             'df': np.vstack([np.broadcast_to(df, SS.shape), np.broadcast_to(fe, SS_T.shape),
+                              np.full(SS_T.shape, fT)]).astype(int),
+             'SS': np.vstack([SS, SS_e, SS_T]),
+             'MS': np.vstack([MS, MS_e, nan]),
+             'F': np.vstack([F, MS_e / MS_e, nan]),
+             'PS': np.vstack([PS, PS_e, nan]),
+             'PI': np.vstack([PS / SS_T * 100, PS_e / SS_T * 100, np.full_like(SS_T, 100.0)]),
+             'p': np.vstack([p, nan, nan]),
+             'pooled': pooled}
+    if single:
+        table = {k: v if k == 'Source' else v[..., 0] for k, v in table.items()}
+        table['df'] = table['df'].tolist()
+    return table
+
+
+def anova(data, sources=MOLD_SOURCES, response='Length', pool=(), pool_below=None):
+    """ANOVA of ``response`` over the ``sources`` columns, as in mold_DOE.py.
+
+    Every source is a factor or an interaction code column. Returns a dict
+    of ANOVA_COLUMNS with one entry per source, then Error and Total:
+    degrees of freedom, sum of squares, mean square, F ratio, pure sum of
+    squares and percent contribution, plus the F test's ``p`` and the
+    ``pooled`` mask; see Anova.table(). ``response`` may also be a list of
+    columns, which gives a (rows, responses) array per column.
+    """
+    Y = _column(data, response) if isinstance(response, str) else \
+        np.column_stack([_column(data, name) for name in response])
+    return Anova(data, sources).table(Y, pool, pool_below)
+
+
+def rounded(table):
+    """The table rounded the way mold_DOE.py prints it.
+
+    SS, MS, PS and p go to 4 places, F and PI to 2, and the Total PI is
+    the sum of the rounded percentages of the sources left unpooled and
+    Error.
+    """
+    out = dict(table)
+    for column, places in (('SS', 4), ('MS', 4), ('PS', 4), ('F', 2), ('PI', 2), ('p', 4)):
+        if column in table:
+            out[column] = np.round(np.asarray(table[column], dtype=float), places)
+    PI = out['PI'][:-1]
+    if 'pooled' in table:
+        pooled = np.asarray(table['pooled'])
+        PI = np.where(np.concatenate([pooled, np.zeros_like(pooled[:1])]), 0, PI)
+    out['PI'][-1] = PI.sum(axis=0).round(2)
+    return out
+
+
+def anova_frame(table, columns=ANOVA_COLUMNS):
+    """The ANOVA dict of one response as a pandas DataFrame (imports pandas)."""
+    import pandas as pd
+
+    return pd.DataFrame({column: table[column] for column in columns})
+
+
+def format_table(table, columns=ANOVA_COLUMNS):
+    """Plain-text ANOVA table of one response, no pandas needed."""
+    rows = [columns]
+    for i in range(len(table['Source'])):
+        rows.append([str(table[c][i]) for c in columns])
+    widths = [max(len(row[j]) for row in rows) for j in range(len(columns))]
+    return '\n'.join('  '.join(v.rjust(w) for v, w in zip(row, widths)) for row in rows)
@@ -0,0 +1,60 @@
+"""Vectorized batch versions of the Fuzzy*.py inference pipelines.
+
+Every function accepts scalars or NumPy arrays of ``err`` / ``errRate``
+(broadcast against each other) and evaluates all samples in one pass,
+giving the same numbers as the scalar scripts.
+"""
+from .rules import RuleBase
+from .sets import (ERR_TERMS, ERRRATE_TERMS, OUTPOWER_TERMS, RULES, adaptive_universes,
+                   universes)
+
+
+def make_controller(step=0.1, err_terms=ERR_TERMS, errRate_terms=ERRRATE_TERMS,
+                    outPower_terms=OUTPOWER_TERMS, dtype=float, adaptive=False):
+    """The blog's 3x3 err/errRate temperature controller at universe ``step``.
+
+    The term breakpoints default to the blog's; the rules stay RULES.
+    ``dtype`` (float or np.float32) is that of the universes and sampled
+    sets. ``adaptive`` keeps only the universe points that shape the sets
+    (sets.adaptive_universes). It gives the same results from a handful of
+    input points; the output universe keeps about half of its points.
+    """
+    if adaptive:
+        x_err, x_errRate, x_outPower = adaptive_universes(step, dtype, err_terms,
+                                                          errRate_terms, outPower_terms)
+    else:
+        x_err, x_errRate, x_outPower = universes(step, dtype)
+    return RuleBase([('err', x_err, err_terms),
+                     ('errRate', x_errRate, errRate_terms)],
+                    ('outPower', x_outPower, outPower_terms),
+                    RULES)
+
+
+controller = make_controller()
+
+
+def mamdani(err, errRate, method='grid'):
+    """Batch Mamdani inference of FuzzyCTRL.py: min AND, clip, max, centroid."""
+    return controller.mamdani(err, errRate, method=method)
+
+
+def rss_cog(err, errRate, method='grid'):
+    """Batch FuzzyRSS_COG.py: RSS per consequent, clip, max, centroid."""
+    return controller.rss_cog(err, errRate, method=method)
+
+
+def rss_wa(err, errRate, method='grid'):
+    """Batch FuzzyRSS_WA.py: weighted average of RSS heights at moving centroids."""
+    return controller.rss_wa(err, errRate, method=method)
+
+
+def tsk(err, errRate, method='grid'):
+    """Batch FuzzyTSK.py: weighted average of RSS heights at fixed singletons."""
+    return controller.tsk(err, errRate, method=method)
+
+
+# inference variants by name, all called as f(err, errRate, method)
+METHODS = {'mamdani': mamdani,
+           'rss_cog': rss_cog,
+           'rss_wa': rss_wa,
+           'tsk': tsk}
@@ -0,0 +1,226 @@
+"""Cached columnar loading of DOE workbooks and CSV run logs.
+
+Parsing xlsx is the slowest step of an analysis. load() therefore
+converts a workbook sheet or a CSV file once into a table file in the
+cache directory and serves every later call from there. A table file is
+an artifact.write_arrays() file with one array per column. load() maps
+it read-only and hands out views, so only the pages of the columns that
+are actually used are read from disk.
+
+A table file is keyed by the source's real path and sheet. It records
+the source's size, mtime and SHA-256. A size or mtime change makes
+load() hash the source again; if the content changed, the table is
+rebuilt, otherwise the new mtime is noted in a small ``.stamp`` file
+next to the table and the table is left as it is. The cache lives in
+``$FUZZYZONES_CACHE``, or ``~/.cache/fuzzyzones`` without it.
+
+Sources are parsed with pandas, imported only on a cache miss. Workbook
+sheets go through doe.read_experiment(). CSV logs are read ``chunk_rows``
+rows at a time and only for the columns asked for. Every chunk is
+appended to a raw spool file per column next to the cache as it is
+parsed, and the table file is then assembled from those a chunk at a
+time, so memory holds one chunk whatever the size of the log. A table
+that lacks columns asked for later is rebuilt with those added. Numeric
+columns stay numeric and anything else becomes fixed-width text.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .artifact import Artifact, replacing, write_chunks
+
+KIND = 'fuzzyzones.table'
+CACHE_VERSION = 2
+
+_EXCEL = ('.xlsx', '.xlsm', '.xls')
+
+
+def cache_dir():
+    """The default cache directory."""
+    return os.environ.get('FUZZYZONES_CACHE') or \
+        os.path.join(os.path.expanduser('~'), '.cache', 'fuzzyzones')
+
+
+def file_hash(path, block=1 << 20):
+    """Hex SHA-256 of the file's contents."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_path(path, sheet=None, directory=None):
+    """Table file of ``path`` (and ``sheet``) in ``directory``."""
+    key = '{}\0{}'.format(os.path.realpath(path), sheet or '')
+    name = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20] + '.fzt'
+    return os.path.join(directory or cache_dir(), name)
+
+
+def _column(values):
+    """A mappable array: numbers as they are, anything else as text."""
+    values = np.asarray(values)
+    return values.astype(str) if values.dtype.hasobject else values
+
+
+def _read_excel(path, sheet):
+    from .doe import read_experiment
+
+    frame = read_experiment(path, sheet)
+    columns = {frame.index.name or 'index': _column(frame.index.to_numpy())}
+    columns.update((str(name), _column(frame[name].to_numpy())) for name in frame.columns)
+    return {name: (a.dtype, a.shape, [a]) for name, a in columns.items()}
+
+
+def _read_csv(path, chunk_rows, columns, spool):
+    """write_chunks() arrays of the ``columns`` of a CSV file (all when None).
+
+    Each chunk of ``chunk_rows`` rows is appended to one raw file per
+    column under ``spool`` as soon as it is parsed. The returned pieces
+    read those back a chunk at a time, so the whole file is never in
+    memory.
+    """
+    import pandas as pd
+
+    names = [str(name) for name in pd.read_csv(path, nrows=0).columns]
+    for name in columns or ():
+        if name not in names:
+            raise ValueError("{} has no column {}.".format(path, name))
+    if columns is not None:
+        names = [name for name in names if name in columns]
+    parts = {name: [] for name in names}
+    files = [os.path.join(spool, str(i)) for i in range(len(names))]
+    handles = [open(f, 'wb') for f in files]
+    try:
+        for chunk in pd.read_csv(path, chunksize=chunk_rows, usecols=names):
+            for name, f in zip(names, handles):
+                a = _column(chunk[name].to_numpy())
+                parts[name].append((a.dtype, len(a), f.tell()))
+                f.write(np.ascontiguousarray(a).tobytes())
+    finally:
+        for f in handles:
+            f.close()
+
+    def pieces(name, f, text):
+        for dtype, rows, offset in parts[name]:
+            a = np.fromfile(f, dtype=dtype, count=rows, offset=offset)
+            yield a.astype(str) if text else a
+
+    out = {}
+    for name, f in zip(names, files):
+        dtypes = [dtype for dtype, _, _ in parts[name]]
+        length = sum(rows for _, rows, _ in parts[name])
+        if any(dtype.kind == 'U' for dtype in dtypes):
+            # numbers in an otherwise text column become text, as one array would
+            width = max([1] + [dtype.itemsize // 4 if dtype.kind == 'U' else
+                               np.fromfile(f, dtype=dtype, count=rows, offset=offset)
+                               .astype(str).dtype.itemsize // 4
+                               for dtype, rows, offset in parts[name]])
+            out[name] = ('U{}'.format(width), (length,), pieces(name, f, True))
+        else:
+            out[name] = (np.result_type(*dtypes) if dtypes else float, (length,),
+                         pieces(name, f, False))
+    return out
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _seen(table):
+    """The stamp last verified against ``table``'s hash, or None."""
+    try:
+        with open(table + '.stamp') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _fresh(art, path, stamp):
+    """Whether the table ``art`` still matches ``path``; notes a stale mtime."""
+    meta = art.meta
+    if meta.get('kind') != KIND or meta.get('version') != CACHE_VERSION:
+        return False
+    if meta['size'] == stamp['size'] and meta['mtime_ns'] == stamp['mtime_ns']:
+        return True
+    verified = dict(stamp, sha256=meta['sha256'])
+    if _seen(art.path) == verified:
+        return True
+    if meta['size'] != stamp['size'] or meta['sha256'] != file_hash(path):
+        return False
+    with replacing(art.path + '.stamp', 'w') as f:
+        json.dump(verified, f)
+    return True
+
+
+def convert(path, sheet='Mold_DOE', directory=None, chunk_rows=100000, columns=None):
+    """Parse ``path`` into its table file and return the table file's path.
+
+    A CSV file is parsed for ``columns`` only, or all of them when None;
+    a workbook sheet always whole.
+    """
+    excel = str(path).lower().endswith(_EXCEL)
+    target = cache_path(path, sheet if excel else None, directory)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    stamp = _stamp(path)
+    digest = file_hash(path)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(target)) as spool:
+        arrays = _read_excel(path, sheet) if excel else \
+            _read_csv(path, chunk_rows, columns, spool)
+        if _stamp(path) != stamp:
+            raise RuntimeError("{} changed while it was being cached.".format(path))
+        write_chunks(target, {'column{}'.format(i): a for i, a in enumerate(arrays.values())},
+                     dict(stamp, kind=KIND, version=CACHE_VERSION, source=os.path.realpath(path),
+                          sheet=sheet if excel else None, sha256=digest, columns=list(arrays),
+                          complete=excel or columns is None))
+    return target
+
+
+def load(path, columns=None, sheet='Mold_DOE', directory=None, chunk_rows=100000):
+    """Columns of a workbook sheet or CSV file, as {name: read-only array}.
+
+    ``columns`` picks and orders the columns; by default all of them are
+    returned, in file order. A workbook's run index is its first column.
+    The sheet only matters for workbooks. The first call, and the first
+    call after the source changes, parses the file into the cache. CSV
+    files are parsed for the columns asked for; asking for others later
+    parses the file again for all of them together.
+    """
+    excel = str(path).lower().endswith(_EXCEL)
+    target = cache_path(path, sheet if excel else None, directory)
+    stamp = _stamp(path)
+    art = None
+    if os.path.exists(target):
+        try:
+            art = Artifact(target)
+            if not _fresh(art, path, stamp):
+                art = None
+        except (ValueError, KeyError):
+            art = None
+    wanted = None if columns is None else list(columns)
+    if art is not None and not art.meta['complete']:
+        cached = art.meta['columns']
+        if wanted is None:
+            art = None
+        elif any(name not in cached for name in wanted):
+            wanted = cached + [name for name in wanted if name not in cached]
+            art = None
+    if art is None:
+        art = Artifact(convert(path, sheet, directory, chunk_rows, wanted))
+    names = art.meta['columns']
+    for name in columns or ():
+        if name not in names:
+            raise ValueError("{} has no column {}.".format(path, name))
+    return {name: art['column{}'.format(names.index(name))] for name in columns or names}
+
+
+def chunks(path, columns=None, rows=100000, **options):
+    """load() ``rows`` rows at a time: an iterator of {name: view} slices."""
+    table = load(path, columns, **options)
+    n = len(next(iter(table.values()))) if table else 0
+    for start in range(0, n, rows):
+        yield {name: a[start:start + rows] for name, a in table.items()}
@@ -0,0 +1,180 @@
+"""Closed-loop Monte Carlo of many first-order-plus-dead-time thermal plants.
+
+All plants advance in lockstep. On every step each measurement gets its
+noise and the err/errRate of every plant are formed. Then one batched
+inference call returns outPower for the whole fleet. The plant model is
+SimulatedPlant's ``dT/dt = (ambient - T)/tau + gain*outPower/100``, plus
+a dead time on the actuator and a step heat-load disturbance. It is
+integrated with the exact first-order discretization, so any ``dt`` is
+stable.
+
+Step-response metrics are accumulated on the fly: rise time (10-90%),
+percent overshoot, settling time (2% band) and IAE. Memory therefore
+stays O(plants), however many steps are run.
+"""
+import numpy as np
+
+from .inference import METHODS
+from .sets import x_err, x_errRate
+
+
+class FOPDTPlants:
+    """``n`` FOPDT thermal zones with per-plant parameters.
+
+    Every parameter broadcasts to (n,). ``dead_time`` is in seconds;
+    ``disturbance`` (degrees per second) is added to dT/dt from
+    ``disturbance_time`` on. ``noise`` is the measurement noise standard
+    deviation.
+    """
+
+    def __init__(self, n, gain=0.5, tau=60.0, dead_time=0.0, ambient=20.0,
+                 initial=None, noise=0.0, disturbance=0.0, disturbance_time=np.inf):
+        def param(v):
+            return np.array(np.broadcast_to(np.asarray(v, dtype=float), (n,)))
+        self.n = n
+        self.gain = param(gain)
+        self.tau = param(tau)
+        self.dead_time = param(dead_time)
+        self.ambient = param(ambient)
+        self.initial = self.ambient.copy() if initial is None else param(initial)
+        self.noise = param(noise)
+        self.disturbance = param(disturbance)
+        self.disturbance_time = param(disturbance_time)
+
+    @classmethod
+    def random(cls, n, seed=None, gain=(0.3, 0.8), tau=(30.0, 120.0),
+               dead_time=(0.0, 5.0), ambient=(18.0, 24.0), noise=(0.0, 0.05),
+               disturbance=(-0.02, 0.02), disturbance_time=(0.5, 0.9), duration=600.0):
+        """Plants with every parameter uniform in its (low, high) range.
+
+        ``disturbance_time`` is a fraction of ``duration``. Plants start at
+        ambient.
+        """
+        rng = np.random.default_rng(seed)
+
+        def draw(bounds):
+            return rng.uniform(bounds[0], bounds[1], n)
+        return cls(n, gain=draw(gain), tau=draw(tau), dead_time=draw(dead_time),
+                   ambient=draw(ambient), noise=draw(noise),
+                   disturbance=draw(disturbance),
+                   disturbance_time=draw(disturbance_time) * duration)
+
+
+def _controller(infer, method):
+    if isinstance(infer, str):
+        f = METHODS[infer]
+        return lambda err, errRate: f(err, errRate, method)
+    return infer
+
+
+def closed_loop(plants, setpoint, infer='tsk', method='exact', dt=1.0, steps=600,
+                err_scale=1.0, rate_scale=1.0, out_scale=1.0, velocity=None,
+                rate_tau=0.0, band=0.02, seed=None, record=None):
+    """Simulate a setpoint step for every plant; return per-plant metrics.
+
+    ``infer`` is a name in ``METHODS`` (with ``method``), a compiled
+    Surface, or any vectorized ``f(err, errRate)``. err and errRate are
+    multiplied by ``err_scale`` / ``rate_scale`` and clamped to the
+    controller universes. The output is multiplied by ``out_scale``.
+    outPower drives the heater directly, or with ``velocity`` (per second)
+    it is integrated as ``u += velocity*dt*outPower`` within -100..100,
+    which removes the steady-state offset of the PD-like rule base.
+    ``rate_tau`` low-pass filters errRate as in StreamController.
+
+    Returns a dict of (n,) arrays: rise_time, overshoot (percent of the
+    step), settling_time (NaN if still outside ``band`` at the end), iae
+    and final_error. With ``record`` (plant indices) the dict also holds
+    the time axis plus their temperature and outPower histories.
+    """
+    f = _controller(infer, method)
+    n = plants.n
+    rng = np.random.default_rng(seed)
+    setpoint = np.array(np.broadcast_to(np.asarray(setpoint, dtype=float), (n,)))
+
+    T = plants.initial.copy()
+    step_size = setpoint - T
+    safe = np.where(step_size == 0, 1.0, step_size)
+    decay = np.exp(-dt / plants.tau)
+
+    # actuator history for the dead time
+    delay = np.rint(plants.dead_time / dt).astype(int)
+    history = np.zeros((delay.max() + 1, n))
+    plant_index = np.arange(n)
+
+    u = np.zeros(n)
+    err_prev = None
+    errRate = np.zeros(n)
+    alpha = dt / (rate_tau + dt)
+
+    t10 = np.full(n, np.nan)
+    t90 = np.full(n, np.nan)
+    peak = np.zeros(n)
+    last_outside = np.zeros(n)
+    iae = np.zeros(n)
+    if record is not None:
+        record = np.asarray(record)
+        temperature = np.empty((steps + 1, len(record)))
+        power = np.empty((steps, len(record)))
+        temperature[0] = T[record]
+
+    for k in range(steps):
+        t = k * dt
+        measured = T + plants.noise * rng.standard_normal(n)
+        err = setpoint - measured
+        if err_prev is not None:
+            errRate += alpha * ((err - err_prev) / dt - errRate)
+        err_prev = err
+
+        e = np.clip(err * err_scale, x_err[0], x_err[-1])
+        r = np.clip(errRate * rate_scale, x_errRate[0], x_errRate[-1])
+        out = np.nan_to_num(np.asarray(f(e, r), dtype=float) * out_scale)
+        if velocity is None:
+            u = np.clip(out, -100.0, 100.0)
+        else:
+            u = np.clip(u + velocity * dt * out, -100.0, 100.0)
+
+        history[k % len(history)] = u
+        applied = np.where(k >= delay, history[(k - delay) % len(history), plant_index], 0.0)
+
+        load = np.where(t >= plants.disturbance_time, plants.disturbance, 0.0)
+        target = plants.ambient + plants.tau * (plants.gain * applied / 100 + load)
+        T = target + (T - target) * decay
+
+        # step-response bookkeeping on the true temperature
+        t_next = t + dt
+        progress = (T - plants.initial) / safe
+        t10 = np.where(np.isnan(t10) & (progress >= 0.1), t_next, t10)
+        t90 = np.where(np.isnan(t90) & (progress >= 0.9), t_next, t90)
+        np.maximum(peak, progress, out=peak)
+        last_outside = np.where(np.abs(1 - progress) > band, t_next, last_outside)
+        iae += np.abs(setpoint - T) * dt
+        if record is not None:
+            temperature[k + 1] = T[record]
+            power[k] = u[record]
+
+    end = steps * dt
+    results = {'rise_time': t90 - t10,
+               'overshoot': np.maximum(peak - 1, 0.0) * 100,
+               'settling_time': np.where(last_outside < end, last_outside, np.nan),
+               'iae': iae,
+               'final_error': setpoint - T}
+    if record is not None:
+        results['time'] = np.arange(steps + 1) * dt
+        results['temperature'] = temperature
+        results['outPower'] = power
+    return results
+
+
+def summarize(results):
+    """Median, p90 and worst of every metric, NaN-aware, as plain floats."""
+    summary = {}
+    for key in ('rise_time', 'overshoot', 'settling_time', 'iae', 'final_error'):
+        v = results[key]
+        if key == 'final_error':
+            v = np.abs(v)
+        finite = v[np.isfinite(v)]
+        summary[key] = {'median': float(np.median(finite)) if len(finite) else None,
+                        'p90': float(np.percentile(finite, 90)) if len(finite) else None,
+                        'max': float(finite.max()) if len(finite) else None,
+                        'missing': int(len(v) - len(finite))}
+    return summary
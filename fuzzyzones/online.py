@@ -0,0 +1,167 @@
+"""Online two-level DOE analysis of production runs as they arrive.
+
+OnlineDOE keeps, for every cell of the 2^k factorial, the run count and
+each response's running mean and sum of squared deviations (Welford's
+update). add() files one observation in O(k + responses) time, whatever
+the number of runs so far. extend() merges a batch with the parallel
+form of the same update. Settings are assigned to the nearer of each
+factor's two levels.
+
+The analysis is computed from the cell statistics only, so it costs the
+same after ten runs as after ten million:
+
+- contrasts() and effects() run one Yates pass (factorial.fwht()) over
+  the cell means;
+- anova() puts every main and interaction term against the pure error
+  within cells, through the same table code as doe.anova(). With unequal
+  cell counts it is the unweighted-means analysis: each term's SS uses
+  the harmonic mean count, and Total is the sum of the rows. With equal
+  counts it is the ordinary ANOVA.
+
+Cells with no runs yet give NaN. snapshot() returns the state as
+JSON-serializable data, restore() rebuilds an analyzer from it, and
+save() writes it through a temporary file.
+"""
+import json
+
+import numpy as np
+
+from .artifact import replacing
+from .doe import _table
+from .factorial import fwht
+
+
+def _terms(factors):
+    """Term names in Yates order, bit j of the index standing for factor j."""
+    return ['*'.join(f for j, f in enumerate(factors) if mask >> j & 1)
+            for mask in range(1, 2**len(factors))]
+
+
+class OnlineDOE:
+    """Running cell statistics of a 2^k experiment.
+
+    ``levels`` maps each factor to its (low, high) settings, e.g.
+    factorial.Design.levels; ``responses`` names the measured columns.
+    """
+
+    def __init__(self, levels, responses=('Length',)):
+        self.factors = tuple(levels)
+        self.levels = {f: (float(levels[f][0]), float(levels[f][1])) for f in self.factors}
+        self.responses = (responses,) if isinstance(responses, str) else tuple(responses)
+        self.terms = _terms(self.factors)
+        self._order = np.array([t.count('*') + 1 for t in self.terms])
+        cells, R = 2**len(self.factors), len(self.responses)
+        self.count = np.zeros(cells, dtype=np.int64)
+        self.mean = np.zeros((cells, R))
+        self.M2 = np.zeros((cells, R))
+        self._mid = np.array([sum(self.levels[f]) / 2 for f in self.factors])
+        self._up = np.array([self.levels[f][1] > self.levels[f][0] for f in self.factors])
+        self._bits = 1 << np.arange(len(self.factors))
+
+    @property
+    def observations(self):
+        return int(self.count.sum())
+
+    def _cell(self, settings):
+        """Cell index of one run's settings (a mapping or a sequence in factor order)."""
+        if isinstance(settings, dict):
+            settings = [settings[f] for f in self.factors]
+        cell = 0
+        for j, (v, mid, up) in enumerate(zip(settings, self._mid, self._up)):
+            if (v > mid) == up:
+                cell |= 1 << j
+        return cell
+
+    def add(self, settings, y):
+        """File one run: its factor ``settings`` and a value per response."""
+        c = self._cell(settings)
+        y = np.broadcast_to(np.asarray(y, dtype=float), self.mean.shape[1:])
+        self.count[c] += 1
+        d = y - self.mean[c]
+        self.mean[c] += d / self.count[c]
+        self.M2[c] += d * (y - self.mean[c])
+
+    def extend(self, X, Y):
+        """File a batch: settings ``X`` (runs, factors) and responses ``Y`` (runs, responses)."""
+        X = np.asarray(X, dtype=float).reshape(-1, len(self.factors))
+        Y = np.asarray(Y, dtype=float).reshape(len(X), -1)
+        cells = (((X > self._mid) == self._up) * self._bits).sum(axis=1)
+        C = len(self.count)
+        n = np.bincount(cells, minlength=C)
+        hit = n > 0
+        sums = np.zeros(self.mean.shape)
+        np.add.at(sums, cells, Y)
+        mean = sums[hit] / n[hit, None]
+        M2 = np.zeros(self.mean.shape)
+        np.add.at(M2, cells, (Y - (sums / np.maximum(n, 1)[:, None])[cells])**2)
+        # Chan et al.'s pairwise merge of (count, mean, M2)
+        na, nb = self.count[hit, None], n[hit, None]
+        total = na + nb
+        d = mean - self.mean[hit]
+        self.mean[hit] += d * nb / total
+        self.M2[hit] += M2[hit] + d**2 * na * nb / total
+        self.count += n
+
+    def contrasts(self):
+        """(mean, effects): grand mean (responses,) and term effects (terms, responses).
+
+        Every cell weighs the same; NaN until every cell has a run.
+        """
+        means = np.where(self.count[:, None] > 0, self.mean, np.nan)
+        c = fwht(means)
+        C = len(self.count)
+        return c[0] / C, c[1:] * 2 / C
+
+    def effects(self, response=None):
+        """Term name --> effect for one response, the first by default."""
+        r = 0 if response is None else self.responses.index(response)
+        _, e = self.contrasts()
+        return dict(zip(self.terms, e[:, r].tolist()))
+
+    def anova(self, order=None, pool=(), pool_below=None):
+        """ANOVA of every response, as doe.anova() with pure error.
+
+        Terms above interaction ``order`` are pooled into Error along with
+        ``pool`` and, with ``pool_below``, the terms whose F is below it.
+        A single response gives 1-D columns. Once every cell has a run the
+        table is defined; F needs replicates or pooling.
+        """
+        C = len(self.count)
+        _, e = self.contrasts()
+        with np.errstate(divide='ignore'):
+            harmonic = C / (1 / self.count).sum()
+        SS = harmonic * C * (e / 2)**2
+        SS_e = self.M2.sum(axis=0)
+        fe = self.observations - C
+        pool = list(pool)
+        if order is not None:
+            pool += [t for t, o in zip(self.terms, self._order) if o > order and t not in pool]
+        return _table(self.terms, SS, np.ones(C - 1, dtype=int), SS_e, fe,
+                      SS.sum(axis=0) + SS_e, self.observations - 1, pool, pool_below,
+                      single=len(self.responses) == 1)
+
+    def snapshot(self):
+        """The analyzer's state as JSON-serializable data."""
+        return {'levels': {f: list(v) for f, v in self.levels.items()},
+                'responses': list(self.responses), 'count': self.count.tolist(),
+                'mean': self.mean.tolist(), 'M2': self.M2.tolist()}
+
+    @classmethod
+    def restore(cls, state):
+        """An analyzer continuing from a snapshot()."""
+        doe = cls(state['levels'], state['responses'])
+        doe.count[:] = state['count']
+        doe.mean[:] = state['mean']
+        doe.M2[:] = state['M2']
+        return doe
+
+    def save(self, path):
+        """Write snapshot() as JSON through a temporary file (artifact.replacing())."""
+        with replacing(path, 'w') as f:
+            json.dump(self.snapshot(), f)
+
+    @classmethod
+    def load(cls, path):
+        """restore() from a file written by save()."""
+        with open(path) as f:
+            return cls.restore(json.load(f))
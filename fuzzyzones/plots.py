@@ -0,0 +1,146 @@
+"""The blog figures, drawn on request.
+
+matplotlib is imported inside each function, so importing the package
+never pays for it. Every function draws into a new figure and returns
+it. Nothing calls ``plt.show()``; the caller shows or saves the figure.
+"""
+import numpy as np
+
+from .sets import ERR_TERMS, ERRRATE_TERMS, OUTPOWER_TERMS, membership, universes
+
+_COLORS = ('b', 'orange', 'r', 'g', 'm', 'c')
+
+
+def _pyplot():
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def plot_sets(step=0.1, err=None, errRate=None, method='mamdani'):
+    """Membership functions of err, errRate and outPower (the scripts' 2x2 figure).
+
+    With ``err`` and ``errRate`` the fourth panel marks the outPower of
+    ``METHODS[method]`` for that input.
+    """
+    plt = _pyplot()
+    fig, axes = plt.subplots(2, 2, figsize=(11, 7))
+    titles = ('Temp Different Fuzzy Sets', 'Rate of Temp Change Fuzzy Sets',
+              'outPower Fuzzy Sets')
+    for ax, name, x, terms, title in zip(axes.flat, ('err', 'errRate', 'outPower'),
+                                         universes(step),
+                                         (ERR_TERMS, ERRRATE_TERMS, OUTPOWER_TERMS),
+                                         titles):
+        for (term, points), color in zip(terms, _COLORS):
+            ax.plot(x, membership(x, points), color=color, lw=2,
+                    label='{}_{}'.format(name, term))
+        ax.set_xlabel(name, fontsize=10)
+        ax.set_ylabel('Membership', fontsize=10)
+        ax.set_title(title)
+        ax.legend()
+
+    ax4 = axes[1, 1]
+    if err is not None and errRate is not None:
+        from .inference import METHODS
+
+        powerLevel = float(METHODS[method](err, errRate))
+        ax4.plot([powerLevel, powerLevel], [0, 1], 'm--', lw=3, label='Power Level')
+        ax4.set_xlim(-100, 100)
+        ax4.set_title("Power output: {:.2f}% , err = {:.1f} , errRate = {:.1f}"
+                      .format(powerLevel, err, errRate))
+        ax4.legend()
+    else:
+        ax4.set_axis_off()
+    fig.tight_layout(pad=0.4, w_pad=2, h_pad=2)
+    return fig
+
+
+def plot_level_means(data, factors, response='Length'):
+    """Average response at the low and high level of every factor."""
+    from .doe import level_means
+
+    plt = _pyplot()
+    fig, ax = plt.subplots()
+    markers = ('rs-', 'co-', 'bD-', 'gv-', 'y^-', 'k<-')
+    for i, factor in enumerate(factors):
+        levels, means = level_means(data, factor, response)
+        labels = ['{}{}'.format(factor, k + 1) for k in range(len(levels))]
+        ax.plot(labels, means, markers[i % len(markers)], lw=3, markersize=10,
+                markerfacecolor='m')
+        for label, mean in zip(labels, means.round(3)):
+            ax.annotate(str(mean), (label, mean), xytext=(5, 0),
+                        textcoords='offset points', color='g')
+    ax.set_title('Average effects at Low and High Levels')
+    ax.set_xlabel('Factor Levels (Input Variables)')
+    ax.set_ylabel('Responses (mm)')
+    return fig
+
+
+def plot_effects(effects):
+    """Bar chart of signed effect magnitudes, ``effects`` as from doe.effects()."""
+    plt = _pyplot()
+    fig, ax = plt.subplots()
+    names = list(effects)
+    values = np.array([effects[k] for k in names], dtype=float)
+    ax.bar(names, values, color=['m', 'b', 'c', 'y', 'g', 'r'][:len(names)])
+    ax.axhline(0, color='k', lw=2)
+    for i, v in enumerate(values.round(4)):
+        ax.annotate(str(v), (i, v), ha='center',
+                    va='bottom' if v >= 0 else 'top')
+    ax.tick_params(axis='x', labelrotation=30)
+    ax.set_ylabel('Response Magnitudes (mm)')
+    ax.set_xlabel('Factors (Inputs & Interactions)')
+    ax.set_title('Magnitude of effects with +- sign')
+    fig.tight_layout()
+    return fig
+
+
+def plot_contour(lengths=np.arange(40.5, 40.81, 0.05), coolTime=np.arange(17, 30, 1),
+                 window=((18, 28), (400, 650)), surface=None, fixed=None):
+    """mold_DOE.py's Pressure-Time-Length lines against the process window.
+
+    Without ``surface`` this uses the blog's straight-line fit
+    ``2*L = 0.00135*Pressure + 0.01225*coolTime + 80.307``. Otherwise the
+    lines are the contours of a fitted rsm.ResponseSurface over coolTime
+    and holdPress, the other factors at ``fixed`` or their centers.
+    """
+    plt = _pyplot()
+    fig, ax = plt.subplots()
+    if surface is None:
+        lines = [(L, coolTime, (2 * L - (0.01225 * coolTime + 80.307)) / 0.00135)
+                 for L in lengths]
+    else:
+        xs, Ys = surface.contours('coolTime', 'holdPress', lengths, fixed, len(coolTime),
+                                  (coolTime[0], coolTime[-1]), 'Length')
+        lines = [(L, xs, Y) for branch in Ys for L, Y in zip(lengths, branch)]
+    for L, x, Pressure in lines:
+        ax.plot(x, Pressure)
+        ax.annotate(str(round(L, 2)), (x[-1], Pressure[-1]),
+                    xytext=(5, 0), textcoords='offset points')
+    (t0, t1), (p0, p1) = window
+    ax.plot([t0, t0, t1, t1, t0], [p0, p1, p1, p0, p0], 'b-', lw=3)
+    ax.set_ylabel('Hold Pressure (Psi)')
+    ax.set_xlabel('Cooling Time (seconds)')
+    ax.set_title('Contour Plot (Pressure-Time-Length) vs. Process Window')
+    return fig
+
+
+def plot_surface(surface, x, y, limits=None, fixed=None, n=201, levels=10, response=None):
+    """Filled contours of a fitted rsm.ResponseSurface over factors ``x`` and ``y``.
+
+    With ``limits`` (response --> (low, high)) the points outside the
+    process window are hatched.
+    """
+    plt = _pyplot()
+    fig, ax = plt.subplots()
+    r = 0 if response is None else surface.responses.index(response)
+    xs, ys, Z = surface.grid(x, y, fixed, n)
+    filled = ax.contourf(xs, ys, Z[r], levels)
+    ax.contour(xs, ys, Z[r], filled.levels, colors='k', linewidths=0.5)
+    fig.colorbar(filled, ax=ax, label=surface.responses[r])
+    if limits:
+        _, _, mask = surface.window(x, y, limits, fixed, n)
+        ax.contourf(xs, ys, ~mask, [0.5, 1.5], colors='none', hatches=['//'])
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    ax.set_title('{} response surface ({})'.format(surface.responses[r], surface.model))
+    return fig
@@ -0,0 +1,192 @@
+"""Least-squares response-surface models of DOE data.
+
+ResponseSurface.fit() fits one of three polynomial models to any number
+of responses at once, with a single least-squares solve:
+
+- ``linear``: intercept and main effects;
+- ``interaction``: plus every two-factor product;
+- ``quadratic``: plus every squared factor. A two-level design cannot
+  separate those from the intercept, so it needs center or axial runs.
+
+Factors are coded to [-1, 1] over the range of the runs before fitting.
+Two-level data therefore gets coefficients of half the doe.effects().
+
+The model replaces mold_DOE.py's hand-typed contour line
+``2*L = 0.00135*Pressure + 0.01225*coolTime + 80.307``. For a pair of
+factors, with the others held at fixed values, it reduces to a
+bivariate quadratic. grid() evaluates that on a meshgrid with
+broadcasting, in one call. contours() solves it along the x axis for
+each contour level. window() gives the mask of grid points where every
+response is inside its limits, i.e. the process window.
+"""
+import numpy as np
+
+from .doe import MOLD_FACTORS
+
+MODELS = ('linear', 'interaction', 'quadratic')
+
+
+def model_terms(k, model='linear'):
+    """Factor-index tuples of a model's terms: () intercept, (i,) main, (i, j) product."""
+    if model not in MODELS:
+        raise ValueError("The input for `model`, {}, was incorrect.".format(model))
+    terms = [()] + [(i,) for i in range(k)]
+    if model != 'linear':
+        terms += [(i, j) for i in range(k) for j in range(i + 1, k)]
+    if model == 'quadratic':
+        terms += [(i, i) for i in range(k)]
+    return terms
+
+
+def model_matrix(Xc, terms):
+    """Columns (..., terms) of the coded points ``Xc`` (..., factors)."""
+    Xc = np.asarray(Xc, dtype=float)
+    out = np.empty(Xc.shape[:-1] + (len(terms),))
+    for t, term in enumerate(terms):
+        out[..., t] = np.prod(Xc[..., list(term)], axis=-1)
+    return out
+
+
+class ResponseSurface:
+    """Fitted polynomial of ``responses`` over ``factors``; build it with fit().
+
+    ``coef`` (terms, responses) is in coded units. ``center`` and
+    ``scale`` map a factor value v to (v - center) / scale. ``r2`` and
+    ``rmse`` describe the fit of each response.
+    """
+
+    def __init__(self, factors, responses, model, center, scale, coef, r2=None, rmse=None):
+        self.factors = tuple(factors)
+        self.responses = tuple(responses)
+        self.model = model
+        self.terms = model_terms(len(self.factors), model)
+        self.center = np.asarray(center, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.coef = np.asarray(coef, dtype=float).reshape(len(self.terms), -1)
+        self.r2 = r2
+        self.rmse = rmse
+
+    @classmethod
+    def fit(cls, data, factors=MOLD_FACTORS, responses='Length', model='linear'):
+        """Least-squares fit of the ``responses`` columns of an experiment."""
+        responses = (responses,) if isinstance(responses, str) else tuple(responses)
+        X = np.column_stack([np.asarray(data[f], dtype=float) for f in factors])
+        Y = np.column_stack([np.asarray(data[r], dtype=float) for r in responses])
+        lo, hi = X.min(axis=0), X.max(axis=0)
+        if (hi == lo).any():
+            raise ValueError("Factor {} does not vary.".format(factors[int(np.argmax(hi == lo))]))
+        center, scale = (hi + lo) / 2, (hi - lo) / 2
+        terms = model_terms(len(factors), model)
+        A = model_matrix((X - center) / scale, terms)
+        coef, _, rank, _ = np.linalg.lstsq(A, Y, rcond=None)
+        if rank < len(terms):
+            raise ValueError("The {} model has {} terms but the runs determine only {}; "
+                             "add center or axial runs.".format(model, len(terms), rank))
+        residual = Y - A @ coef
+        SS_res = (residual**2).sum(axis=0)
+        SS_tot = ((Y - Y.mean(axis=0))**2).sum(axis=0)
+        dof = len(Y) - len(terms)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r2 = 1 - SS_res / SS_tot
+            rmse = np.sqrt(SS_res / dof) if dof > 0 else np.full(len(responses), np.nan)
+        return cls(factors, responses, model, center, scale, coef, r2, rmse)
+
+    def term_names(self):
+        """'1', 'f', 'f*g' and 'f^2' names of the terms, in coef order."""
+        names = []
+        for term in self.terms:
+            if not term:
+                names.append('1')
+            elif len(term) == 2 and term[0] == term[1]:
+                names.append(self.factors[term[0]] + '^2')
+            else:
+                names.append('*'.join(self.factors[i] for i in term))
+        return names
+
+    def coded(self, X):
+        """Coded values of factor settings ``X`` (..., factors)."""
+        return (np.asarray(X, dtype=float) - self.center) / self.scale
+
+    def predict(self, X):
+        """Responses (..., responses) at factor settings ``X`` (..., factors)."""
+        return model_matrix(self.coded(X), self.terms) @ self.coef
+
+    def _index(self, factor):
+        if factor not in self.factors:
+            raise ValueError("The input for `factor`, {}, was incorrect.".format(factor))
+        return self.factors.index(factor)
+
+    def _pair(self, x, y, fixed):
+        """Coefficients c[a, b] (3, 3, responses) of xc**a * yc**b, the other
+        factors held at ``fixed`` (default: their centers)."""
+        i, j = self._index(x), self._index(y)
+        if i == j:
+            raise ValueError("The input for `y`, {}, was incorrect.".format(y))
+        values = np.zeros(len(self.factors))
+        for f, v in (fixed or {}).items():
+            values[self._index(f)] = (v - self.center[self._index(f)]) / self.scale[self._index(f)]
+        c = np.zeros((3, 3, self.coef.shape[1]))
+        for term, coef in zip(self.terms, self.coef):
+            a, b = term.count(i), term.count(j)
+            c[a, b] += coef * np.prod([values[f] for f in term if f not in (i, j)])
+        return c
+
+    def _axis(self, factor, lim, n):
+        k = self._index(factor)
+        lo, hi = lim if lim is not None else (self.center[k] - self.scale[k],
+                                              self.center[k] + self.scale[k])
+        values = np.linspace(lo, hi, n)
+        return values, (values - self.center[k]) / self.scale[k]
+
+    def grid(self, x, y, fixed=None, n=101, xlim=None, ylim=None):
+        """(xs, ys, Z): ``n`` values of each factor and the responses Z (responses, ys, xs).
+
+        Axes span the fitted range unless ``xlim``/``ylim`` are given; the
+        other factors sit at ``fixed`` or their centers.
+        """
+        xs, xc = self._axis(x, xlim, n)
+        ys, yc = self._axis(y, ylim, n)
+        c = self._pair(x, y, fixed)
+        xp = np.stack([np.ones_like(xc), xc, xc**2])
+        yp = np.stack([np.ones_like(yc), yc, yc**2])
+        return xs, ys, np.einsum('abr,bj->rja', c, yp) @ xp
+
+    def contours(self, x, y, levels, fixed=None, n=101, xlim=None, response=None):
+        """(xs, Ys): the ``y`` values on each contour of ``response`` along ``x``.
+
+        Ys is (branches, levels, xs); a quadratic in ``y`` has two branches
+        and the linear and interaction models one. Points with no real
+        solution are NaN. The response defaults to the first one.
+        """
+        r = 0 if response is None else self.responses.index(response)
+        xs, xc = self._axis(x, xlim, n)
+        c = self._pair(x, y, fixed)[..., r]
+        levels = np.asarray(levels, dtype=float)[:, None]
+        # A*yc**2 + B*yc + C = 0; the terms are at most quadratic in total
+        A = c[0, 2]
+        B = c[0, 1] + c[1, 1] * xc
+        C = c[0, 0] + c[1, 0] * xc + c[2, 0] * xc**2 - levels
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if A == 0:
+                roots = (-C / B)[None]
+            else:
+                root = np.sqrt(B**2 - 4 * A * C)
+                roots = np.stack([(-B - root) / (2 * A), (-B + root) / (2 * A)])
+        k = self._index(y)
+        return xs, self.center[k] + self.scale[k] * roots
+
+    def window(self, x, y, limits, fixed=None, n=101, xlim=None, ylim=None):
+        """(xs, ys, mask): grid points (ys, xs) where every response is inside ``limits``.
+
+        ``limits`` maps response names to (low, high); None leaves that
+        side open.
+        """
+        xs, ys, Z = self.grid(x, y, fixed, n, xlim, ylim)
+        mask = np.ones(Z.shape[1:], dtype=bool)
+        for name, (lo, hi) in limits.items():
+            z = Z[self.responses.index(name)]
+            if lo is not None:
+                mask &= z >= lo
+            if hi is not None:
+                mask &= z <= hi
+        return xs, ys, mask
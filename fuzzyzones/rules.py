@@ -0,0 +1,521 @@
+"""Declarative rule bases compiled to index arrays.
+
+A rule is a tuple of one term name per input followed by the consequent
+term, e.g. ``('N', 'Z', 'C')`` for "err is N and errRate is Z --> outPower
+is C". RuleBase turns the rules into an (rules, inputs) antecedent index
+array and a consequent index array. Firing strengths then become one
+gather plus a minimum per input, and per-consequent aggregation becomes
+one segmented reduce. This holds for any number of inputs and terms.
+"""
+import time
+
+import numpy as np
+
+from .centroid import ClippedSets, HeightCentroids, centroid_weights, clip_centroid
+from .sets import membership
+
+# membership treated as zero when indexing term supports
+_NEGLIGIBLE = 1e-12
+
+
+class Variable:
+    """A named universe with its fuzzy terms.
+
+    ``terms`` is a sequence of ``(name, shape)``. A shape is either trimf /
+    trapmf breakpoints (a list or tuple of 3 or 4 numbers) or a membership
+    array already sampled on ``universe``. The universe may be uneven
+    (see sets.adaptive_universe). A float32 universe keeps the universe
+    and membership arrays in float32, evaluated in float64 first.
+    """
+
+    def __init__(self, name, universe, terms):
+        self.name = name
+        universe = np.asarray(universe)
+        dtype = universe.dtype if universe.dtype == np.float32 else np.float64
+        x = universe.astype(float)
+        self.universe = universe.astype(dtype)
+        self.names = [term for term, _ in terms]
+        self.points = [None if isinstance(shape, np.ndarray) else list(shape)
+                       for _, shape in terms]
+        self.mf = np.vstack([np.asarray(shape, dtype=float) if points is None
+                             else membership(x, points)
+                             for (_, shape), points in zip(terms, self.points)]).astype(dtype)
+        self._index_supports()
+
+    @classmethod
+    def from_arrays(cls, name, universe, names, points, mf):
+        """A Variable around an already sampled (terms, universe) ``mf``.
+
+        The arrays are used as given, without copying, so read-only memory
+        maps work. ``points`` holds each term's breakpoints, or None for
+        terms given as arrays.
+        """
+        var = cls.__new__(cls)
+        var.name = name
+        var.universe = universe
+        var.names = list(names)
+        var.points = [None if p is None else list(p) for p in points]
+        var.mf = mf
+        var._index_supports()
+        return var
+
+    def _index_supports(self):
+        """Sorted breakpoints and the terms that can be non-zero between them.
+
+        Supports come from the sampled sets, so they agree with fuzzify();
+        memberships below ``_NEGLIGIBLE`` (rounding residue of the sampled
+        breakpoints) do not count.
+        ``active[i]`` lists the terms that may be non-zero for values in
+        ``[breakpoints[i-1], breakpoints[i])``, padded with -1; the first and
+        last intervals lie outside the universe and have none.
+        """
+        x = self.universe
+        supports = []
+        for row in self.mf:
+            nz = np.flatnonzero(row > _NEGLIGIBLE)
+            if len(nz):
+                supports.append((x[max(nz[0] - 1, 0)], x[min(nz[-1] + 1, len(x) - 1)]))
+            else:
+                supports.append((np.inf, -np.inf))
+        bp = {x[0], x[-1]}
+        for lo, hi in supports:
+            bp.update(v for v in (lo, hi) if np.isfinite(v))
+        self.breakpoints = np.array(sorted(bp))
+
+        left = np.concatenate([[-np.inf], self.breakpoints])
+        right = np.concatenate([self.breakpoints, [np.inf]])
+        at_left = np.stack([np.interp(left, x, row, left=0.0, right=0.0)
+                            for row in self.mf], axis=1)
+        active = []
+        for i in range(len(left)):
+            inside = x[0] <= left[i] and right[i] <= x[-1]
+            terms = [t for t, (lo, hi) in enumerate(supports)
+                     if at_left[i, t] > _NEGLIGIBLE or (inside and lo < right[i] and hi > left[i])]
+            active.append(terms)
+        width = max(1, max(len(terms) for terms in active))
+        self.active = np.full((len(active), width), -1, dtype=int)
+        for i, terms in enumerate(active):
+            self.active[i, :len(terms)] = terms
+
+    def active_terms(self, values):
+        """Bisect ``values`` into the breakpoints; (n, width) term ids, -1 padded."""
+        values = np.asarray(values, dtype=float).ravel()
+        return self.active[np.searchsorted(self.breakpoints, values, side='right')]
+
+    def index(self, term):
+        return self.names.index(term)
+
+    def fuzzify(self, values):
+        """Membership of every value in every term, shape (n, terms).
+
+        Same as ``fuzz.interp_membership`` per term: linear interpolation on
+        the sampled sets, zero outside the universe.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        return np.stack([np.interp(values, self.universe, row, left=0.0, right=0.0)
+                         for row in self.mf], axis=1)
+
+
+def _variable(spec):
+    return spec if isinstance(spec, Variable) else Variable(*spec)
+
+
+class _Antecedents:
+    """Fuzzification and dense firing over ``inputs`` and ``antecedents``."""
+
+    def fuzzify(self, *values):
+        """Broadcast shape and per-input memberships of the crisp ``values``."""
+        if len(values) != len(self.inputs):
+            raise ValueError("Expected {} inputs, got {}.".format(len(self.inputs),
+                                                                  len(values)))
+        values = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in values])
+        return values[0].shape, [var.fuzzify(v) for var, v in zip(self.inputs, values)]
+
+    def fire(self, memberships):
+        """AND (minimum) of the antecedents of every rule, shape (n, rules)."""
+        R = memberships[0][:, self.antecedents[:, 0]]
+        for i in range(1, len(memberships)):
+            np.minimum(R, memberships[i][:, self.antecedents[:, i]], out=R)
+        return R
+
+
+class RuleBase(_Antecedents):
+    """Mamdani-style rule base over any number of inputs.
+
+    ``inputs`` are Variables or ``(name, universe, terms)`` tuples,
+    ``output`` likewise, and ``rules`` a sequence of
+    ``(input term, ..., consequent term)`` tuples.
+
+    With ``sparse=True`` only the rules whose antecedent terms are all
+    active for a sample are evaluated, found through each input's
+    breakpoint index. With fuzzy partitions each input has at most two
+    active terms, so a 7-input x 7-term base touches at most 2**7 of its
+    7**7 rules per sample. ``sparse=None`` picks this when it evaluates
+    far fewer rules than the dense path. firing_stats() reports rules
+    evaluated versus total.
+    """
+
+    def __init__(self, inputs, output, rules, sparse=None):
+        self.inputs = [_variable(spec) for spec in inputs]
+        self.output = _variable(output)
+        self.rules = [tuple(rule) for rule in rules]
+        for rule in self.rules:
+            if len(rule) != len(self.inputs) + 1:
+                raise ValueError("Rule {} needs one term per input plus a "
+                                 "consequent.".format(rule))
+
+        lookup = [{term: i for i, term in enumerate(var.names)}
+                  for var in self.inputs + [self.output]]
+        try:
+            index = np.array([[names[term] for names, term in zip(lookup, rule)]
+                              for rule in self.rules], dtype=int)
+        except KeyError as e:
+            raise ValueError("Unknown term {} in rule base.".format(e))
+        index = index.reshape(-1, len(lookup))
+        self.antecedents = index[:, :-1]
+        self.consequents = index[:, -1]
+
+        # rules grouped by consequent for segmented max / sum reductions
+        self._order = np.argsort(self.consequents, kind='stable')
+        self._present, self._starts = np.unique(self.consequents[self._order],
+                                                return_index=True)
+
+        self._weights = np.column_stack(centroid_weights(self.output.universe)).astype(
+            self.output.mf.dtype)
+        self._clipped = None
+        if all(points is not None for points in self.output.points):
+            self._clipped = ClippedSets(list(zip(self.output.names, self.output.points)))
+        self._singletons = None
+        self._height_centroids = {}
+
+        # antecedent term combination --> rules, as sorted mixed-radix keys
+        self._radix = np.cumprod([1] + [len(var.names) for var in self.inputs[:0:-1]])[::-1]
+        keys = self.antecedents @ self._radix
+        order = np.argsort(keys, kind='stable')
+        self._keys, first, counts = np.unique(keys[order], return_index=True,
+                                              return_counts=True)
+        self._key_rules = np.full((len(self._keys), counts.max(initial=1)), -1, dtype=int)
+        group = np.repeat(np.arange(len(self._keys)), counts)
+        self._key_rules[group, np.arange(len(order)) - first[group]] = order
+        self._combos = int(np.prod([var.active.shape[1] for var in self.inputs]))
+        # the dense gather wins until the rule count clearly outgrows the candidates
+        self.sparse = 8 * self._combos * self._key_rules.shape[1] <= len(self.rules) \
+            if sparse is None else sparse
+        self.stats = {'samples': 0, 'rules_evaluated': 0, 'rules_total': 0}
+        self.telemetry = None
+
+    @classmethod
+    def from_table(cls, inputs, output, table):
+        """Build from a table indexed by input terms, holding consequent names.
+
+        ``table[i][j]...`` is the consequent for term i of the first input,
+        term j of the second, and so on; ``None`` entries have no rule.
+        """
+        inputs = [_variable(spec) for spec in inputs]
+        table = np.asarray(table, dtype=object)
+        if table.shape != tuple(len(var.names) for var in inputs):
+            raise ValueError("Rule table shape {} does not match the input "
+                             "terms.".format(table.shape))
+        rules = [tuple(var.names[i] for var, i in zip(inputs, index)) + (table[index],)
+                 for index in np.ndindex(table.shape) if table[index] is not None]
+        return cls(inputs, output, rules)
+
+    def aggregate(self, R, how='max'):
+        """Per-consequent strength, shape (n, output terms).
+
+        ``how='max'`` is the Mamdani OR, ``how='rss'`` the Root Sum Squared
+        method. Terms without rules stay at zero.
+        """
+        heights = np.zeros((R.shape[0], len(self.output.names)))
+        if not len(self.rules):
+            return heights
+        R = R[:, self._order]
+        if how == 'max':
+            heights[:, self._present] = np.maximum.reduceat(R, self._starts, axis=1)
+        elif how == 'rss':
+            heights[:, self._present] = np.sqrt(np.add.reduceat(R**2, self._starts, axis=1))
+        else:
+            raise ValueError("The input for `how`, {}, was incorrect.".format(how))
+        return heights
+
+    def fire_sparse(self, values, memberships):
+        """Rule ids and strengths of the rules that can fire, each (n, candidates).
+
+        Candidates are every combination of the active terms of each input;
+        combinations without a rule get id -1 and strength 0.
+        """
+        n = len(memberships[0])
+        key = np.zeros((n,) + (1,) * len(self.inputs), dtype=int)
+        strength = np.ones(key.shape)
+        valid = np.ones(key.shape, dtype=bool)
+        for i, (var, v, mu) in enumerate(zip(self.inputs, values, memberships)):
+            ids = var.active_terms(v)
+            shape = [n] + [1] * len(self.inputs)
+            shape[i + 1] = ids.shape[1]
+            mu_active = np.take_along_axis(mu, np.maximum(ids, 0), axis=1)
+            key = key + (np.maximum(ids, 0) * self._radix[i]).reshape(shape)
+            strength = np.minimum(strength, mu_active.reshape(shape))
+            valid = valid & (ids >= 0).reshape(shape)
+        key, strength, valid = key.reshape(n, -1), strength.reshape(n, -1), valid.reshape(n, -1)
+        if not len(self._keys):
+            self._count(n, 0)
+            return np.full(key.shape, -1), np.zeros(key.shape)
+
+        slot = np.minimum(np.searchsorted(self._keys, key), len(self._keys) - 1)
+        valid &= self._keys[slot] == key
+        rule = np.where(valid[:, :, None], self._key_rules[slot], -1).reshape(n, -1)
+        strength = np.where(rule >= 0, np.repeat(strength, self._key_rules.shape[1], axis=1), 0.0)
+        self._count(n, int((rule >= 0).sum()))
+        return rule, strength
+
+    def aggregate_sparse(self, rule, strength, how='max'):
+        """aggregate() for the (rule id, strength) candidates of fire_sparse()."""
+        heights = np.zeros((rule.shape[0], len(self.output.names)))
+        if not len(self.rules):
+            return heights
+        consequent = np.where(rule >= 0, self.consequents[np.maximum(rule, 0)], -1)
+        for k in self._present:
+            hit = consequent == k
+            if how == 'max':
+                heights[:, k] = np.where(hit, strength, 0.0).max(axis=1, initial=0.0)
+            elif how == 'rss':
+                heights[:, k] = np.sqrt(np.where(hit, strength**2, 0.0).sum(axis=1))
+            else:
+                raise ValueError("The input for `how`, {}, was incorrect.".format(how))
+        return heights
+
+    def _count(self, samples, evaluated):
+        self.stats['samples'] += samples
+        self.stats['rules_evaluated'] += evaluated
+        self.stats['rules_total'] += samples * len(self.rules)
+
+    def firing_stats(self, reset=False):
+        """Rules evaluated versus total since the last reset."""
+        stats = dict(self.stats)
+        total = stats['rules_total']
+        stats['fraction'] = stats['rules_evaluated'] / total if total else 0.0
+        if reset:
+            self.stats = {'samples': 0, 'rules_evaluated': 0, 'rules_total': 0}
+        return stats
+
+    def instrument(self, enabled=True, bins=10):
+        """Attach a new telemetry.Telemetry to every inference call and return it.
+
+        ``enabled=False`` detaches it again.
+        """
+        from .telemetry import Telemetry
+
+        self.telemetry = Telemetry(self, bins) if enabled else None
+        return self.telemetry
+
+    def _heights_instrumented(self, values, how):
+        t = self.telemetry
+        start = time.perf_counter()
+        shape, memberships = self.fuzzify(*values)
+        start = t.clock('fuzzify', start)
+        if self.sparse:
+            values = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in values])
+            rule, strength = self.fire_sparse(values, memberships)
+            start = t.clock('fire', start)
+            t.record(rule, strength)
+            start = time.perf_counter()
+            heights = self.aggregate_sparse(rule, strength, how)
+        else:
+            R = self.fire(memberships)
+            self._count(len(R), R.size)
+            start = t.clock('fire', start)
+            t.record_dense(R)
+            start = time.perf_counter()
+            heights = self.aggregate(R, how)
+        t.clock('aggregate', start)
+        t.record_heights(heights)
+        return shape, heights
+
+    def heights(self, *values, how='max'):
+        """Broadcast shape and aggregated consequent strengths for ``values``."""
+        if self.telemetry is not None:
+            return self._heights_instrumented(values, how)
+        shape, memberships = self.fuzzify(*values)
+        if self.sparse:
+            values = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in values])
+            return shape, self.aggregate_sparse(*self.fire_sparse(values, memberships), how)
+        R = self.fire(memberships)
+        self._count(len(R), R.size)
+        return shape, self.aggregate(R, how)
+
+    def defuzzify(self, heights, method='grid'):
+        """Centroid of the output sets clipped at ``heights`` (n, terms).
+
+        ``method='grid'`` integrates on the output universe like
+        ``fuzz.defuzz``; ``method='exact'`` uses the closed-form breakpoint
+        centroid, which needs no universe and has no discretization error.
+        """
+        if method == 'grid':
+            return clip_centroid(heights, self.output.universe, self.output.mf,
+                                 self._weights)
+        if method == 'exact':
+            if self._clipped is None:
+                raise ValueError("Exact centroids need breakpoints for every "
+                                 "output term.")
+            return self._clipped.centroid(heights)
+        raise ValueError("The input for `method`, {}, was incorrect.".format(method))
+
+    def moving_centroids(self, heights, method='grid'):
+        """Centroid of each output set clipped on its own, shape (n, terms).
+
+        Served from a HeightCentroids table built once per method; sets
+        clipped to zero get 0 instead of the error ``fuzz.defuzz`` raises.
+        """
+        if method not in self._height_centroids:
+            self._height_centroids[method] = HeightCentroids(
+                self.output.universe, self.output.mf, self.output.points, method)
+        return self._height_centroids[method](heights)
+
+    @property
+    def singletons(self):
+        """Centroid of each full output set, the fixed TSK singletons."""
+        if self._singletons is None:
+            method = 'grid' if self._clipped is None else 'exact'
+            ones = np.ones((1, len(self.output.names)))
+            self._singletons = self.moving_centroids(ones, method)[0]
+        return self._singletons
+
+    def _infer(self, values, how, finish):
+        """heights() then ``finish(heights)``, timed as defuzzify when instrumented."""
+        shape, heights = self.heights(*values, how=how)
+        if self.telemetry is None:
+            return finish(heights).reshape(shape)[()]
+        start = time.perf_counter()
+        out = finish(heights)
+        self.telemetry.clock('defuzzify', start)
+        return out.reshape(shape)[()]
+
+    def mamdani(self, *values, method='grid'):
+        """Min AND, clip, max aggregation, centroid (FuzzyCTRL.py)."""
+        return self._infer(values, 'max', lambda heights: self.defuzzify(heights, method))
+
+    def rss_cog(self, *values, method='grid'):
+        """RSS per consequent, clip, max, centroid (FuzzyRSS_COG.py)."""
+        return self._infer(values, 'rss', lambda heights: self.defuzzify(heights, method))
+
+    def _weighted_centroids(self, heights, method):
+        Cx = self.moving_centroids(heights, method)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (Cx * heights).sum(axis=1) / heights.sum(axis=1)
+
+    def rss_wa(self, *values, method='grid'):
+        """Weighted average of RSS heights at moving centroids (FuzzyRSS_WA.py)."""
+        return self._infer(values, 'rss', lambda heights: self._weighted_centroids(heights, method))
+
+    def tsk(self, *values, method='grid'):
+        """Weighted average of RSS heights at fixed singletons (FuzzyTSK.py).
+
+        ``method`` is accepted for a uniform signature; singletons need no
+        defuzzification.
+        """
+        return self._infer(values, 'rss', self._singleton_average)
+
+    def _singleton_average(self, heights):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return heights @ self.singletons / heights.sum(axis=1)
+
+
+class MultiRuleBase(_Antecedents):
+    """Rule base with several outputs over one antecedent structure.
+
+    ``outputs`` are Variables or ``(name, universe, terms)`` tuples, and
+    each rule is ``(input term, ..., consequent of output 1, ...)``, with
+    None where a rule does not drive an output. Inputs are fuzzified and
+    rules fired once per call. Each output then aggregates and defuzzifies
+    its share of the strengths through its own RuleBase, so every
+    inference method returns ``{output name: value}`` with the same
+    numbers as the separate single-output rule bases. Firing is always
+    dense.
+    """
+
+    def __init__(self, inputs, outputs, rules):
+        self.inputs = [_variable(spec) for spec in inputs]
+        self.outputs = [_variable(spec) for spec in outputs]
+        self.rules = [tuple(rule) for rule in rules]
+        n_in = len(self.inputs)
+        for rule in self.rules:
+            if len(rule) != n_in + len(self.outputs):
+                raise ValueError("Rule {} needs one term per input plus one consequent "
+                                 "per output.".format(rule))
+        lookup = [{term: i for i, term in enumerate(var.names)} for var in self.inputs]
+        try:
+            self.antecedents = np.array([[names[term] for names, term in zip(lookup, rule)]
+                                         for rule in self.rules], dtype=int).reshape(-1, n_in)
+        except KeyError as e:
+            raise ValueError("Unknown term {} in rule base.".format(e))
+
+        # per output: its rules as a RuleBase, and their columns in the firing
+        # matrix (None when it uses them all)
+        self.bases, self._columns = {}, {}
+        for o, var in enumerate(self.outputs):
+            columns = [r for r, rule in enumerate(self.rules) if rule[n_in + o] is not None]
+            self._columns[var.name] = None if len(columns) == len(self.rules) \
+                else np.array(columns, dtype=int)
+            self.bases[var.name] = RuleBase(self.inputs, var,
+                                            [self.rules[r][:n_in] + (self.rules[r][n_in + o],)
+                                             for r in columns], sparse=False)
+
+    @classmethod
+    def from_rulebases(cls, rulebases):
+        """Merge single-output RuleBases over the same inputs.
+
+        Rules with the same antecedent share one row, and so one firing
+        strength.
+        """
+        rulebases = list(rulebases)
+        inputs = rulebases[0].inputs
+        for rb in rulebases[1:]:
+            if [(v.name, v.names) for v in rb.inputs] != [(v.name, v.names) for v in inputs]:
+                raise ValueError("Rule bases {} and {} have different inputs.".format(
+                    rulebases[0].output.name, rb.output.name))
+        rows, where = [], {}
+        for o, rb in enumerate(rulebases):
+            for rule in rb.rules:
+                antecedent = rule[:-1]
+                slots = where.setdefault(antecedent, [])
+                free = [r for r in slots if rows[r][o] is None]
+                if free:
+                    rows[free[0]][o] = rule[-1]
+                else:
+                    slots.append(len(rows))
+                    rows.append([None] * len(rulebases))
+                    rows[-1][o] = rule[-1]
+        antecedents = {r: a for a, slots in where.items() for r in slots}
+        return cls(inputs, [rb.output for rb in rulebases],
+                   [antecedents[r] + tuple(row) for r, row in enumerate(rows)])
+
+    def heights(self, *values, how='max'):
+        """Broadcast shape and ``{output: aggregated consequent strengths}``."""
+        shape, memberships = self.fuzzify(*values)
+        R = self.fire(memberships)
+        heights = {}
+        for name, rb in self.bases.items():
+            columns = self._columns[name]
+            heights[name] = rb.aggregate(R if columns is None else R[:, columns], how)
+        return shape, heights
+
+    def _infer(self, values, how, finish):
+        shape, heights = self.heights(*values, how=how)
+        return {name: finish(self.bases[name], h).reshape(shape)[()]
+                for name, h in heights.items()}
+
+    def mamdani(self, *values, method='grid'):
+        """RuleBase.mamdani() of every output."""
+        return self._infer(values, 'max', lambda rb, h: rb.defuzzify(h, method))
+
+    def rss_cog(self, *values, method='grid'):
+        """RuleBase.rss_cog() of every output."""
+        return self._infer(values, 'rss', lambda rb, h: rb.defuzzify(h, method))
+
+    def rss_wa(self, *values, method='grid'):
+        """RuleBase.rss_wa() of every output."""
+        return self._infer(values, 'rss', lambda rb, h: rb._weighted_centroids(h, method))
+
+    def tsk(self, *values, method='grid'):
+        """RuleBase.tsk() of every output; ``method`` as there."""
+        return self._infer(values, 'rss', lambda rb, h: rb._singleton_average(h))
@@ -0,0 +1,222 @@
+"""Asyncio service running many temperature zones over one shared rule base.
+
+Zones submit their (timestamp, setpoint, measurement) samples whenever
+they have them. On every scheduling tick the service takes the pending
+samples and updates each zone's err/errRate state. It then runs a single
+vectorized inference call for the whole batch and resolves each zone's
+awaiting future with its outPower.
+
+SimulatedPlant stands in for the hardware: a bank of first-order thermal
+zones stepped in lockstep, so the whole loop can run on a laptop.
+"""
+import asyncio
+import time
+
+import numpy as np
+
+from .inference import METHODS
+from .sets import x_err, x_errRate
+
+
+class ZoneService:
+    """Batching multi-zone controller.
+
+    ``infer`` is a compiled Surface, a name in ``METHODS`` or any
+    vectorized ``f(err, errRate)``. ``period`` is the scheduling tick in
+    seconds and ``tau`` the errRate low-pass time constant, both shared by
+    all zones. err and errRate are clamped to the universes before
+    inference, like a saturated sensor; a zone whose outPower still comes
+    out NaN keeps its previous one (0 before the first).
+    """
+
+    def __init__(self, infer, period=0.01, tau=0.0, method='grid', window=10000):
+        if isinstance(infer, str):
+            f = METHODS[infer]
+            self._infer = lambda err, errRate: f(err, errRate, method)
+        else:
+            self._infer = infer
+        self.period = period
+        self.tau = tau
+        self._pending = []
+        self._slot = {}
+        self._t = np.zeros(0)
+        self._err = np.zeros(0)
+        self._errRate = np.zeros(0)
+        self._out = np.zeros(0)
+        self._jitter = np.zeros(window)
+        self._running = False
+        self.ticks = self.zones = 0
+        self.busy = self.elapsed = 0.0
+
+    def _slots(self, zone_ids):
+        """State slot of each zone, growing the state arrays for new zones."""
+        new = [z for z in dict.fromkeys(zone_ids) if z not in self._slot]
+        if new:
+            for z in new:
+                self._slot[z] = len(self._slot)
+            grow = len(self._slot) - len(self._t)
+            self._t = np.concatenate([self._t, np.full(grow, np.nan)])
+            self._err = np.concatenate([self._err, np.zeros(grow)])
+            self._errRate = np.concatenate([self._errRate, np.zeros(grow)])
+            self._out = np.concatenate([self._out, np.zeros(grow)])
+        return np.array([self._slot[z] for z in zone_ids], dtype=int)
+
+    def submit(self, zone, timestamp, setpoint, measurement):
+        """Queue one zone sample; the returned future resolves to its outPower."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((zone, timestamp, setpoint, measurement, future))
+        return future
+
+    def tick(self):
+        """Run one batched inference over the pending samples; return the batch size.
+
+        A zone with several pending samples gets one per tick, so its
+        errRate is derived in order. If inference raises, the batch's
+        futures get the exception and the zones keep their state.
+        """
+        batch, seen, later = [], set(), []
+        for item in self._pending:
+            if item[4].cancelled():
+                continue
+            (later if item[0] in seen else batch).append(item)
+            seen.add(item[0])
+        self._pending = later
+        if not batch:
+            return 0
+
+        start = time.perf_counter()
+        zone, timestamp, setpoint, measurement, futures = zip(*batch)
+        idx = self._slots(zone)
+        timestamp = np.array(timestamp, dtype=float)
+        err = np.array(setpoint, dtype=float) - np.array(measurement, dtype=float)
+        dt = timestamp - self._t[idx]
+        moved = dt > 0
+        rate = np.where(moved, (err - self._err[idx]) / np.where(moved, dt, 1), 0.0)
+        alpha = np.where(moved, dt / (self.tau + np.where(moved, dt, 1)), 0.0)
+        errRate = self._errRate[idx] + alpha * (rate - self._errRate[idx])
+
+        e = np.clip(err, x_err[0], x_err[-1])
+        r = np.clip(errRate, x_errRate[0], x_errRate[-1])
+        try:
+            outPower = np.atleast_1d(np.asarray(self._infer(e, r), dtype=float))
+            outPower = np.where(np.isnan(outPower), self._out[idx], outPower)
+        except Exception as exc:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+            self.busy += time.perf_counter() - start
+            return len(batch)
+        self._t[idx], self._err[idx], self._errRate[idx] = timestamp, err, errRate
+        self._out[idx] = outPower
+        for future, value in zip(futures, outPower.tolist()):
+            if not future.done():
+                future.set_result(value)
+        self.busy += time.perf_counter() - start
+        self.zones += len(batch)
+        return len(batch)
+
+    async def run(self, ticks=None):
+        """Tick every ``period`` seconds until stop() or ``ticks`` ticks."""
+        self._running = True
+        loop = asyncio.get_running_loop()
+        start = next_tick = loop.time()
+        done = 0
+        while self._running and (ticks is None or done < ticks):
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)
+            self._jitter[self.ticks % len(self._jitter)] = loop.time() - next_tick
+            self.tick()
+            self.ticks += 1
+            done += 1
+            # overruns skip the missed slots instead of bursting to catch up
+            next_tick += self.period * max(1, int((loop.time() - next_tick) // self.period) + 1)
+        self.elapsed += loop.time() - start
+        self._running = False
+
+    def stop(self):
+        self._running = False
+
+    def metrics(self):
+        """Throughput in zones per second and tick jitter in seconds."""
+        n = min(self.ticks, len(self._jitter))
+        jitter = self._jitter[:n] if n else np.zeros(1)
+        p50, p99 = np.percentile(jitter, [50, 99])
+        return {'ticks': self.ticks,
+                'zones': self.zones,
+                'zones_per_second': self.zones / self.elapsed if self.elapsed else 0.0,
+                'inference_zones_per_second': self.zones / self.busy if self.busy else 0.0,
+                'jitter_p50': float(p50),
+                'jitter_p99': float(p99),
+                'jitter_max': float(jitter.max())}
+
+
+class SimulatedPlant:
+    """``n`` first-order thermal zones: dT/dt = (ambient - T)/tau + gain*outPower/100.
+
+    outPower is the controller's -100..100 percent (cool..heat).
+    Measurements get Gaussian ``noise`` added.
+    """
+
+    def __init__(self, n, tau=60.0, gain=0.5, ambient=20.0, initial=None,
+                 noise=0.0, seed=None):
+        self.tau = tau
+        self.gain = gain
+        self.ambient = ambient
+        self.noise = noise
+        self.temperature = np.full(n, ambient, dtype=float) if initial is None \
+            else np.array(np.broadcast_to(initial, n), dtype=float)
+        self.outPower = np.zeros(n)
+        self._rng = np.random.default_rng(seed)
+
+    def step(self, dt):
+        """Advance all zones by ``dt`` seconds with the last written outPower."""
+        self.temperature += dt * ((self.ambient - self.temperature) / self.tau
+                                  + self.gain * self.outPower / 100)
+
+    async def read(self, zone):
+        measurement = self.temperature[zone]
+        if self.noise:
+            measurement += self._rng.normal(0, self.noise)
+        return float(measurement)
+
+    async def write(self, zone, outPower):
+        self.outPower[zone] = outPower
+
+
+async def simulate(service, plant, setpoint, duration, speedup=1.0):
+    """Run every plant zone against ``service`` for ``duration`` wall seconds.
+
+    Each zone is its own task: read, submit, await outPower, write. The
+    plant is stepped once per service period; ``speedup`` scales simulated
+    time relative to wall time. Returns the service metrics.
+    """
+    setpoint = np.broadcast_to(np.asarray(setpoint, dtype=float), plant.outPower.shape)
+    loop = asyncio.get_running_loop()
+    clock = {'t': 0.0}
+
+    async def zone_task(zone):
+        while True:
+            measurement = await plant.read(zone)
+            outPower = await service.submit(zone, clock['t'], setpoint[zone], measurement)
+            await plant.write(zone, outPower)
+
+    async def plant_task():
+        dt = service.period * speedup
+        while True:
+            await asyncio.sleep(service.period)
+            plant.step(dt)
+            clock['t'] += dt
+
+    tasks = [loop.create_task(zone_task(z)) for z in range(len(setpoint))]
+    tasks.append(loop.create_task(plant_task()))
+    runner = loop.create_task(service.run())
+    await asyncio.sleep(duration)
+    service.stop()
+    await runner
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return service.metrics()
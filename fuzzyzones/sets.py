@@ -0,0 +1,117 @@
+"""Universes, fuzzy set shapes and rule base shared by the Fuzzy*.py scripts."""
+import numpy as np
+
+# define domain interval and resolution of fuzzy sets inputs-output
+x_err      = np.arange(-4,4, 0.1)
+x_errRate  = np.arange(-10,10, 0.1)
+x_outPower = np.arange(-100,100, 0.1)
+
+
+def universes(step=0.1, dtype=float):
+    """err, errRate and outPower universes at resolution ``step``."""
+    return (np.arange(-4,4, step).astype(dtype), np.arange(-10,10, step).astype(dtype),
+            np.arange(-100,100, step).astype(dtype))
+
+# fuzzy set breakpoints, 3 points --> trimf, 4 points --> trapmf
+ERR_TERMS = (('N', [-4,-4,-2,0]),
+             ('Z', [-2,0,2]),
+             ('P', [0,2,4,4]))
+
+ERRRATE_TERMS = (('N', [-10,-10,-5,0]),
+                 ('Z', [-5,0,5]),
+                 ('P', [0,5,10,10]))
+
+OUTPOWER_TERMS = (('C',  [-100,-100,-50,0]),
+                  ('NC', [-50,0,50]),
+                  ('H',  [0,50,100,100]))
+
+# rule base R1..R9 as (err term, errRate term, outPower term)
+RULES = (('N', 'N', 'C'),
+         ('Z', 'N', 'H'),
+         ('P', 'N', 'H'),
+         ('N', 'Z', 'C'),
+         ('Z', 'Z', 'NC'),
+         ('P', 'Z', 'H'),
+         ('N', 'P', 'C'),
+         ('Z', 'P', 'C'),
+         ('P', 'P', 'H'))
+
+
+def trimf(x, abc):
+    """``fuzz.trimf`` with the same arithmetic, without importing skfuzzy."""
+    a, b, c = abc
+    x = np.asarray(x)
+    y = np.zeros(len(x))
+    if a != b:
+        left = (a < x) & (x < b)
+        y[left] = (x[left] - a) / float(b - a)
+    if b != c:
+        right = (b < x) & (x < c)
+        y[right] = (c - x[right]) / float(c - b)
+    y[x == b] = 1
+    return y
+
+
+def trapmf(x, abcd):
+    """``fuzz.trapmf`` with the same arithmetic, without importing skfuzzy."""
+    a, b, c, d = abcd
+    x = np.asarray(x)
+    y = np.ones(len(x))
+    rising, falling = x <= b, x >= c
+    y[rising] = trimf(x[rising], (a, b, b))
+    y[falling] = trimf(x[falling], (c, c, d))
+    y[(x < a) | (x > d)] = 0
+    return y
+
+
+def membership(x, points):
+    """Evaluate a trimf (3 points) or trapmf (4 points) fuzzy set on ``x``."""
+    if len(points) == 3:
+        return trimf(x, points)
+    return trapmf(x, points)
+
+
+def term_arrays(x, terms):
+    """Stack the membership arrays of ``terms`` on universe ``x``, one row per term."""
+    return np.vstack([membership(x, points) for _, points in terms])
+
+
+def adaptive_universe(terms, x, slopes=True):
+    """The points of uniform universe ``x`` that shape the sets of ``terms``.
+
+    Keeps both ends of ``x``, every breakpoint inside it and, with
+    ``slopes``, every point of ``x`` on a sloped edge of some set. Where
+    all sets are flat, the clipped and aggregated output is constant, so
+    an integral over the kept points matches one over ``x``. The sets
+    themselves are exactly linear between breakpoints. An input universe
+    therefore needs no slope points at all: ``np.interp`` on the
+    breakpoints equals it on the full grid.
+    """
+    x = np.asarray(x)
+    lo, hi = x[0], x[-1]
+    keep = [np.array([lo, hi], dtype=x.dtype)]
+    for _, points in terms:
+        a, b, c, d = points if len(points) == 4 else (points[0], points[1], points[1], points[2])
+        p = np.array([a, b, c, d], dtype=x.dtype)
+        keep.append(p[(p > lo) & (p < hi)])
+        if slopes:
+            keep.append(x[((a < x) & (x < b)) | ((c < x) & (x < d))])
+    return np.unique(np.concatenate(keep))
+
+
+def adaptive_universes(step=0.1, dtype=float, err_terms=ERR_TERMS,
+                       errRate_terms=ERRRATE_TERMS, outPower_terms=OUTPOWER_TERMS):
+    """universes(step) reduced by adaptive_universe().
+
+    The inputs keep breakpoints only; the output keeps its slopes too.
+    The output cannot go further without changing the grid results: a
+    clipped set kinks where its sloped edge meets the clip height, which
+    moves with every sample, so only the flat stretches can go. For the
+    blog's sets that leaves 1005 of the 2000 points at step 0.1, i.e. the
+    output universe is essentially unreduced. The 'exact' methods do not
+    integrate on it at all.
+    """
+    x_err, x_errRate, x_outPower = universes(step, dtype)
+    return (adaptive_universe(err_terms, x_err, slopes=False),
+            adaptive_universe(errRate_terms, x_errRate, slopes=False),
+            adaptive_universe(outPower_terms, x_outPower))
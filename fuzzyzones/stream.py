@@ -0,0 +1,92 @@
+"""Streaming temperature controller fed by (timestamp, setpoint, measurement).
+
+Instead of the hard-coded ``err, errRate = -1, 2.5`` of the scripts, the
+controller derives err from each sample and errRate from successive
+samples through a first-order low-pass filter. It then emits outPower
+through any of the inference variants.
+"""
+import time
+
+import numpy as np
+
+from .inference import METHODS
+from .sets import x_err, x_errRate
+
+
+class StreamController:
+    """Incremental err/errRate controller with per-tick latency stats.
+
+    ``infer`` is a name in ``METHODS`` ('mamdani', 'rss_cog', 'rss_wa',
+    'tsk') or any callable ``f(err, errRate)`` such as ``Surface.value``.
+    ``tau`` is the errRate filter time constant in timestamp units (0 means
+    no filtering). When neither err nor errRate moved more than ``tol``
+    since the last evaluation, the previous outPower is reused. err and
+    errRate are clamped to the universes before inference, like a
+    saturated sensor; the attributes keep the raw values. A sample whose
+    timestamp is not after the previous one is dropped without touching
+    the state. The latencies of the last ``window`` ticks are kept for
+    latency().
+    """
+
+    def __init__(self, infer='mamdani', method='grid', tau=0.0, tol=0.0,
+                 window=10000):
+        if callable(infer):
+            self._infer = infer
+        else:
+            f = METHODS[infer]
+            self._infer = lambda err, errRate: float(f(err, errRate, method))
+        self.tau = tau
+        self.tol = tol
+        self._latency = np.zeros(window)
+        self.reset()
+
+    def reset(self):
+        """Forget the stream history and statistics."""
+        self._t = self._err = None
+        self.err = self.errRate = 0.0
+        self.outPower = None
+        self._last = None
+        self.ticks = self.skipped = self.dropped = 0
+
+    def update(self, timestamp, setpoint, measurement):
+        """Consume one sample and return outPower for it."""
+        if self._t is not None and timestamp <= self._t:
+            self.dropped += 1
+            return self.outPower
+        start = time.perf_counter()
+        err = setpoint - measurement
+        if self._t is not None:
+            dt = timestamp - self._t
+            rate = (err - self._err) / dt
+            self.errRate += dt / (self.tau + dt) * (rate - self.errRate)
+        self._t, self._err, self.err = timestamp, err, err
+
+        last = self._last
+        if (last is not None and abs(err - last[0]) <= self.tol
+                and abs(self.errRate - last[1]) <= self.tol):
+            self.skipped += 1
+        else:
+            self.outPower = self._infer(min(max(err, x_err[0]), x_err[-1]),
+                                        min(max(self.errRate, x_errRate[0]), x_errRate[-1]))
+            self._last = (err, self.errRate)
+
+        self._latency[self.ticks % len(self._latency)] = time.perf_counter() - start
+        self.ticks += 1
+        return self.outPower
+
+    def run(self, samples):
+        """Generator yielding (timestamp, err, errRate, outPower) per sample."""
+        for timestamp, setpoint, measurement in samples:
+            outPower = self.update(timestamp, setpoint, measurement)
+            yield timestamp, self.err, self.errRate, outPower
+
+    def latency(self):
+        """p50/p99/max tick latency in seconds over the recent window."""
+        n = min(self.ticks, len(self._latency))
+        if n == 0:
+            return {'ticks': 0, 'skipped': 0, 'dropped': self.dropped,
+                    'p50': None, 'p99': None, 'max': None}
+        recent = self._latency[:n]
+        p50, p99 = np.percentile(recent, [50, 99])
+        return {'ticks': self.ticks, 'skipped': self.skipped, 'dropped': self.dropped,
+                'p50': float(p50), 'p99': float(p99), 'max': float(recent.max())}
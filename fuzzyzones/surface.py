@@ -0,0 +1,210 @@
+"""Control surface lookup tables compiled from the err/errRate rule base.
+
+With two inputs, the whole fuzzify/clip/aggregate/defuzz pipeline is a
+fixed function ``outPower(err, errRate)``. compile_surface() samples it
+on a grid that gets refined until bilinear interpolation stays within a
+requested error. After that, every query is a constant-time table lookup.
+"""
+import mmap
+
+import numpy as np
+
+from .sets import x_err, x_errRate
+
+
+def _mapped(a):
+    """Whether ``a`` is a view into a memory map."""
+    while a is not None:
+        if isinstance(a, (np.memmap, mmap.mmap)):
+            return True
+        a = getattr(a, 'base', None)
+    return False
+
+
+class Surface:
+    """outPower sampled on a regular err x errRate grid.
+
+    Inputs are clamped to the grid, like a saturated sensor reading.
+    ``max_error`` is the worst deviation from the full inference that
+    compile_surface() found at its probe points.
+    """
+
+    def __init__(self, err_grid, errRate_grid, table, max_error=None):
+        self.err_grid = np.asarray(err_grid, dtype=float)
+        self.errRate_grid = np.asarray(errRate_grid, dtype=float)
+        self.table = np.ascontiguousarray(table, dtype=float)
+        self.max_error = max_error
+
+        # plain Python copies for the scalar path. A memory-mapped table is
+        # read in place instead: a Python list would be a private copy of
+        # the whole table in every worker, at ~4x its size.
+        self._e0 = float(self.err_grid[0])
+        self._de = float(self.err_grid[1] - self.err_grid[0])
+        self._r0 = float(self.errRate_grid[0])
+        self._dr = float(self.errRate_grid[1] - self.errRate_grid[0])
+        self._ne, self._nr = len(self.err_grid) - 1, len(self.errRate_grid) - 1
+        self._flat = None if _mapped(self.table) else self.table.ravel().tolist()
+
+    @property
+    def shape(self):
+        return self.table.shape
+
+    def __call__(self, err, errRate, out=None):
+        """Bilinear interpolation for arrays of inputs, optionally into ``out``."""
+        err, errRate = np.broadcast_arrays(np.asarray(err, dtype=float),
+                                           np.asarray(errRate, dtype=float))
+        fe = np.clip((err - self._e0) / self._de, 0, self._ne)
+        fr = np.clip((errRate - self._r0) / self._dr, 0, self._nr)
+        i = np.minimum(fe.astype(int), self._ne - 1)
+        j = np.minimum(fr.astype(int), self._nr - 1)
+        te, tr = fe - i, fr - j
+        T = self.table
+        value = ((1 - te) * ((1 - tr) * T[i, j] + tr * T[i, j + 1])
+                 + te * ((1 - tr) * T[i + 1, j] + tr * T[i + 1, j + 1]))
+        if out is None:
+            return value[()]
+        out[...] = value
+        return out
+
+    def value(self, err, errRate):
+        """Scalar lookup with float arithmetic only, no NumPy temporaries.
+
+        An in-memory table is read from a flat list copy made up front. A
+        memory-mapped one is read in place through ``ndarray.item()``,
+        which is a little slower per call but keeps the pages shared.
+        """
+        fe = (err - self._e0) / self._de
+        fr = (errRate - self._r0) / self._dr
+        fe = 0.0 if fe < 0.0 else (self._ne if fe > self._ne else fe)
+        fr = 0.0 if fr < 0.0 else (self._nr if fr > self._nr else fr)
+        i = int(fe) if fe < self._ne else self._ne - 1
+        j = int(fr) if fr < self._nr else self._nr - 1
+        te, tr = fe - i, fr - j
+        T = self._flat
+        if T is None:
+            item = self.table.item
+            return ((1 - te) * ((1 - tr) * item(i, j) + tr * item(i, j + 1))
+                    + te * ((1 - tr) * item(i + 1, j) + tr * item(i + 1, j + 1)))
+        stride = self._nr + 1
+        k = i * stride + j
+        return ((1 - te) * ((1 - tr) * T[k] + tr * T[k + 1])
+                + te * ((1 - tr) * T[k + stride] + tr * T[k + stride + 1]))
+
+
+def _midpoints(f, err_grid, errRate_grid, table):
+    """Bilinear errors along err, along errRate and at cell centres.
+
+    The errors are arrays, one per edge or cell. Also returns the edge
+    midpoint samples, which become table rows or columns when that axis
+    is refined.
+    """
+    em = (err_grid[:-1] + err_grid[1:]) / 2
+    rm = (errRate_grid[:-1] + errRate_grid[1:]) / 2
+    rows = f(em[:, None], errRate_grid[None, :])
+    cols = f(err_grid[:, None], rm[None, :])
+    centre = f(em[:, None], rm[None, :])
+    errors = (np.abs(rows - (table[:-1] + table[1:]) / 2),
+              np.abs(cols - (table[:, :-1] + table[:, 1:]) / 2),
+              np.abs(centre - (table[:-1, :-1] + table[1:, :-1]
+                               + table[:-1, 1:] + table[1:, 1:]) / 4))
+    return errors, rows, cols
+
+
+def _lattice(f, err_grid, errRate_grid, table, i, j, k=4):
+    """Worst bilinear error on a ``k`` x ``k`` interior lattice of cells (i, j)."""
+    if not len(i):
+        return 0.0
+    u = (np.arange(1, k + 1) / (k + 1))[:, None]
+    v = u.T
+    e = err_grid[i, None, None] + (err_grid[i + 1] - err_grid[i])[:, None, None] * u
+    r = errRate_grid[j, None, None] + (errRate_grid[j + 1] - errRate_grid[j])[:, None, None] * v
+    T = [table[i + a, j + b][:, None, None] for a in (0, 1) for b in (0, 1)]
+    bilinear = (1 - u) * ((1 - v) * T[0] + v * T[1]) + u * ((1 - v) * T[2] + v * T[3])
+    return float(np.nanmax(np.abs(f(e, r) - bilinear)))
+
+
+def _interleave(a, b, axis):
+    """Merge samples ``a`` with the midpoint samples ``b`` along ``axis``."""
+    shape = list(a.shape)
+    shape[axis] += b.shape[axis]
+    out = np.empty(shape)
+    index = [slice(None)] * a.ndim
+    index[axis] = slice(0, None, 2)
+    out[tuple(index)] = a
+    index[axis] = slice(1, None, 2)
+    out[tuple(index)] = b
+    return out
+
+
+def compile_surface(method='mamdani', tol=0.5, defuzz='grid', start=9,
+                    max_points=2049, ranges=None):
+    """Sample ``METHODS[method]`` on a grid fine enough for ``tol``.
+
+    ``method`` may also be a two-input RuleBase, sampled through its
+    mamdani(), or any callable ``f(err, errRate)`` on arrays, such as
+    ``functools.partial(rulebase.rss_wa, method='exact')``. ``ranges`` is
+    ``((lo, hi), (lo, hi))`` for the two inputs; it defaults to the
+    universes of a RuleBase and to ``x_err`` and ``x_errRate`` otherwise.
+
+    The grid starts with ``start`` points per axis. Each pass measures the
+    bilinear error at edge and cell midpoints and halves the spacing of the
+    worse axis, reusing the midpoint samples as the new nodes, until the
+    error is within ``tol`` or an axis reaches ``max_points``.
+
+    Midpoints miss the peaks of cells crossed by a kink of the surface, so
+    the cells whose midpoint error is at least ``tol / 4`` are then probed
+    on a 4 x 4 interior lattice; if that finds more than ``tol``, the
+    refinement goes on with a proportionally tighter midpoint target. The
+    returned Surface reports the worst error seen as ``max_error``. It is
+    still an estimate from samples, not a bound.
+    """
+    from .inference import METHODS
+    from .rules import RuleBase
+
+    if isinstance(method, RuleBase):
+        if len(method.inputs) != 2:
+            raise ValueError("A surface needs a rule base with 2 inputs, not "
+                             "{}.".format(len(method.inputs)))
+        if ranges is None:
+            ranges = [(var.universe[0], var.universe[-1]) for var in method.inputs]
+        rulebase = method
+
+        def f(err, errRate):
+            return rulebase.mamdani(err, errRate, method=defuzz)
+    elif callable(method):
+        f = method
+    else:
+        infer = METHODS[method]
+
+        def f(err, errRate):
+            return infer(err, errRate, defuzz)
+    if ranges is None:
+        ranges = [(x_err[0], x_err[-1]), (x_errRate[0], x_errRate[-1])]
+    (err_lo, err_hi), (rate_lo, rate_hi) = ranges
+
+    err_grid = np.linspace(float(err_lo), float(err_hi), start)
+    errRate_grid = np.linspace(float(rate_lo), float(rate_hi), start)
+    table = f(err_grid[:, None], errRate_grid[None, :])
+    target = tol
+    while True:
+        (along_err, along_rate, centre), rows, cols = _midpoints(
+            f, err_grid, errRate_grid, table)
+        max_error = max(along_err.max(), along_rate.max(), centre.max())
+        can_err = len(err_grid) < max_points
+        can_rate = len(errRate_grid) < max_points
+        if max_error <= target or not (can_err or can_rate):
+            cell = np.maximum.reduce([along_err[:, :-1], along_err[:, 1:],
+                                      along_rate[:-1], along_rate[1:], centre])
+            i, j = np.nonzero(cell >= tol / 4)
+            max_error = max(max_error, _lattice(f, err_grid, errRate_grid, table, i, j))
+            if max_error <= tol or not (can_err or can_rate):
+                break
+            target *= tol / max_error
+        if can_err and (along_err.max() >= along_rate.max() or not can_rate):
+            table = _interleave(table, rows, 0)
+            err_grid = _interleave(err_grid, (err_grid[:-1] + err_grid[1:]) / 2, 0)
+        else:
+            table = _interleave(table, cols, 1)
+            errRate_grid = _interleave(errRate_grid,
+                                       (errRate_grid[:-1] + errRate_grid[1:]) / 2, 0)
+    return Surface(err_grid, errRate_grid, table, float(max_error))
@@ -0,0 +1,132 @@
+"""Per-stage timing and rule-firing telemetry for RuleBase inference.
+
+A Telemetry attached with ``RuleBase.instrument()`` records the following
+for every batch:
+
+- the wall time of each stage: fuzzify, fire (the antecedent AND),
+  aggregate (the max or RSS OR), and defuzzify. In a RuleBase the
+  implication clip (``np.fmin`` in the scripts) is folded into the
+  closed-form or grid centroid, so its time counts as defuzzify.
+- how many samples fired each rule, with a histogram of the non-zero
+  strengths.
+- how many samples fired nothing at all. Those samples have a zero-area
+  output and defuzzify to NaN.
+
+A detached rule base only checks ``self.telemetry is None`` per call.
+report() returns plain dicts and lists. write() saves them as JSON, or
+as one flat CSV table with a row per stage, rule and the degenerate
+count.
+"""
+import json
+import time
+
+import numpy as np
+
+STAGES = ('fuzzify', 'fire', 'aggregate', 'defuzzify')
+
+
+class Telemetry:
+    """Counters for one RuleBase; ``bins`` equal strength bins over (0, 1]."""
+
+    def __init__(self, rulebase, bins=10):
+        names = [var.name for var in rulebase.inputs]
+        self.rules = ['R{}'.format(i + 1) for i in range(len(rulebase.rules))]
+        self.antecedents = [' and '.join('{} is {}'.format(n, t) for n, t in zip(names, rule[:-1]))
+                            + ' --> {} is {}'.format(rulebase.output.name, rule[-1])
+                            for rule in rulebase.rules]
+        self.bins = bins
+        self.reset()
+
+    def reset(self):
+        """Zero every counter."""
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.calls = dict.fromkeys(STAGES, 0)
+        self.samples = 0
+        self.degenerate = 0
+        self.fired = np.zeros(len(self.rules), dtype=np.int64)
+        self.histogram = np.zeros((len(self.rules), self.bins), dtype=np.int64)
+
+    def clock(self, stage, start):
+        """Add the time since ``start`` (a perf_counter value) to ``stage``; return now."""
+        now = time.perf_counter()
+        self.seconds[stage] += now - start
+        self.calls[stage] += 1
+        return now
+
+    def record(self, rule, strength):
+        """Count the firings in parallel arrays of rule ids and strengths.
+
+        Ids below zero (empty sparse candidates) and zero strengths are
+        ignored.
+        """
+        hit = (rule >= 0) & (strength > 0)
+        rule, strength = rule[hit], strength[hit]
+        k = len(self.rules)
+        self.fired += np.bincount(rule, minlength=k)
+        b = np.minimum(np.ceil(strength * self.bins).astype(np.int64) - 1, self.bins - 1)
+        self.histogram += np.bincount(rule * self.bins + b,
+                                      minlength=k * self.bins).reshape(k, self.bins)
+
+    def record_dense(self, R):
+        """record() for the (n, rules) strengths of RuleBase.fire()."""
+        self.record(np.broadcast_to(np.arange(R.shape[1]), R.shape), R)
+
+    def record_heights(self, heights):
+        """Count samples and the ones whose consequent strengths are all zero."""
+        self.samples += len(heights)
+        self.degenerate += int((~(heights > 0).any(axis=1)).sum())
+
+    def never_fired(self):
+        """Names of the rules that have not fired yet."""
+        return [r for r, n in zip(self.rules, self.fired) if n == 0]
+
+    def report(self):
+        """Everything recorded, as JSON-serializable dicts and lists."""
+        total = sum(self.seconds.values())
+        samples = self.samples
+        edges = np.linspace(0, 1, self.bins + 1)
+        return {'samples': samples,
+                'degenerate': self.degenerate,
+                'degenerate_fraction': self.degenerate / samples if samples else 0.0,
+                'stages': [{'stage': s, 'calls': self.calls[s], 'seconds': self.seconds[s],
+                            'share': self.seconds[s] / total if total else 0.0}
+                           for s in STAGES],
+                'bin_edges': edges.tolist(),
+                'rules': [{'rule': r, 'text': text, 'fired': int(n),
+                           'fraction': int(n) / samples if samples else 0.0,
+                           'histogram': h.tolist()}
+                          for r, text, n, h in zip(self.rules, self.antecedents,
+                                                   self.fired, self.histogram)],
+                'never_fired': self.never_fired()}
+
+    def rows(self):
+        """report() flattened to one table: stages, rules, then degenerate."""
+        report = self.report()
+        bins = ['bin{}'.format(i) for i in range(self.bins)]
+        blank = dict.fromkeys(['kind', 'name', 'text', 'count', 'seconds', 'fraction'] + bins, '')
+        out = [dict(blank, kind='stage', name=s['stage'], count=s['calls'],
+                    seconds=s['seconds'], fraction=s['share'])
+               for s in report['stages']]
+        out += [dict(blank, kind='rule', name=r['rule'], text=r['text'], count=r['fired'],
+                     fraction=r['fraction'], **dict(zip(bins, r['histogram'])))
+                for r in report['rules']]
+        out.append(dict(blank, kind='degenerate', name='zero_area', count=report['degenerate'],
+                        fraction=report['degenerate_fraction']))
+        return out
+
+    def write(self, path, fmt=None):
+        """Write report() as JSON or rows() as CSV, by ``fmt`` or suffix."""
+        fmt = fmt or ('csv' if str(path).endswith('.csv') else 'json')
+        if fmt == 'json':
+            with open(path, 'w') as f:
+                json.dump(self.report(), f, indent=1)
+        elif fmt == 'csv':
+            import csv
+
+            rows = self.rows()
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            raise ValueError("The input for `fmt`, {}, was incorrect.".format(fmt))
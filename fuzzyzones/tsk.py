@@ -0,0 +1,232 @@
+"""First-order TSK inference with ANFIS-style batch training.
+
+FuzzyTSK.py gives every rule a fixed singleton (zero order). Here each
+rule's consequent is linear in the inputs, for instance
+``a*err + b*errRate + c`` with two inputs, and the crisp output is the
+firing-weighted average of the rule outputs. The membership sets are
+evaluated in closed form from their breakpoints, so the output is
+differentiable in them.
+
+LinearTSK.fit() is the ANFIS hybrid rule. With the sets held fixed the
+output is linear in the consequent coefficients, so one chunked pass
+accumulates the least-squares normal equations and they are solved
+exactly. With the coefficients held fixed, a second pass accumulates the
+mean squared error gradient with respect to every breakpoint and takes
+one step. Each pass touches a chunk of samples at a time, so memory does
+not grow with the log size.
+"""
+import numpy as np
+
+from .centroid import _abcd
+
+
+def _sets(x, abcd, grad=False):
+    """Trapezoid memberships of ``x`` (n,) in ``abcd`` (terms, 4), shape (n, terms).
+
+    With ``grad`` also returns d(mu)/d(a, b, c, d), shape (n, terms, 4).
+    Vertical shoulder edges (a == b or c == d) are steps that include
+    their end point, as in trapmf, and have no gradient.
+    """
+    a, b, c, d = abcd.T
+    rising, falling = b > a, d > c
+    ra = np.where(rising, 1 / np.where(rising, b - a, 1), 0.0)
+    rd = np.where(falling, 1 / np.where(falling, d - c, 1), 0.0)
+    x = x[:, None]
+    up = np.where(rising, (x - a) * ra, np.where(x >= b, 1.0, 0.0))
+    down = np.where(falling, (d - x) * rd, np.where(x <= c, 1.0, 0.0))
+    mu = np.clip(np.minimum(up, down), 0.0, 1.0)
+    if not grad:
+        return mu
+    sloped = (mu > 0) & (mu < 1)
+    on_up = sloped & (up <= down) & rising
+    on_down = sloped & (up > down) & falling
+    dmu = np.zeros(mu.shape + (4,))
+    dmu[..., 0] = np.where(on_up, (mu - 1) * ra, 0.0)
+    dmu[..., 1] = np.where(on_up, -mu * ra, 0.0)
+    dmu[..., 2] = np.where(on_down, mu * rd, 0.0)
+    dmu[..., 3] = np.where(on_down, (1 - mu) * rd, 0.0)
+    return mu, dmu
+
+
+class LinearTSK:
+    """First-order TSK model over trimf/trapmf input sets.
+
+    ``inputs`` is a sequence of ``(name, terms)`` with ``terms`` as in
+    sets.py (``(name, points)``, 3 points for trimf, 4 for trapmf).
+    ``rules`` holds one term name per input. ``coefficients`` is
+    (rules, inputs + 1) with the constant last, zero by default.
+    ``t_norm`` is 'min' (the AND of the Fuzzy*.py scripts) or 'prod'
+    (classic ANFIS, smoother to train).
+    """
+
+    def __init__(self, inputs, rules, coefficients=None, t_norm='min'):
+        if t_norm not in ('min', 'prod'):
+            raise ValueError("The input for `t_norm`, {}, was incorrect.".format(t_norm))
+        self.t_norm = t_norm
+        self.names = [name for name, _ in inputs]
+        self.term_names = [[term for term, _ in terms] for _, terms in inputs]
+        self.abcd = [np.array([_abcd(points) for _, points in terms], dtype=float)
+                     for _, terms in inputs]
+        self.rules = [tuple(rule) for rule in rules]
+        lookup = [{term: i for i, term in enumerate(names)} for names in self.term_names]
+        try:
+            self.antecedents = np.array([[names[term] for names, term in zip(lookup, rule)]
+                                         for rule in self.rules], dtype=int)
+        except KeyError as e:
+            raise ValueError("Unknown term {} in rule base.".format(e))
+        self.antecedents = self.antecedents.reshape(-1, len(inputs))
+        shape = (len(self.rules), len(inputs) + 1)
+        self.coefficients = np.zeros(shape) if coefficients is None \
+            else np.array(coefficients, dtype=float).reshape(shape)
+
+    @classmethod
+    def from_rulebase(cls, rulebase, t_norm='min'):
+        """Start from a RuleBase: same sets and rules, each rule's constant at
+        its consequent's singleton, i.e. a zero-order TSK.
+
+        It equals ``rulebase.tsk`` wherever no two firing rules share a
+        consequent; RuleBase combines those by RSS first."""
+        if any(p is None for var in rulebase.inputs for p in var.points):
+            raise ValueError("LinearTSK needs breakpoints for every input term.")
+        inputs = [(var.name, list(zip(var.names, var.points))) for var in rulebase.inputs]
+        rules = [rule[:-1] for rule in rulebase.rules]
+        coefficients = np.zeros((len(rules), len(inputs) + 1))
+        coefficients[:, -1] = rulebase.singletons[rulebase.consequents]
+        return cls(inputs, rules, coefficients, t_norm)
+
+    def _fire(self, X, grad=False):
+        """Rule strengths (n, rules); with ``grad`` also their derivatives.
+
+        A rule depends on one term per input, so the derivatives are one
+        (n, rules, 4) array per input, taken w.r.t. that term's breakpoints.
+        """
+        fuzzy = [_sets(x, abcd, grad) for x, abcd in zip(X.T, self.abcd)]
+        mu = [f[0] if grad else f for f in fuzzy]
+        # membership of each rule's term for each input, (inputs, n, rules)
+        M = np.stack([m[:, self.antecedents[:, i]] for i, m in enumerate(mu)])
+        W = M.min(axis=0) if self.t_norm == 'min' else M.prod(axis=0)
+        if not grad:
+            return W
+        dW = []
+        if self.t_norm == 'min':
+            winner = M.argmin(axis=0)
+        for i, (_, dmu) in enumerate(fuzzy):
+            if self.t_norm == 'min':
+                share = (winner == i).astype(float)
+            else:
+                share = np.prod(np.delete(M, i, axis=0), axis=0)
+            dW.append(share[:, :, None] * dmu[:, self.antecedents[:, i]])
+        return W, dW
+
+    def _stack(self, values):
+        values = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in values])
+        if len(values) != len(self.names):
+            raise ValueError("Expected {} inputs, got {}.".format(len(self.names),
+                                                                  len(values)))
+        return values[0].shape, np.column_stack([v.ravel() for v in values])
+
+    def __call__(self, *values, chunk_size=65536):
+        """Crisp output for broadcast input arrays; NaN where no rule fires."""
+        shape, X = self._stack(values)
+        out = np.empty(len(X))
+        for start in range(0, len(X), chunk_size):
+            x = X[start:start + chunk_size]
+            W = self._fire(x)
+            f = x @ self.coefficients[:, :-1].T + self.coefficients[:, -1]
+            S = W.sum(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                out[start:start + len(x)] = np.where(S > 0, (W * f).sum(axis=1) / S, np.nan)
+        return out.reshape(shape)[()]
+
+    def fit_consequents(self, X, y, ridge=1e-6, chunk_size=65536):
+        """Least-squares coefficients with the sets fixed (ANFIS forward pass).
+
+        The normal equations are summed chunk by chunk. ``ridge`` pulls
+        each coefficient toward its current value, so rules that never
+        fire in the data keep theirs.
+        """
+        R, p = self.coefficients.shape
+        AtA = np.zeros((R * p, R * p))
+        Atb = np.zeros(R * p)
+        for start in range(0, len(X), chunk_size):
+            x, t = X[start:start + chunk_size], y[start:start + chunk_size]
+            W = self._fire(x)
+            S = W.sum(axis=1)
+            fired = S > 0
+            Wn = W[fired] / S[fired, None]
+            x1 = np.column_stack([x[fired], np.ones(fired.sum())])
+            A = (Wn[:, :, None] * x1[:, None, :]).reshape(len(x1), -1)
+            AtA += A.T @ A
+            Atb += A.T @ t[fired]
+        lam = ridge * max(np.trace(AtA) / len(AtA), 1.0)
+        theta = np.linalg.solve(AtA + lam * np.eye(len(AtA)),
+                                Atb + lam * self.coefficients.ravel())
+        self.coefficients = theta.reshape(R, p)
+
+    def gradient(self, X, y, chunk_size=65536):
+        """Mean squared error and its gradient per input's breakpoints (terms, 4)."""
+        grads = [np.zeros_like(abcd) for abcd in self.abcd]
+        sse, count = 0.0, 0
+        for start in range(0, len(X), chunk_size):
+            x, t = X[start:start + chunk_size], y[start:start + chunk_size]
+            W, dW = self._fire(x, grad=True)
+            f = x @ self.coefficients[:, :-1].T + self.coefficients[:, -1]
+            S = W.sum(axis=1)
+            fired = S > 0
+            S = np.where(fired, S, 1.0)
+            out = (W * f).sum(axis=1) / S
+            residual = np.where(fired, out - t, 0.0)
+            sse += float(residual @ residual)
+            count += int(fired.sum())
+            # d(out)/d(W_r) = (f_r - out) / S
+            dout = 2 * residual[:, None] * (f - out[:, None]) / S[:, None]
+            for i, d in enumerate(dW):
+                per_rule = np.einsum('nr,nrk->rk', dout, d)
+                np.add.at(grads[i], self.antecedents[:, i], per_rule)
+        count = max(count, 1)
+        return sse / count, [g / count for g in grads]
+
+    def fit(self, *values, target, epochs=20, step=0.01, memberships=True,
+            ridge=1e-6, chunk_size=65536):
+        """Hybrid ANFIS training on logged inputs ``values`` and ``target``.
+
+        Every epoch solves the consequents by least squares and then, with
+        ``memberships``, moves the breakpoints by ``step`` (a fraction of
+        each input's span) along the normalized negative gradient. The step
+        grows by 10% after an improvement; a step that makes the error worse
+        is undone and retried at half the length. The model ends at the best
+        epoch. Returns the RMSE after each epoch.
+        """
+        _, X = self._stack(values)
+        y = np.asarray(target, dtype=float).ravel()
+        if len(y) != len(X):
+            raise ValueError("Expected {} targets, got {}.".format(len(X), len(y)))
+        spans = [abcd.max() - abcd.min() for abcd in self.abcd]
+        history = []
+        best = None
+        for epoch in range(epochs):
+            self.fit_consequents(X, y, ridge, chunk_size)
+            mse, grads = self.gradient(X, y, chunk_size)
+            if best is None or mse <= best[0]:
+                if best is not None:
+                    step *= 1.1
+                best = (mse, [abcd.copy() for abcd in self.abcd],
+                        self.coefficients.copy(), grads)
+            else:
+                # undo the last breakpoint step and retry a shorter one
+                self.abcd = [abcd.copy() for abcd in best[1]]
+                self.coefficients = best[2].copy()
+                grads = best[3]
+                step /= 2
+            history.append(float(np.sqrt(best[0])))
+            if not memberships:
+                break
+            if epoch < epochs - 1:
+                norm = np.sqrt(sum((g**2).sum() for g in grads))
+                if norm == 0:
+                    break
+                for abcd, g, span in zip(self.abcd, grads, spans):
+                    abcd -= step * span * g / norm
+                    abcd.sort(axis=1)
+        self.abcd, self.coefficients = best[1], best[2]
+        return history
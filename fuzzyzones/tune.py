@@ -0,0 +1,280 @@
+"""Tune the membership breakpoints against the closed-loop Monte Carlo cost.
+
+The tunable parameters are the breakpoints of ERR_TERMS, ERRRATE_TERMS
+and OUTPOWER_TERMS. Points pinned at a universe end, such as the -4, -4
+shoulder of err N, are not tuned. Each free point is scaled by the
+half-width of its universe, so one step size fits all three variables.
+decode() clips a vector to the universes and sorts each set's points,
+which makes every vector a valid trimf/trapmf set.
+
+CMAES is a plain (mu/mu_w, lambda) CMA-ES with an ask/tell interface.
+optimize() samples a generation in the parent and scores it across a
+process pool. The plants, setpoint and loop options are shipped to each
+worker once, by the pool initializer, and tasks carry only the
+candidate vectors. A generation is as slow as its slowest candidate, so
+runs scale with workers up to the population size. Keep the population
+a multiple of the worker count.
+
+Costs use a fixed noise seed, so a vector always scores the same. A run
+with a given seed gives the same result for any number of workers. The
+optimizer state is written to ``checkpoint`` after every generation,
+and optimize() resumes from that file if it exists.
+"""
+import json
+import os
+
+import numpy as np
+
+from .artifact import replacing
+from .sets import ERR_TERMS, ERRRATE_TERMS, OUTPOWER_TERMS
+
+TERMS = (ERR_TERMS, ERRRATE_TERMS, OUTPOWER_TERMS)
+
+# universe ends of err, errRate and outPower
+LIMITS = ((-4.0, 4.0), (-10.0, 10.0), (-100.0, 100.0))
+
+
+def _layout(terms=TERMS, limits=LIMITS):
+    """(variable, term, point) of every breakpoint not pinned at a universe end."""
+    return [(v, t, p)
+            for v, (var_terms, (lo, hi)) in enumerate(zip(terms, limits))
+            for t, (_, points) in enumerate(var_terms)
+            for p, value in enumerate(points) if lo < value < hi]
+
+
+def _half_widths(layout, limits=LIMITS):
+    return np.array([(limits[v][1] - limits[v][0]) / 2 for v, _, _ in layout])
+
+
+def _centers(layout, limits=LIMITS):
+    return np.array([(limits[v][1] + limits[v][0]) / 2 for v, _, _ in layout])
+
+
+def encode(terms=TERMS, limits=LIMITS):
+    """The free breakpoints of ``terms`` as a normalized vector in [-1, 1]."""
+    layout = _layout(terms, limits)
+    values = np.array([terms[v][t][1][p] for v, t, p in layout], dtype=float)
+    return (values - _centers(layout, limits)) / _half_widths(layout, limits)
+
+
+def decode(x, limits=LIMITS):
+    """(err_terms, errRate_terms, outPower_terms) for a normalized vector.
+
+    Values are clipped to the universes and each set's points sorted.
+    """
+    layout = _layout(TERMS, limits)
+    x = np.asarray(x, dtype=float)
+    if x.shape != (len(layout),):
+        raise ValueError("The input for `x`, shape {}, was incorrect.".format(x.shape))
+    values = np.clip(x, -1, 1) * _half_widths(layout, limits) + _centers(layout, limits)
+    points = [[list(shape) for _, shape in var_terms] for var_terms in TERMS]
+    for (v, t, p), value in zip(layout, values):
+        points[v][t][p] = float(value)
+    return tuple(tuple((name, sorted(pts)) for (name, _), pts in zip(var_terms, var_points))
+                 for var_terms, var_points in zip(TERMS, points))
+
+
+def cost(x, plants, setpoint, variant='tsk', method='exact', step=0.1,
+         overshoot_weight=1.0, unsettled_weight=1.0, **loop):
+    """Closed-loop cost of the breakpoints ``x`` on ``plants``.
+
+    The cost is the mean IAE, normalized by step size times duration, plus
+    ``overshoot_weight`` times the mean overshoot fraction, plus
+    ``unsettled_weight`` times the fraction of plants that never settle.
+    ``variant`` is a RuleBase inference method. ``loop`` goes to
+    montecarlo.closed_loop().
+    """
+    from .inference import make_controller
+    from .montecarlo import closed_loop
+
+    infer = getattr(make_controller(step, *decode(x)), variant)
+    loop.setdefault('seed', 0)
+    r = closed_loop(plants, setpoint,
+                    infer=lambda err, errRate: infer(err, errRate, method=method), **loop)
+    duration = loop.get('steps', 600) * loop.get('dt', 1.0)
+    size = np.abs(np.asarray(setpoint, dtype=float) - plants.initial)
+    iae = r['iae'] / (np.where(size == 0, 1.0, size) * duration)
+    return float(iae.mean()
+                 + overshoot_weight * r['overshoot'].mean() / 100
+                 + unsettled_weight * np.isnan(r['settling_time']).mean())
+
+
+class CMAES:
+    """Covariance matrix adaptation evolution strategy, minimizing.
+
+    Candidates are kept inside ``bounds`` (a (low, high) pair of scalars
+    or arrays) by clipping, and the clipped points are what tell() learns
+    from. state() / from_state() round-trip everything, including the
+    random generator, so a resumed run continues exactly.
+    """
+
+    def __init__(self, x0, sigma0=0.2, popsize=None, seed=None, bounds=(-1.0, 1.0)):
+        self.mean = np.array(x0, dtype=float)
+        N = len(self.mean)
+        self.sigma = float(sigma0)
+        self.popsize = popsize or 4 + int(3 * np.log(N))
+        self.bounds = bounds
+        self.C = np.eye(N)
+        self.ps = np.zeros(N)
+        self.pc = np.zeros(N)
+        self.generation = 0
+        self.best = (np.inf, self.mean.copy())
+        self.rng = np.random.default_rng(seed)
+        self._setup()
+
+    def _setup(self):
+        N, lam = len(self.mean), self.popsize
+        mu = lam // 2
+        w = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        self.weights = w / w.sum()
+        self.mueff = 1 / (self.weights**2).sum()
+        self.cc = (4 + self.mueff / N) / (N + 4 + 2 * self.mueff / N)
+        self.cs = (self.mueff + 2) / (N + self.mueff + 5)
+        self.c1 = 2 / ((N + 1.3)**2 + self.mueff)
+        self.cmu = min(1 - self.c1,
+                       2 * (self.mueff - 2 + 1 / self.mueff) / ((N + 2)**2 + self.mueff))
+        self.damps = 1 + 2 * max(0.0, np.sqrt((self.mueff - 1) / (N + 1)) - 1) + self.cs
+        self.chiN = np.sqrt(N) * (1 - 1 / (4 * N) + 1 / (21 * N**2))
+
+    def _eigen(self):
+        D2, B = np.linalg.eigh((self.C + self.C.T) / 2)
+        return B, np.sqrt(np.maximum(D2, 1e-20))
+
+    def ask(self):
+        """A (popsize, N) array of candidates."""
+        B, D = self._eigen()
+        z = self.rng.standard_normal((self.popsize, len(self.mean)))
+        x = self.mean + self.sigma * (z * D) @ B.T
+        return np.clip(x, *self.bounds)
+
+    def tell(self, candidates, costs):
+        """Update the distribution from candidates and their costs."""
+        N = len(self.mean)
+        costs = np.asarray(costs, dtype=float)
+        costs = np.where(np.isnan(costs), np.inf, costs)
+        order = np.argsort(costs, kind='stable')
+        if costs[order[0]] < self.best[0]:
+            self.best = (float(costs[order[0]]), np.array(candidates[order[0]], dtype=float))
+
+        B, D = self._eigen()
+        best = np.asarray(candidates, dtype=float)[order[:len(self.weights)]]
+        y = (best - self.mean) / self.sigma
+        yw = self.weights @ y
+        self.mean = self.mean + self.sigma * yw
+
+        self.ps = (1 - self.cs) * self.ps + \
+            np.sqrt(self.cs * (2 - self.cs) * self.mueff) * (B @ ((B.T @ yw) / D))
+        self.generation += 1
+        norm = np.linalg.norm(self.ps) / np.sqrt(1 - (1 - self.cs)**(2 * self.generation))
+        hsig = float(norm / self.chiN < 1.4 + 2 / (N + 1))
+        self.pc = (1 - self.cc) * self.pc + \
+            hsig * np.sqrt(self.cc * (2 - self.cc) * self.mueff) * yw
+        decay = 1 - self.c1 - self.cmu + (1 - hsig) * self.c1 * self.cc * (2 - self.cc)
+        self.C = decay * self.C + self.c1 * np.outer(self.pc, self.pc) \
+            + self.cmu * (y.T * self.weights) @ y
+        self.sigma *= np.exp(self.cs / self.damps * (np.linalg.norm(self.ps) / self.chiN - 1))
+
+    def state(self):
+        """JSON-serializable optimizer state."""
+        return {'mean': self.mean.tolist(), 'sigma': self.sigma, 'popsize': self.popsize,
+                'bounds': np.asarray(self.bounds, dtype=float).tolist(),
+                'C': self.C.tolist(), 'ps': self.ps.tolist(), 'pc': self.pc.tolist(),
+                'generation': self.generation,
+                'best_cost': self.best[0], 'best': self.best[1].tolist(),
+                'rng': self.rng.bit_generator.state}
+
+    @classmethod
+    def from_state(cls, state):
+        es = cls(state['mean'], state['sigma'], state['popsize'],
+                 bounds=tuple(np.asarray(b) for b in state['bounds']))
+        es.C = np.array(state['C'])
+        es.ps = np.array(state['ps'])
+        es.pc = np.array(state['pc'])
+        es.generation = state['generation']
+        es.best = (float(state['best_cost']), np.array(state['best']))
+        es.rng.bit_generator.state = state['rng']
+        return es
+
+
+# per-worker problem, set once by the pool initializer
+_PROBLEM = None
+
+
+def _init(problem):
+    global _PROBLEM
+    _PROBLEM = problem
+
+
+def _evaluate(x):
+    return cost(x, **_PROBLEM)
+
+
+def _save(path, state):
+    """Write through a temporary file so an interrupted run keeps the old checkpoint."""
+    with replacing(path, 'w') as f:
+        json.dump(state, f)
+
+
+def optimize(plants, setpoint, generations=50, x0=None, sigma0=0.2, popsize=None,
+             workers=None, checkpoint=None, seed=None, progress=None, **problem):
+    """Minimize cost() over the breakpoints with CMA-ES on a process pool.
+
+    ``x0`` defaults to the blog's breakpoints. ``workers`` defaults to
+    ``os.cpu_count()``; with 1 everything runs in this process.
+    ``problem`` holds further cost() / closed_loop() keywords. If
+    ``checkpoint`` names an existing file the run resumes from it. It
+    continues up to ``generations`` in total, and each generation is
+    saved back to that file. ``progress`` is called with the history
+    entry of each generation.
+
+    Returns a dict with the best cost, its vector and decoded terms, the
+    blog breakpoints' cost and the per-generation history.
+    """
+    problem = dict(problem, plants=plants, setpoint=setpoint)
+    history = []
+    if checkpoint is not None and os.path.exists(checkpoint):
+        with open(checkpoint) as f:
+            saved = json.load(f)
+        es = CMAES.from_state(saved['es'])
+        if len(es.mean) != len(encode()):
+            raise ValueError("Checkpoint {} has {} parameters, expected {}."
+                             .format(checkpoint, len(es.mean), len(encode())))
+        baseline, history = saved['baseline'], saved['history']
+    else:
+        es = CMAES(encode() if x0 is None else x0, sigma0, popsize, seed)
+        baseline = None
+
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    if workers > 1:
+        import multiprocessing
+
+        pool = multiprocessing.Pool(workers, initializer=_init, initargs=(problem,))
+        evaluate = lambda X: pool.map(_evaluate, list(X), chunksize=1)
+    else:
+        evaluate = lambda X: [cost(x, **problem) for x in X]
+    try:
+        if baseline is None:
+            baseline = evaluate([encode()])[0]
+        while es.generation < generations:
+            X = es.ask()
+            costs = evaluate(X)
+            es.tell(X, costs)
+            entry = {'generation': es.generation, 'best': es.best[0],
+                     'median': float(np.median(costs)), 'sigma': es.sigma}
+            history.append(entry)
+            if checkpoint is not None:
+                _save(checkpoint, {'es': es.state(), 'baseline': baseline, 'history': history})
+            if progress is not None:
+                progress(entry)
+    except BaseException:
+        # don't wait for the rest of a generation that is thrown away
+        if pool is not None:
+            pool.terminate()
+        raise
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return {'cost': es.best[0], 'x': es.best[1], 'terms': decode(es.best[1]),
+            'baseline': baseline, 'history': history}
@@ -0,0 +1,230 @@
+"""Interval type-2 Mamdani inference with vectorized Karnik-Mendel type reduction.
+
+Each type-1 term becomes an upper and a lower membership function.
+Together they bound a footprint of uncertainty (FOU). blur() builds
+both from trimf/trapmf breakpoints. Sloped feet move outward by
+``spread`` for the upper set and inward for the lower one; the core and
+any vertical shoulder stay where they are. The lower set can also be
+capped at ``lower_height``.
+
+A rule fires with an interval: the AND of the lower memberships up to
+the AND of the upper ones. IntervalRuleBase therefore runs two RuleBases
+with identical structure, one over the upper sets and one over the
+lower sets. Both are aggregated on the output universe, which gives the
+upper and lower aggregated outputs U(y) and L(y).
+
+Type reduction finds the centroid interval [yl, yr] of the set between
+L and U. Karnik-Mendel shows that yl uses U left of a switch point and L
+right of it, and yr the reverse. Instead of KM's iteration, the switch
+points come from prefix sums: moving the switch one sample pulls the
+centroid toward that sample, so the best switch is where the centroid
+first passes the next sample. km_centroid() tests that at the boundaries
+of sqrt(M) blocks, using one batched product for the block sums, and then
+takes a cumsum inside the one block that holds each row's switch point.
+That is O(M) multiply-adds per sample with no (n, M) temporaries and no
+data-dependent loop, so it vectorizes over the whole batch. The points
+are weighted with the trapezoid weights of centroid_weights(). When U
+equals L, this reduces exactly to the type-1 grid centroid.
+The crisp output is the midpoint of the interval.
+
+Both sets are still aggregated on the full output universe, so a batch
+costs about three times a type-1 mamdani() call on the uniform universe
+and about five times on the adaptive one (bench.type2_report()).
+"""
+import numpy as np
+
+from .rules import RuleBase, Variable
+from .sets import (ERR_TERMS, ERRRATE_TERMS, OUTPOWER_TERMS, RULES, adaptive_universes,
+                   membership, universes)
+
+# below this many rows the block search costs more calls than it saves
+_SCAN_ROWS = 4
+
+
+def blur(terms, spread):
+    """(upper terms, lower terms) around trimf/trapmf ``terms``, as 4-point trapmfs."""
+    upper, lower = [], []
+    for name, points in terms:
+        a, b, c, d = points if len(points) == 4 else (points[0], points[1], points[1], points[2])
+        ua, ud = (a - spread if a < b else a), (d + spread if c < d else d)
+        la, ld = (min(a + spread, b) if a < b else a), (max(d - spread, c) if c < d else d)
+        upper.append((name, [ua, b, c, ud]))
+        lower.append((name, [la, b, c, ld]))
+    return tuple(upper), tuple(lower)
+
+
+def _km_scan(upper, lower, weights):
+    """km_centroid() scoring every switch point; fewer calls for a handful of rows."""
+    a, b = weights[:, 0], weights[:, 1]
+    # with the switch after sample k, yl takes U up to k and L after it:
+    # (sum L*a + cumsum((U - L)*a)[k]) / (sum L*b + cumsum((U - L)*b)[k]);
+    # yr takes L up to k and U after it, i.e. the suffix sums from k + 1.
+    # Switching before the first sample (k = -1) gives the U-only centroid
+    # for yr, and switching after the last the L-only one for yl.
+    D = upper - lower
+    Da, Db = D * a, D * b
+    with np.errstate(invalid='ignore', divide='ignore'):
+        La, Lb = lower @ a, lower @ b
+        left = (La[:, None] + np.cumsum(Da, axis=1)) / (Lb[:, None] + np.cumsum(Db, axis=1))
+        yl = np.fmin(np.fmin.reduce(left, axis=1), La / Lb)
+        right = ((La[:, None] + np.cumsum(Da[:, ::-1], axis=1))
+                 / (Lb[:, None] + np.cumsum(Db[:, ::-1], axis=1)))
+        yr = np.fmax(np.fmax.reduce(right, axis=1), La / Lb)
+    valid = (upper @ b) > 0
+    return np.where(valid, yl, np.nan), np.where(valid, yr, np.nan)
+
+
+def km_centroid(upper, lower, weights, block=None):
+    """Centroid interval (yl, yr) of the FOU between ``lower`` and ``upper`` (n, M).
+
+    ``weights`` is the (M, 2) stack of centroid_weights(universe): moment
+    and area weights of each sample. The switch points are searched in
+    blocks of ``block`` samples, sqrt(M) by default. Rows whose upper set
+    is all zero give NaN.
+    """
+    n, M = upper.shape
+    if n < _SCAN_ROWS and block is None:
+        return _km_scan(upper, lower, weights)
+    s = block or max(1, int(np.sqrt(M)))
+    full = M // s * s
+    starts = np.arange(0, M, s)
+    ends = np.minimum(starts + s, M) - 1
+    last = len(starts) - 1
+
+    def sums(X):
+        """Moment and area of ``X`` in each block, (n, blocks, 2)."""
+        out = np.matmul(X[:, :full].reshape(n, -1, s).transpose(1, 0, 2),
+                        weights[:full].reshape(-1, s, 2)).transpose(1, 0, 2)
+        if full < M:
+            out = np.concatenate([out, (X[:, full:] @ weights[full:])[:, None]], axis=1)
+        return out
+
+    # with the switch after sample k, yl takes U up to k and L after it:
+    # left(k) = (L + prefix of U - L to k) . weights, as moment / area; yr
+    # takes L up to k and U after it, i.e. right(k) adds the suffix from
+    # k + 1. Each step moves left(k) toward xi[k], the centroid of sample
+    # k's hat, and xi increases. So left(k) falls until left(k) < xi[k + 1]
+    # and never again, while right(k) rises as long as right(k) > xi[k].
+    # The test at the block boundaries picks the block of each switch
+    # point, and cumsums inside that one block per row find it.
+    xi = weights[:, 0] / weights[:, 1]
+    xi_next, xi_prev = np.append(xi[1:], np.inf), np.append(-np.inf, xi[:-1])
+    SU, SL = sums(upper), sums(lower)
+    # where L is zero the block sums of U - L are those of U, so the
+    # prefix and suffix sums are exactly zero wherever U is zero
+    SD = SU - SL
+    prefix, suffix = np.cumsum(SD, axis=1), np.cumsum(SD[:, ::-1], axis=1)[:, ::-1]
+    L, U = SL.sum(axis=1), SU.sum(axis=1)
+    rows = np.arange(n)
+
+    def inside(j):
+        """Columns of block ``j`` (n,) of each row, and moment and area of U - L there."""
+        cols = starts[j][:, None] + np.arange(s)
+        valid = cols < M
+        cols = np.minimum(cols, M - 1)
+        d = np.where(valid, upper[rows[:, None], cols] - lower[rows[:, None], cols], 0)
+        return cols, valid, d[..., None] * weights[cols]
+
+    def ratio(S):
+        return S[..., 0] / S[..., 1]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        S = L[:, None] + prefix
+        j = np.minimum((S[..., 0] >= xi_next[ends] * S[..., 1]).sum(axis=1), last)
+        cols, valid, d = inside(j)
+        S = (L + prefix[rows, j - 1] * (j > 0)[:, None])[:, None] + np.cumsum(d, axis=1)
+        k = np.minimum(((S[..., 0] >= xi_next[cols] * S[..., 1]) & valid).sum(axis=1), s - 1)
+        yl = np.fmin(ratio(S[rows, k]), ratio(L))
+        S = L[:, None] + suffix[:, 1:]
+        j = (S[..., 0] > xi_prev[starts[1:]] * S[..., 1]).sum(axis=1)
+        cols, valid, d = inside(j)
+        after = suffix[rows, np.minimum(j + 1, last)] * (j < last)[:, None]
+        S = (L + after)[:, None] + np.cumsum(d[:, ::-1], axis=1)[:, ::-1]
+        k = np.maximum(((S[..., 0] > xi_prev[cols] * S[..., 1]) & valid).sum(axis=1) - 1, 0)
+        yr = np.fmax(ratio(S[rows, k]), ratio(U))
+    valid = U[:, 1] > 0
+    return np.where(valid, yl, np.nan), np.where(valid, yr, np.nan)
+
+
+class IntervalRuleBase:
+    """Interval type-2 Mamdani rule base from an upper and a lower RuleBase.
+
+    Both must have the same inputs, output, term names and rules, and
+    upper sets that contain the lower ones. Firing is min AND with max
+    aggregation, as in FuzzyCTRL.py.
+    """
+
+    def __init__(self, upper, lower):
+        if (upper.rules != lower.rules
+                or [v.names for v in upper.inputs] != [v.names for v in lower.inputs]
+                or upper.output.names != lower.output.names
+                or not np.array_equal(upper.output.universe, lower.output.universe)):
+            raise ValueError("Upper and lower rule bases must share their structure.")
+        self.upper = upper
+        self.lower = lower
+        self._weights = np.column_stack([w.astype(float) for w in upper._weights.T])
+
+    def heights(self, *values):
+        """Broadcast shape, upper and lower consequent strengths (n, terms)."""
+        shape, upper = self.upper.heights(*values, how='max')
+        _, lower = self.lower.heights(*values, how='max')
+        # a lower set above its upper one (not from blur()) would break the FOU
+        return shape, upper, np.minimum(lower, upper)
+
+    def interval(self, *values, chunk_size=64):
+        """Centroid interval (yl, yr) for ``values``, each of the broadcast shape."""
+        shape, hu, hl = self.heights(*values)
+        U, L = self.upper.output.mf, self.lower.output.mf
+        n = len(hu)
+        yl, yr = np.empty(n), np.empty(n)
+        M = U.shape[1]
+        clip = np.empty((min(chunk_size, n), M))
+        aggregated = np.empty((2,) + clip.shape)
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            m = stop - start
+            for agg, h, mf in ((aggregated[0, :m], hu[start:stop], U),
+                               (aggregated[1, :m], hl[start:stop], L)):
+                np.minimum(h[:, :1], mf[0], out=agg)
+                for k in range(1, len(mf)):
+                    np.maximum(agg, np.minimum(h[:, k:k + 1], mf[k], out=clip[:m]), out=agg)
+            yl[start:stop], yr[start:stop] = km_centroid(aggregated[0, :m], aggregated[1, :m],
+                                                         self._weights)
+        return yl.reshape(shape)[()], yr.reshape(shape)[()]
+
+    def mamdani(self, *values):
+        """Midpoint of the centroid interval, type-reduced on the output universe."""
+        yl, yr = self.interval(*values)
+        return (yl + yr) / 2
+
+
+def make_type2_controller(step=0.1, spread=(0.4, 1.0, 10.0), lower_height=1.0,
+                          dtype=float, adaptive=False):
+    """Interval type-2 version of the blog controller.
+
+    ``spread`` blurs the err, errRate and outPower sets. ``lower_height``
+    caps every lower set. ``dtype`` and ``adaptive`` are as in
+    make_controller(); the adaptive universes keep the upper and lower
+    breakpoints.
+    """
+    blurred = [blur(terms, s) for terms, s in
+               zip((ERR_TERMS, ERRRATE_TERMS, OUTPOWER_TERMS), spread)]
+    if adaptive:
+        both = [upper + lower for upper, lower in blurred]
+        xs = adaptive_universes(step, dtype, *both)
+    else:
+        xs = universes(step, dtype)
+
+    def variables(which, height):
+        out = []
+        for name, x, pair in zip(('err', 'errRate', 'outPower'), xs, blurred):
+            terms = pair[which]
+            if height != 1.0:
+                terms = [(term, height * membership(x.astype(float), points))
+                         for term, points in terms]
+            out.append(Variable(name, x, terms))
+        return out
+    upper = variables(0, 1.0)
+    lower = variables(1, lower_height)
+    return IntervalRuleBase(RuleBase(upper[:2], upper[2], RULES),
+                            RuleBase(lower[:2], lower[2], RULES))
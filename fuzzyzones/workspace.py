@@ -0,0 +1,248 @@
+"""Allocation-free RuleBase inference on preallocated buffers.
+
+Workspace is sized once for a batch of ``n`` samples. It owns every
+intermediate: membership rows, rule strengths, consequent heights, the
+clipped and aggregated output chunk, the centroid sums and the result.
+It also builds the views into them up front. Each stage then runs as
+NumPy calls with ``out=``, so a call creates no arrays and no Python
+objects beyond NumPy's own per-call iterator bookkeeping. Broadcasting
+ufuncs allocate iterator buffers of NumPy's buffer size (8192 elements by
+default, about 128 KiB per call). evaluate() therefore lowers the buffer
+size to ``bufsize`` while it runs. The scripts'
+``R*_activate``, ``clip_*`` and ``np.fmax`` intermediates are never
+allocated, and the garbage collector has nothing to collect.
+
+Fuzzification is ``np.interp`` rewritten as two ``np.take`` gathers.
+It therefore needs evenly spaced universes, such as the scripts'
+``np.arange``. The stages and the grid centroid follow the RuleBase code
+path, so results agree with RuleBase to rounding.
+
+allocations() measures what a callable allocates per call through
+tracemalloc. Workspace.check() uses it to assert the steady state.
+"""
+import tracemalloc
+
+import numpy as np
+
+INFERENCES = ('mamdani', 'rss_cog', 'tsk')
+
+
+def allocations(f, calls=100, warmup=5):
+    """(peak, retained) bytes traced by tracemalloc across ``calls`` calls of ``f()``.
+
+    ``warmup`` calls run first, so caches filled on first use do not count.
+    Both numbers are relative to the traced memory before the calls. The
+    peak therefore includes the largest temporary made by any single call.
+    """
+    for _ in range(warmup):
+        f()
+    running = tracemalloc.is_tracing()
+    if not running:
+        tracemalloc.start()
+    try:
+        f()
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for _ in range(calls):
+            f()
+        current, peak = tracemalloc.get_traced_memory()
+        return peak - base, current - base
+    finally:
+        if not running:
+            tracemalloc.stop()
+
+
+class _Input:
+    """Buffers and interpolation tables of one input Variable."""
+
+    def __init__(self, var, n):
+        # float32 universes are even only to their rounding
+        x, mf = var.universe.astype(float), var.mf.astype(float)
+        M = len(x)
+        dx = np.diff(x)
+        if M < 2 or not np.allclose(dx, dx[0], rtol=1e-4, atol=0):
+            raise ValueError("Variable {} needs an evenly spaced universe.".format(var.name))
+        K = len(var.names)
+        self.x0, self.x1, self.last = float(x[0]), float(x[-1]), M - 2
+        self.inv_dx = 1 / float(dx[0])
+        self.xp = x
+        self.slope = (np.diff(mf, axis=1) / dx).ravel()
+        self.fp = np.ascontiguousarray(mf[:, :-1]).ravel()
+        self.offsets = (np.arange(K) * (M - 1))[:, None]
+
+        self.f = np.empty(n)
+        self.j = np.empty(n, dtype=np.intp)
+        self.t = np.empty(n)
+        self.mask = np.empty(n, dtype=bool)
+        self.mask2 = np.empty(n, dtype=bool)
+        self.index = np.empty((K, n), dtype=np.intp)
+        self.mu = np.empty((K, n))
+        self.scratch = np.empty((K, n))
+
+    def fuzzify(self, x):
+        """``np.interp(x, universe, mf[k], 0, 0)`` for every term, into ``self.mu``."""
+        f, j, t, mask, xp = self.f, self.j, self.t, self.mask, self.xp
+        # interval index from the spacing; a rounding slip of one interval
+        # lands on the neighbouring segment, which meets this one at the knot
+        np.subtract(x, self.x0, out=f)
+        np.multiply(f, self.inv_dx, out=f)
+        np.floor(f, out=f)
+        np.maximum(f, 0, out=f)
+        np.minimum(f, self.last, out=f)
+        np.copyto(j, f, casting='unsafe')
+
+        # fp[j] + slope[j] * (x - xp[j]) for all terms at once
+        np.take(xp, j, out=t, mode='clip')
+        np.subtract(x, t, out=t)
+        np.add(self.offsets, j, out=self.index)
+        np.take(self.slope, self.index, out=self.mu, mode='clip')
+        np.multiply(self.mu, t, out=self.mu)
+        np.take(self.fp, self.index, out=self.scratch, mode='clip')
+        np.add(self.mu, self.scratch, out=self.mu)
+
+        # zero outside the universe
+        np.less(x, self.x0, out=mask)
+        np.greater(x, self.x1, out=self.mask2)
+        np.logical_or(mask, self.mask2, out=mask)
+        np.copyto(self.mu, 0.0, where=mask)
+        return self.mu
+
+
+class Workspace:
+    """Preallocated ``inference`` of ``rulebase`` for batches of ``n`` samples.
+
+    ``inference`` is 'mamdani' (FuzzyCTRL.py), 'rss_cog' (FuzzyRSS_COG.py)
+    or 'tsk' (FuzzyTSK.py). The clip-and-centroid variants integrate on
+    the output universe like ``method='grid'``, ``chunk_size`` samples at
+    a time.
+
+    Write inputs into ``inputs`` (one row per input) and call evaluate(),
+    or pass arrays of ``n`` values to the call. Both return ``out``,
+    which the next call overwrites.
+    """
+
+    def __init__(self, rulebase, n=1, inference='mamdani', chunk_size=64, bufsize=256):
+        if inference not in INFERENCES:
+            raise ValueError("The input for `inference`, {}, was incorrect.".format(inference))
+        self.rulebase = rulebase
+        self.n = n
+        self.inference = inference
+        self.bufsize = bufsize
+        self.inputs = np.zeros((len(rulebase.inputs), n))
+        self.out = np.empty(n)
+        self._rows = list(self.inputs)
+
+        # rules in consequent order, so aggregation is one reduceat
+        order = rulebase._order
+        self._fire = [(_Input(var, n), row, np.ascontiguousarray(rulebase.antecedents[order, i]))
+                      for i, (var, row) in enumerate(zip(rulebase.inputs, self._rows))]
+        self._starts = rulebase._starts
+        self.R = np.empty((len(rulebase.rules), n))
+        self._R = np.empty_like(self.R)
+
+        K = len(rulebase.output.names)
+        self.heights = np.zeros((K, n))
+        present = rulebase._present
+        if np.array_equal(present, np.arange(K)):
+            self._reduced, self._scatter = self.heights, []
+        else:
+            self._reduced = np.empty((len(present), n))
+            self._scatter = [(self.heights[k], self._reduced[i]) for i, k in enumerate(present)]
+
+        self._valid = np.empty(n, dtype=bool)
+        if inference == 'tsk':
+            self._singletons = np.asarray(rulebase.singletons, dtype=float)[None, :]
+            self._num = np.empty((1, n))
+            self._den = np.empty(n)
+            return
+
+        # the clip and centroid run in the dtype of the output sets
+        mf = rulebase.output.mf
+        self._weights = rulebase._weights
+        self._clip_heights = self.heights if mf.dtype == self.heights.dtype \
+            else np.empty((K, n), dtype=mf.dtype)
+        c = min(chunk_size, n)
+        agg, clip = np.empty((c, mf.shape[1]), mf.dtype), np.empty((c, mf.shape[1]), mf.dtype)
+        sums = np.empty((c, 2), mf.dtype)
+        self._chunks = []
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            m = stop - start
+            h = [self._clip_heights[k, start:stop, None] for k in range(K)]
+            self._chunks.append((h[0], mf[0], list(zip(h[1:], mf[1:])), agg[:m], clip[:m],
+                                 sums[:m], sums[:m, 0], sums[:m, 1],
+                                 self._valid[start:stop], self.out[start:stop]))
+
+    def __call__(self, *values):
+        """Copy ``values`` (each ``n`` samples) into ``inputs``, then evaluate()."""
+        for row, v in zip(self._rows, values):
+            np.copyto(row, v)
+        return self.evaluate()
+
+    def evaluate(self):
+        """Run the inference on ``inputs`` in place and return ``out``."""
+        saved = np.setbufsize(self.bufsize)
+        try:
+            return self._evaluate()
+        finally:
+            np.setbufsize(saved)
+
+    def _evaluate(self):
+        R, Rt = self.R, self._R
+        first = True
+        for inp, row, ante in self._fire:
+            mu = inp.fuzzify(row)
+            if first:
+                np.take(mu, ante, axis=0, out=R, mode='clip')
+                first = False
+            else:
+                np.take(mu, ante, axis=0, out=Rt, mode='clip')
+                np.minimum(R, Rt, out=R)
+
+        if self.inference == 'mamdani':
+            np.maximum.reduceat(R, self._starts, axis=0, out=self._reduced)
+        else:
+            np.square(R, out=Rt)
+            np.add.reduceat(Rt, self._starts, axis=0, out=self._reduced)
+            np.sqrt(self._reduced, out=self._reduced)
+        for dst, src in self._scatter:
+            np.copyto(dst, src)
+
+        out = self.out
+        if self.inference == 'tsk':
+            np.matmul(self._singletons, self.heights, out=self._num)
+            np.add.reduce(self.heights, axis=0, out=self._den)
+            np.greater(self._den, 0, out=self._valid)
+            out.fill(np.nan)
+            np.divide(self._num[0], self._den, out=out, where=self._valid)
+            return out
+
+        if self._clip_heights is not self.heights:
+            np.copyto(self._clip_heights, self.heights)
+        weights = self._weights
+        for h0, mf0, rest, agg, clip, sums, num, den, valid, res in self._chunks:
+            np.minimum(h0, mf0, out=agg)
+            for h, mf in rest:
+                np.minimum(h, mf, out=clip)
+                np.maximum(agg, clip, out=agg)
+            np.matmul(agg, weights, out=sums)
+            np.greater(den, 0, out=valid)
+            res.fill(np.nan)
+            np.divide(num, den, out=res, where=valid)
+        return out
+
+    def check(self, calls=100, limit=8192):
+        """Assert the steady state allocates no arrays; return allocations().
+
+        Every call still makes a few KiB of NumPy iterator bookkeeping,
+        whatever ``n`` is, and the buffer size switch keeps a few bytes of
+        context state. Raises RuntimeError when, over ``calls`` calls, the
+        transient peak or the retained memory reaches ``limit`` bytes, or
+        the retained memory grows with the number of calls.
+        """
+        peak, retained = allocations(self.evaluate, calls)
+        _, again = allocations(self.evaluate, 10 * calls)
+        if peak >= limit or retained >= limit or again > retained + 64:
+            raise RuntimeError("Workspace allocated {} bytes at peak and kept {} "
+                               "over {} calls.".format(peak, max(retained, again), calls))
+        return peak, retained
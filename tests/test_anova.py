@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from fuzzyzones import doe
+
+WORKBOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'Mold_DOE.xlsx')
+
+
+def _mold_doe(data, sources=doe.MOLD_SOURCES, response='Length'):
+    """mold_DOE.py's groupby ANOVA, one source at a time."""
+    frame = pd.DataFrame(data)
+    y = frame[response]
+    CF = y.sum()**2 / len(y)
+    SS_T = (y**2).sum() - CF
+    SS, df = [], []
+    for source in sources:
+        sums = frame.groupby(source)[response].sum()
+        SS.append((sums**2).sum() / (len(y) / len(sums)) - CF)
+        df.append(len(sums) - 1)
+    fe = len(y) - 1 - sum(df)
+    SS_e = SS_T - sum(SS)
+    MS_e = SS_e / fe
+    MS = [s / f for s, f in zip(SS, df)]
+    PS = [s - MS_e * f for s, f in zip(SS, df)]
+    PS_e = SS_e + sum(df) * MS_e
+    return {'df': df + [fe, len(y) - 1], 'SS': SS + [SS_e, SS_T],
+            'MS': MS + [MS_e, np.nan], 'F': [m / MS_e for m in MS] + [1.0, np.nan],
+            'PS': PS + [PS_e, np.nan],
+            'PI': [p / SS_T * 100 for p in PS] + [PS_e / SS_T * 100, 100.0]}
+
+
+def _assert_table(table, expected):
+    # both subtract the correction factor of runs near 40, which leaves
+    # SS_e good to about 1e-11 and its F ratios to about 1e-8
+    assert table['df'] == expected['df']
+    for column in ('SS', 'MS', 'F', 'PS', 'PI'):
+        np.testing.assert_allclose(table[column], expected[column], rtol=1e-7, atol=1e-9,
+                                   err_msg=column)
+
+
+@pytest.mark.parametrize('sources', [doe.MOLD_SOURCES, doe.MOLD_FACTORS])
+def test_matches_mold_doe_on_the_mold_runs(sources):
+    _assert_table(doe.anova(doe.MOLD_RUNS, sources), _mold_doe(doe.MOLD_RUNS, sources))
+
+
+def test_matches_mold_doe_on_the_workbook():
+    data = doe.read_experiment(WORKBOOK)
+    _assert_table(doe.anova(data), _mold_doe(data))
+
+
+def test_matrix_of_responses_matches_one_at_a_time():
+    rng = np.random.default_rng(0)
+    data = dict(doe.MOLD_RUNS)
+    names = []
+    for i in range(40):
+        data['r{}'.format(i)] = (np.array(data['Length']) + rng.normal(0, 0.05, 8)).tolist()
+        names.append('r{}'.format(i))
+    table = doe.anova(data, doe.MOLD_FACTORS, names)
+    loop = [doe.anova(data, doe.MOLD_FACTORS, name) for name in names]
+    for column in ('SS', 'MS', 'F', 'PS', 'PI', 'p'):
+        np.testing.assert_allclose(table[column], np.column_stack([t[column] for t in loop]),
+                                   rtol=1e-7, atol=1e-9, err_msg=column)
+
+
+def test_pooling_equals_leaving_the_sources_out():
+    pooled = doe.anova(doe.MOLD_RUNS, pool=['Temp*Press', 'Time*Press'])
+    kept = doe.anova(doe.MOLD_RUNS, doe.MOLD_FACTORS + ('Temp*Time',))
+    assert pooled['df'][-2] == kept['df'][-2] == 3
+    np.testing.assert_allclose(pooled['SS'][-2], kept['SS'][-2], rtol=1e-9)
+    np.testing.assert_allclose(pooled['F'][:4], kept['F'][:4], rtol=1e-9)
+    assert np.isnan(pooled['F'][4:6]).all() and pooled['pooled'][4:6].all()
+    below = doe.anova(doe.MOLD_RUNS, doe.MOLD_FACTORS, pool_below=10)
+    assert below['pooled'].tolist() == (np.array(_mold_doe(doe.MOLD_RUNS, doe.MOLD_FACTORS)
+                                                 ['F'][:3]) < 10).tolist()
+
+
+def test_p_values_are_the_f_distribution_tail():
+    table = doe.anova(doe.MOLD_RUNS, pool=['Temp*Press', 'Time*Press'])
+    fe = table['df'][-2]
+    for F, df, p in zip(table['F'][:4], table['df'][:4], table['p'][:4]):
+        assert p == pytest.approx(stats.f.sf(F, df, fe), rel=1e-9)
+
+
+def test_side_by_side_replicates_match_repeated_runs():
+    y = np.array(doe.MOLD_RUNS['Length'])
+    Y = np.stack([y, y + np.random.default_rng(1).normal(0, 0.05, 8)], axis=1)
+    side = doe.Anova(doe.MOLD_RUNS).table(Y[:, :, None])
+    runs = {k: v * 2 for k, v in doe.MOLD_RUNS.items()}
+    runs['Length'] = Y.T.ravel().tolist()
+    repeated = doe.anova(runs)
+    assert side['df'][:, 0].tolist() == repeated['df']
+    np.testing.assert_allclose(side['SS'][:, 0], repeated['SS'], rtol=1e-7, atol=1e-9)
+
+
+def test_rounded_total_is_the_sum_of_the_printed_percentages():
+    table = doe.rounded(doe.anova(doe.MOLD_RUNS, pool=['Temp*Press']))
+    kept = ~np.concatenate([table['pooled'], [False]])
+    assert table['PI'][-1] == pytest.approx(table['PI'][:-1][kept].sum())
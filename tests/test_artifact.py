@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pytest
+
+from fuzzyzones.artifact import (Artifact, load_controller, replacing, save_controller,
+                                 write_arrays)
+from fuzzyzones.inference import make_controller
+from fuzzyzones.surface import compile_surface
+
+METHODS = ('mamdani', 'rss_cog', 'rss_wa', 'tsk')
+
+
+def test_controller_round_trip(tmp_path):
+    path = str(tmp_path / 'c.fzz')
+    rulebase = make_controller(0.05)
+    surface = compile_surface('tsk', tol=1.0)
+    save_controller(path, rulebase, {'tsk': surface}, metadata={'note': 'x'})
+    loaded, surfaces = load_controller(path)
+    assert Artifact(path).meta['user'] == {'note': 'x'}
+    assert not loaded.output.mf.flags.writeable
+
+    rng = np.random.default_rng(0)
+    err, errRate = rng.uniform(-5, 5, 2000), rng.uniform(-12, 12, 2000)
+    for name in METHODS:
+        for method in ('grid', 'exact'):
+            np.testing.assert_array_equal(getattr(loaded, name)(err, errRate, method=method),
+                                          getattr(rulebase, name)(err, errRate, method=method))
+    mapped = surfaces['tsk']
+    assert mapped.max_error == surface.max_error
+    np.testing.assert_array_equal(mapped(err, errRate), surface(err, errRate))
+
+
+def test_mapped_surface_is_not_copied(tmp_path):
+    path = str(tmp_path / 's.fzz')
+    surface = compile_surface('rss_wa', tol=2.0)
+    save_controller(path, make_controller(), {'rss_wa': surface})
+    mapped = load_controller(path)[1]['rss_wa']
+    assert mapped._flat is None and surface._flat is not None
+    rng = np.random.default_rng(1)
+    for e, r in zip(rng.uniform(-5, 5, 200), rng.uniform(-12, 12, 200)):
+        assert mapped.value(e, r) == surface.value(e, r)
+
+
+def test_arrays_are_aligned_and_typed(tmp_path):
+    path = str(tmp_path / 'a.fzz')
+    arrays = {'a': np.arange(5, dtype=np.int8), 'b': np.ones((3, 4), dtype=np.float32),
+              'c': np.array(['x', 'yz'])}
+    write_arrays(path, arrays, {'k': 1})
+    art = Artifact(path)
+    assert art.meta == {'k': 1}
+    for name, a in arrays.items():
+        np.testing.assert_array_equal(art[name], a)
+        assert art[name].dtype == a.dtype
+        assert art[name].ctypes.data % 64 == art['a'].ctypes.data % 64
+
+
+def test_bad_files(tmp_path):
+    with pytest.raises(ValueError):
+        write_arrays(str(tmp_path / 'o.fzz'), {'o': np.array([None])})
+    junk = tmp_path / 'junk.fzz'
+    junk.write_bytes(b'not an artifact at all')
+    with pytest.raises(ValueError):
+        Artifact(str(junk))
+    path = str(tmp_path / 'plain.fzz')
+    write_arrays(path, {'a': np.zeros(2)})
+    with pytest.raises(ValueError):
+        load_controller(path)
+
+
+def test_replacing_is_atomic(tmp_path):
+    path = str(tmp_path / 'r.fzz')
+    write_arrays(path, {'a': np.zeros(2)})
+    with pytest.raises(RuntimeError):
+        with replacing(path) as f:
+            f.write(b'half')
+            raise RuntimeError
+    np.testing.assert_array_equal(Artifact(path)['a'], np.zeros(2))
+    write_arrays(path, {'a': np.ones(3)})
+    np.testing.assert_array_equal(Artifact(path)['a'], np.ones(3))
+    assert os.listdir(str(tmp_path)) == ['r.fzz']
+    plain = tmp_path / 'plain'
+    plain.write_bytes(b'')
+    assert os.stat(path).st_mode & 0o777 == os.stat(str(plain)).st_mode & 0o777
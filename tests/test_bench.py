@@ -0,0 +1,37 @@
+import pytest
+
+from fuzzyzones import bench
+
+
+def _records():
+    return bench.run(variants=('ctrl_native', 'tsk'), methods=('grid',), steps=(0.1,),
+                     batches=(1, 10), accuracy_samples=50, reference_step=0.01, repeats=5)
+
+
+def test_run_covers_every_combination():
+    records = _records()
+    assert [(r['variant'], r['batch']) for r in records] == \
+        [('ctrl_native', 1), ('ctrl_native', 10), ('tsk', 1), ('tsk', 10)]
+    for r in records:
+        assert r['throughput_per_s'] > 0 and r['peak_bytes'] > 0
+    # tsk singletons do not depend on the step
+    assert records[-1]['max_deviation'] < 0.1
+
+
+def test_write_read_and_compare(tmp_path):
+    records = _records()
+    bench.write(records, tmp_path / 'a.json')
+    assert bench.read(tmp_path / 'a.json') == records
+    bench.write(records, tmp_path / 'a.csv')
+    assert (tmp_path / 'a.csv').read_text().startswith('variant,method,step,batch')
+    assert bench.read(tmp_path / 'a.csv') == records
+    bench.write([], tmp_path / 'empty.csv')
+    assert bench.read(tmp_path / 'empty.csv') == []
+    with pytest.raises(ValueError):
+        bench.write(records, tmp_path / 'a.txt', fmt='xml')
+
+    assert bench.compare(records, records) == []
+    worse = [dict(r, throughput_per_s=r['throughput_per_s'] / 2,
+                  max_deviation=r['max_deviation'] + 1) for r in records]
+    fields = [field for _, field, _, _ in bench.compare(records, worse)]
+    assert fields.count('throughput_per_s') == 4 and fields.count('max_deviation') == 4
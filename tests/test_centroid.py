@@ -0,0 +1,54 @@
+import numpy as np
+import skfuzzy as fuzz
+
+from fuzzyzones.centroid import (ClippedSets, clip_centroid, clipped_trapezoid_centroid,
+                                 grid_deviation)
+from fuzzyzones.inference import make_controller
+from fuzzyzones.sets import OUTPOWER_TERMS, membership, x_outPower
+
+
+def _heights(n=300, seed=0):
+    heights = np.random.default_rng(seed).uniform(0, 1, (n, 3))
+    heights[:30] = np.round(heights[:30] * 2) / 2     # zeros, halves and full sets
+    return heights[heights.sum(axis=1) > 0]
+
+
+def test_grid_centroid_is_fuzz_defuzz():
+    mf = np.vstack([membership(x_outPower, p) for _, p in OUTPOWER_TERMS])
+    heights = _heights(40)
+    expected = [fuzz.defuzz(x_outPower, np.fmin(h[:, None], mf).max(axis=0), 'centroid')
+                for h in heights]
+    np.testing.assert_allclose(clip_centroid(heights, x_outPower, mf), expected,
+                               rtol=1e-12, atol=1e-12)
+
+
+def test_exact_is_the_limit_of_the_grid():
+    deviation = grid_deviation(ClippedSets(OUTPOWER_TERMS), _heights())
+    steps = sorted(deviation, reverse=True)
+    assert all(deviation[a] > deviation[b] for a, b in zip(steps, steps[1:]))
+    assert deviation[0.001] < 1e-3
+
+
+def test_single_set_matches_the_trapezoid_formula():
+    heights = np.linspace(0.01, 1.2, 50)
+    for name, points in OUTPOWER_TERMS:
+        sets = ClippedSets([(name, points)])
+        abcd = points if len(points) == 4 else [points[0], points[1], points[1], points[2]]
+        np.testing.assert_allclose(sets.centroid(heights[:, None]),
+                                   clipped_trapezoid_centroid(abcd, heights), rtol=1e-12,
+                                   atol=1e-9)
+
+
+def test_zero_area_is_nan():
+    assert np.isnan(ClippedSets(OUTPOWER_TERMS).centroid(np.zeros((1, 3))))[0]
+
+
+def test_rulebase_exact_vs_grid():
+    rng = np.random.default_rng(2)
+    err, errRate = rng.uniform(-4, 3.9, 500), rng.uniform(-10, 9.9, 500)
+    coarse, fine = make_controller(0.1), make_controller(0.005)
+    for name in ('mamdani', 'rss_cog', 'rss_wa'):
+        exact = getattr(coarse, name)(err, errRate, method='exact')
+        np.testing.assert_allclose(getattr(coarse, name)(err, errRate), exact, atol=0.1)
+        np.testing.assert_allclose(getattr(fine, name)(err, errRate), exact, atol=5e-3,
+                                   err_msg=name)
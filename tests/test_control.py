@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from skfuzzy import control as ctrl
+
+from fuzzyzones.control import compile_control, conformance, temperature_system
+from fuzzyzones.inference import controller
+
+# skfuzzy's own compute() calls np.maximum with a positional out
+pytestmark = pytest.mark.filterwarnings('ignore::DeprecationWarning')
+
+
+def test_conformance_with_compute():
+    report = conformance(temperature_system(), n=500, seed=0)
+    assert report['samples'] == 500
+    assert report['outPower'] < 1e-9
+
+
+def test_conformance_counts_a_one_sided_nan_as_a_failure():
+    system = temperature_system()
+    compiled = compile_control(system)
+
+    class Gap(object):
+        inputs = compiled.inputs
+
+        def __call__(self, **values):
+            out = compiled(**values)
+            out['outPower'] = np.array(out['outPower'], dtype=float)
+            out['outPower'][3] = np.nan
+            return out
+
+    report = conformance(system, n=50, seed=0, compiled=Gap())
+    assert report['outPower'] == float('inf')
+
+
+def test_conformance_of_a_two_output_system_with_or_and_weights():
+    x = np.arange(0, 11, 0.5)
+    a, b = ctrl.Antecedent(x, 'a'), ctrl.Antecedent(x, 'b')
+    y, z = ctrl.Consequent(x, 'y'), ctrl.Consequent(x, 'z')
+    for var in (a, b, y, z):
+        var.automf(3)
+    rules = [ctrl.Rule(a['poor'] | b['poor'], (y['poor'], z['good'])),
+             ctrl.Rule(a['average'] & ~b['good'], y['average']),
+             ctrl.Rule(a['good'] & b['good'], (y['good'], z['poor'] % 0.5)),
+             ctrl.Rule(b['average'], z['average'])]
+    report = conformance(ctrl.ControlSystem(rules), n=300, seed=1)
+    assert report['y'] < 1e-9 and report['z'] < 1e-9
+
+
+def test_compiled_is_close_to_the_rule_base():
+    # compute() also integrates at the crossings of the clipped sets, the
+    # sampled RuleBase only on the universe
+    compiled = compile_control(temperature_system())
+    rng = np.random.default_rng(2)
+    err, errRate = rng.uniform(-4, 3.9, 300), rng.uniform(-10, 9.9, 300)
+    np.testing.assert_allclose(compiled(err=err, errRate=errRate)['outPower'],
+                               controller.mamdani(err, errRate), atol=1e-3)
+
+
+def test_missing_input():
+    with pytest.raises(ValueError):
+        compile_control(temperature_system())(err=1.0)
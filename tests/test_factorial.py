@@ -0,0 +1,74 @@
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+from fuzzyzones import doe, factorial
+
+WORKBOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'Mold_DOE.xlsx')
+
+
+def _assert_matches_doe(data, factors, response='Length'):
+    expected = doe.effects(data, factors, response)
+    got = factorial.effects(data, factors, response)
+    for term, value in expected.items():
+        assert got[term] == pytest.approx(value, rel=1e-12, abs=1e-12)
+
+
+def test_yates_matches_doe_effects_on_the_mold_runs():
+    _assert_matches_doe(doe.MOLD_RUNS, doe.MOLD_FACTORS)
+
+
+def test_yates_matches_doe_effects_on_the_workbook():
+    _assert_matches_doe(doe.read_experiment(WORKBOOK), doe.MOLD_FACTORS)
+
+
+def test_yates_matches_doe_effects_with_shuffled_replicates():
+    rng = np.random.default_rng(0)
+    names = ['a', 'b', 'c', 'd']
+    X = np.array(list(itertools.product([-1, 1], repeat=4)) * 3)
+    order = rng.permutation(len(X))
+    data = {f: (10 * X[order, j] + 50).tolist() for j, f in enumerate(names)}
+    data['y'] = rng.normal(size=len(X)).tolist()
+    _assert_matches_doe(data, names, 'y')
+
+
+def test_higher_order_contrast_is_the_mean_difference():
+    rng = np.random.default_rng(1)
+    X = np.array(list(itertools.product([-1, 1], repeat=6)))
+    y = rng.normal(size=len(X))
+    design = factorial.Design(X, ['f{}'.format(j) for j in range(6)])
+    sign = X[:, [1, 3, 4]].prod(axis=1)
+    assert design.effects(y)['f1*f3*f4'] == pytest.approx(y[sign > 0].mean() - y[sign < 0].mean(),
+                                                         rel=1e-12)
+
+
+def test_fraction_reports_alias_chains():
+    basic = np.array(list(itertools.product([-1, 1], repeat=4)))
+    A, B, C, D = basic.T
+    X = np.column_stack([A, B, C, D, A * B * C, -B * C * D])
+    design = factorial.Design(X, list('ABCDEF'))
+    assert design.p == 2 and design.resolution() == 4
+    aliases = design.aliases()
+    assert 'B*C*E' in aliases['A'] and aliases['A*E'][:2] == ['B*C', '-D*F']
+    y = 3 + 2 * A - 1.5 * X[:, 5] + 0.5 * A * B
+    effects = {t: e for t, e in design.effects(y).items() if abs(e) > 1e-9}
+    assert effects == pytest.approx({'A': 4, 'F': -3, 'A*B': 1})
+
+
+def test_matrix_of_responses_matches_one_at_a_time():
+    X = np.array(list(itertools.product([-1, 1], repeat=3)))
+    Y = np.random.default_rng(2).normal(size=(8, 5))
+    design = factorial.Design(X, doe.MOLD_FACTORS)
+    mean, effects = design.contrasts(Y)
+    for r in range(Y.shape[1]):
+        m, e = design.contrasts(Y[:, r])
+        np.testing.assert_allclose(mean[r], m, rtol=1e-12)
+        np.testing.assert_allclose(effects[:, r], e, rtol=1e-12)
+
+
+def test_empty_cells_are_rejected():
+    with pytest.raises(ValueError):
+        factorial.Design(np.array([[1, 1], [1, -1], [-1, 1]]), ['a', 'b'])
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from fuzzyzones.centroid import HeightCentroids, clip_centroid, clipped_trapezoid_centroid
+from fuzzyzones.sets import OUTPOWER_TERMS, membership, x_outPower
+
+MF = np.vstack([membership(x_outPower, p) for _, p in OUTPOWER_TERMS])
+POINTS = [p for _, p in OUTPOWER_TERMS]
+
+
+def _heights():
+    h = np.random.default_rng(0).uniform(0, 1, (200, 3))
+    h[:10] = [[0, 0.5, 1]] * 10
+    return h
+
+
+def test_grid_table_matches_clipping_each_set():
+    heights = _heights()
+    Cx = HeightCentroids(x_outPower, MF)(heights)
+    for k in range(3):
+        expected = clip_centroid(heights[:, k:k + 1], x_outPower, MF[k:k + 1])
+        expected = np.where(heights[:, k] > 0, expected, 0.0)
+        np.testing.assert_allclose(Cx[:, k], expected, rtol=1e-12, atol=1e-9)
+
+
+def test_exact_table_matches_the_trapezoid_formula():
+    heights = _heights()
+    Cx = HeightCentroids(x_outPower, MF, POINTS, 'exact')(heights)
+    abcd = [POINTS[0], [-50, 0, 0, 50], POINTS[2]]
+    for k in range(3):
+        expected = np.where(heights[:, k] > 0,
+                            clipped_trapezoid_centroid(abcd[k], heights[:, k]), 0.0)
+        np.testing.assert_allclose(Cx[:, k], expected, rtol=1e-12, atol=1e-12)
+
+
+def test_exact_needs_breakpoints():
+    with pytest.raises(ValueError):
+        HeightCentroids(x_outPower, MF, [None, None, None], 'exact')
+    with pytest.raises(ValueError):
+        HeightCentroids(x_outPower, MF, method='spline')
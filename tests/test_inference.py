@@ -0,0 +1,116 @@
+import numpy as np
+import skfuzzy as fuzz
+
+from fuzzyzones.__main__ import main
+from fuzzyzones.inference import METHODS, make_controller
+from fuzzyzones.sets import (ERR_TERMS, ERRRATE_TERMS, OUTPOWER_TERMS, term_arrays, x_err,
+                             x_errRate, x_outPower)
+
+err_N, err_Z, err_P = term_arrays(x_err, ERR_TERMS)
+errRate_N, errRate_Z, errRate_P = term_arrays(x_errRate, ERRRATE_TERMS)
+outPower_C, outPower_NC, outPower_H = term_arrays(x_outPower, OUTPOWER_TERMS)
+
+
+def _rules(err, errRate):
+    """R1..R9 of the Fuzzy*.py scripts for one crisp sample."""
+    N, Z, P = (fuzz.interp_membership(x_err, m, err) for m in (err_N, err_Z, err_P))
+    rN, rZ, rP = (fuzz.interp_membership(x_errRate, m, errRate)
+                  for m in (errRate_N, errRate_Z, errRate_P))
+    return (min(N, rN), min(Z, rN), min(P, rN), min(N, rZ), min(Z, rZ), min(P, rZ),
+            min(N, rP), min(Z, rP), min(P, rP))
+
+
+def _rss(err, errRate):
+    R1, R2, R3, R4, R5, R6, R7, R8, R9 = _rules(err, errRate)
+    return ((R1**2 + R4**2 + R7**2 + R8**2)**0.5, R5,
+            (R2**2 + R3**2 + R6**2 + R9**2)**0.5)
+
+
+def _mamdani(err, errRate):
+    R1, R2, R3, R4, R5, R6, R7, R8, R9 = _rules(err, errRate)
+    C = np.fmin(max(R1, R4, R7, R8), outPower_C)
+    NC = np.fmin(R5, outPower_NC)
+    H = np.fmin(max(R2, R3, R6, R9), outPower_H)
+    return fuzz.defuzz(x_outPower, np.fmax(C, np.fmax(NC, H)), 'centroid')
+
+
+def _rss_cog(err, errRate):
+    C, NC, H = _rss(err, errRate)
+    aggregated = np.fmax(np.fmin(C, outPower_C),
+                         np.fmax(np.fmin(NC, outPower_NC), np.fmin(H, outPower_H)))
+    return fuzz.defuzz(x_outPower, aggregated, 'centroid')
+
+
+def _rss_wa(err, errRate):
+    C, NC, H = _rss(err, errRate)
+    Cx_C = fuzz.defuzz(x_outPower, np.fmin(C, outPower_C), 'centroid') if C else 0
+    Cx_NC = fuzz.defuzz(x_outPower, np.fmin(NC, outPower_NC), 'centroid') if NC else 0
+    Cx_H = fuzz.defuzz(x_outPower, np.fmin(H, outPower_H), 'centroid') if H else 0
+    return (Cx_C * C + Cx_NC * NC + Cx_H * H) / (C + NC + H)
+
+
+def _tsk(err, errRate):
+    C, NC, H = _rss(err, errRate)
+    Cx_C = (50**2 + 50*100 + 100**2)/(3*150) - 100
+    return (Cx_C * C + 0 * NC - Cx_C * H) / (C + NC + H)
+
+
+SCALAR = {'mamdani': _mamdani, 'rss_cog': _rss_cog, 'rss_wa': _rss_wa, 'tsk': _tsk}
+
+
+def _samples(n=200, seed=1):
+    rng = np.random.default_rng(seed)
+    err, errRate = rng.uniform(-4, 3.9, n), rng.uniform(-10, 9.9, n)
+    # breakpoints and universe ends, where the sets have corners
+    err[:20] = np.clip(np.round(err[:20]), -4, 3)
+    errRate[:20] = np.clip(np.round(errRate[:20]), -10, 9)
+    return err, errRate
+
+
+def test_batch_matches_the_scalar_scripts():
+    err, errRate = _samples()
+    for name, f in METHODS.items():
+        expected = [SCALAR[name](e, r) for e, r in zip(err, errRate)]
+        np.testing.assert_allclose(f(err, errRate), expected, rtol=1e-12, atol=1e-12,
+                                   err_msg=name)
+
+
+def test_blog_sample():
+    for name, f in METHODS.items():
+        assert np.isclose(f(-1, 2.5), SCALAR[name](-1, 2.5), rtol=1e-12, atol=0), name
+
+
+def test_batch_matches_per_sample_calls():
+    err, errRate = _samples(50)
+    for name, f in METHODS.items():
+        for method in ('grid', 'exact'):
+            scalar = [f(e, r, method) for e, r in zip(err, errRate)]
+            np.testing.assert_allclose(f(err, errRate, method), scalar, rtol=1e-12, atol=1e-12,
+                                       err_msg=name + ' ' + method)
+
+
+def test_inputs_broadcast():
+    e, r = x_err[::10], x_errRate[::10]
+    E, R = np.meshgrid(e, r, indexing='ij')
+    for f in METHODS.values():
+        out = f(E, R)
+        assert out.shape == E.shape
+        np.testing.assert_array_equal(f(e[:, None], r[None, :]), out)
+
+
+def test_step_changes_the_universes():
+    rb = make_controller(0.05)
+    assert len(rb.output.universe) == 4000
+    assert abs(rb.mamdani(-1, 2.5) - METHODS['mamdani'](-1, 2.5)) < 0.1
+
+
+def test_cli_clips_inputs_to_the_universes(capsys, tmp_path):
+    main(['infer', '9', '-50', '--method', 'tsk'])
+    np.testing.assert_allclose(float(capsys.readouterr().out),
+                               METHODS['tsk'](x_err[-1], x_errRate[0]), rtol=1e-9)
+    path = tmp_path / 'rows.csv'
+    path.write_text('-9,0\n1,2\n')
+    main(['infer', '--input', str(path)])
+    np.testing.assert_allclose(np.loadtxt(capsys.readouterr().out.splitlines()),
+                               [METHODS['mamdani'](x_err[0], 0.0), METHODS['mamdani'](1, 2)],
+                               rtol=1e-9)
@@ -0,0 +1,101 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fuzzyzones import doe, ingest
+from fuzzyzones.artifact import Artifact
+
+WORKBOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'Mold_DOE.xlsx')
+
+
+@pytest.fixture
+def log(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 2000
+    frame = pd.DataFrame({'t': np.arange(n), 'zone': rng.choice(['A', 'B'], n),
+                          'temp': rng.normal(25, 1, n), 'mixed': np.arange(n).astype(object),
+                          'late': np.arange(n).astype(float)})
+    frame.loc[1500, 'mixed'] = 'x'
+    frame.loc[1700, 'late'] = np.nan
+    path = str(tmp_path / 'log.csv')
+    frame.to_csv(path, index=False)
+    return path
+
+
+def _table(path, cache):
+    return Artifact(ingest.cache_path(path, directory=cache))
+
+
+def test_workbook_matches_read_experiment(tmp_path):
+    path = str(tmp_path / 'm.xlsx')
+    shutil.copy(WORKBOOK, path)
+    cache = str(tmp_path / 'cache')
+    data = ingest.load(path, directory=cache)
+    expected = doe.read_experiment(path)
+    assert list(data) == ['Runs'] + list(expected.columns)
+    for name in expected.columns:
+        np.testing.assert_array_equal(data[name], expected[name].to_numpy())
+    assert doe.anova(data)['SS'].tolist() == doe.anova(expected)['SS'].tolist()
+    assert not data['Length'].flags.writeable
+
+
+def test_csv_chunks_match_one_read(log, tmp_path):
+    cache = str(tmp_path / 'cache')
+    data = ingest.load(log, directory=cache, chunk_rows=300)
+    expected = pd.read_csv(log)
+    assert list(data) == list(expected.columns)
+    np.testing.assert_array_equal(data['t'], expected['t'].to_numpy())
+    np.testing.assert_array_equal(data['temp'], expected['temp'].to_numpy())
+    np.testing.assert_array_equal(data['zone'], expected['zone'].to_numpy().astype(str))
+    np.testing.assert_array_equal(data['mixed'], expected['mixed'].to_numpy().astype(str))
+    np.testing.assert_array_equal(data['late'], expected['late'].to_numpy())
+    assert data['t'].dtype == np.int64 and data['late'].dtype == np.float64
+    assert os.listdir(cache) == [os.path.basename(ingest.cache_path(log, directory=cache))]
+
+
+def test_csv_parses_only_the_columns_asked_for(log, tmp_path):
+    cache = str(tmp_path / 'cache')
+    data = ingest.load(log, ['temp', 'zone'], directory=cache, chunk_rows=300)
+    assert list(data) == ['temp', 'zone']
+    table = _table(log, cache)
+    assert table.meta['columns'] == ['zone', 'temp'] and not table.meta['complete']
+    ingest.load(log, ['zone'], directory=cache)
+    assert _table(log, cache).meta['columns'] == ['zone', 'temp']
+    data = ingest.load(log, ['late', 'temp'], directory=cache, chunk_rows=300)
+    assert _table(log, cache).meta['columns'] == ['zone', 'temp', 'late']
+    np.testing.assert_array_equal(data['late'], pd.read_csv(log)['late'].to_numpy())
+    assert list(ingest.load(log, directory=cache)) == ['t', 'zone', 'temp', 'mixed', 'late']
+    assert _table(log, cache).meta['complete']
+    with pytest.raises(ValueError):
+        ingest.load(log, ['nope'], directory=cache)
+
+
+def test_touched_source_is_rehashed_and_changed_source_rebuilt(log, tmp_path, monkeypatch):
+    cache = str(tmp_path / 'cache')
+    ingest.load(log, ['t'], directory=cache)
+    table = ingest.cache_path(log, directory=cache)
+    meta, built = _table(log, cache).meta, os.stat(table).st_mtime_ns
+    os.utime(log, ns=(1, 1))
+    assert len(ingest.load(log, ['t'], directory=cache)['t']) == 2000
+    assert _table(log, cache).meta == meta and os.stat(table).st_mtime_ns == built
+    assert sorted(os.listdir(cache)) == sorted([os.path.basename(table),
+                                                os.path.basename(table) + '.stamp'])
+    with monkeypatch.context() as m:
+        m.setattr(ingest, 'file_hash', None)
+        assert len(ingest.load(log, ['t'], directory=cache)['t']) == 2000
+    with open(log, 'a') as f:
+        f.write('999999,A,1.0,2,3.0\n')
+    t = ingest.load(log, ['t'], directory=cache)['t']
+    assert len(t) == 2001 and t[-1] == 999999
+
+
+def test_chunks_cover_the_table(log, tmp_path):
+    cache = str(tmp_path / 'cache')
+    pieces = list(ingest.chunks(log, ['temp'], rows=700, directory=cache))
+    assert [len(p['temp']) for p in pieces] == [700, 700, 600]
+    np.testing.assert_array_equal(np.concatenate([p['temp'] for p in pieces]),
+                                  pd.read_csv(log)['temp'].to_numpy())
@@ -0,0 +1,45 @@
+import numpy as np
+
+from fuzzyzones.montecarlo import FOPDTPlants, closed_loop, summarize
+
+KEYS = ('rise_time', 'overshoot', 'settling_time', 'iae', 'final_error')
+
+
+def test_fleet_matches_plants_run_one_by_one():
+    fleet = FOPDTPlants.random(6, seed=0, noise=(0, 0), duration=300)
+    batch = closed_loop(fleet, 25.0, steps=300, velocity=0.05)
+    for i in range(fleet.n):
+        one = FOPDTPlants(1, gain=fleet.gain[i], tau=fleet.tau[i], dead_time=fleet.dead_time[i],
+                          ambient=fleet.ambient[i], disturbance=fleet.disturbance[i],
+                          disturbance_time=fleet.disturbance_time[i])
+        single = closed_loop(one, 25.0, steps=300, velocity=0.05)
+        for key in KEYS:
+            np.testing.assert_allclose(batch[key][i], single[key][0], rtol=1e-12, atol=1e-12,
+                                       equal_nan=True)
+
+
+def test_open_loop_follows_the_exact_discretization():
+    plants = FOPDTPlants(1, gain=0.5, tau=60.0, ambient=20.0)
+    result = closed_loop(plants, 30.0, infer=lambda err, errRate: np.full_like(err, 40.0),
+                         dt=2.0, steps=50, record=[0])
+    t = result['time']
+    expected = 20.0 + 60.0 * 0.5 * 0.4 * (1 - np.exp(-t / 60.0))
+    np.testing.assert_allclose(result['temperature'][:, 0], expected, rtol=1e-12)
+    np.testing.assert_array_equal(result['outPower'][:, 0], 40.0)
+
+
+def test_far_setpoints_stay_finite():
+    plants = FOPDTPlants(3, initial=[20.0, 20.0, 80.0])
+    result = closed_loop(plants, [90.0, -40.0, 20.0], infer='mamdani', method='grid', steps=50)
+    assert all(np.isfinite(result[key]).all() for key in ('iae', 'final_error'))
+
+
+def test_velocity_form_removes_the_offset():
+    plants = FOPDTPlants.random(20, seed=1, noise=(0, 0), disturbance=(0, 0),
+                                dead_time=(0, 0))
+    direct = closed_loop(plants, 25.0, steps=900)
+    velocity = closed_loop(plants, 25.0, steps=900, velocity=0.01)
+    assert np.abs(velocity['final_error']).max() < np.abs(direct['final_error']).max()
+    summary = summarize(velocity)
+    assert set(summary) == set(KEYS)
+    assert summary['iae']['missing'] == 0
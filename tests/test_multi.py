@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from fuzzyzones.inference import make_controller
+from fuzzyzones.rules import MultiRuleBase, RuleBase
+from fuzzyzones.sets import OUTPOWER_TERMS, RULES, x_err, x_outPower
+
+METHODS = ('mamdani', 'rss_cog', 'rss_wa', 'tsk')
+
+
+def _fan(heat):
+    terms = (('L', [0, 0, 50]), ('M', [0, 50, 100]), ('H', [50, 100, 100]))
+    rules = [r[:2] + ({'C': 'H', 'NC': 'L', 'H': 'M'}[r[2]],) for r in RULES][:8]
+    return RuleBase(heat.inputs, ('fan', np.arange(0, 100, 0.1), terms), rules)
+
+
+def test_outputs_match_the_separate_rule_bases():
+    heat = make_controller()
+    fan = _fan(heat)
+    multi = MultiRuleBase.from_rulebases([heat, fan])
+    assert len(multi.rules) == 9
+    rng = np.random.default_rng(0)
+    err, errRate = rng.uniform(-5, 5, 1000), rng.uniform(-12, 12, 1000)
+    for name in METHODS:
+        for method in ('grid', 'exact'):
+            out = getattr(multi, name)(err, errRate, method=method)
+            assert set(out) == {'outPower', 'fan'}
+            for rb in (heat, fan):
+                np.testing.assert_array_equal(out[rb.output.name],
+                                              getattr(rb, name)(err, errRate, method=method))
+    assert multi.tsk(0.5, -1.0)['fan'] == fan.tsk(0.5, -1.0)
+
+
+def test_repeated_antecedents_get_their_own_rows():
+    heat = make_controller()
+    twice = RuleBase(heat.inputs, ('extra', x_outPower, OUTPOWER_TERMS),
+                     list(RULES) + [('N', 'N', 'NC')])
+    multi = MultiRuleBase.from_rulebases([twice, heat])
+    assert len(multi.rules) == 10
+    out = multi.mamdani(-3.0, -7.0)
+    assert out['extra'] == twice.mamdani(-3.0, -7.0)
+    assert out['outPower'] == heat.mamdani(-3.0, -7.0)
+
+
+def test_different_inputs_are_rejected():
+    heat = make_controller()
+    other = RuleBase([('err', x_err, (('N', [-4, -4, 0]), ('P', [0, 4, 4]))), heat.inputs[1]],
+                     heat.output, [('N', 'N', 'C')])
+    with pytest.raises(ValueError):
+        MultiRuleBase.from_rulebases([heat, other])
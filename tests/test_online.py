@@ -0,0 +1,91 @@
+import itertools
+import json
+import os
+
+import numpy as np
+import pytest
+
+from fuzzyzones import doe, factorial
+from fuzzyzones.online import OnlineDOE
+
+LEVELS = {'moldTemp': (23, 38), 'coolTime': (18, 28), 'holdPress': (400, 650)}
+
+
+@pytest.fixture
+def runs():
+    rng = np.random.default_rng(1)
+    X = np.array(list(itertools.product(*LEVELS.values())), dtype=float)
+    X = X[rng.permutation(np.arange(24) % 8)]
+    Y = 40 + (0.001 * X[:, 2] + 0.01 * X[:, 1])[:, None] + rng.normal(0, 0.03, (24, 2))
+    return X, Y
+
+
+def _filled(X, Y):
+    online = OnlineDOE(LEVELS, ['Length', 'Width'])
+    for x, y in zip(X, Y):
+        online.add(x, y)
+    return online
+
+
+def test_anova_matches_doe_anova(runs):
+    X, Y = runs
+    design = factorial.Design.from_data({f: X[:, j] for j, f in enumerate(LEVELS)},
+                                        tuple(LEVELS))
+    # ANOVA is shift invariant; centering spares doe.anova() the
+    # cancellation of its correction factor
+    data = {'Length': Y[:, 0] - 40, 'Width': Y[:, 1] - 40}
+    for mask in range(1, 8):
+        name = '*'.join(f for j, f in enumerate(LEVELS) if mask >> j & 1)
+        data[name] = np.prod([design.X[:, j] for j in range(3) if mask >> j & 1], axis=0)
+    sources = [name for name in data if name not in ('Length', 'Width')]
+    expected = doe.anova(data, sources, ['Length', 'Width'])
+    table = _filled(X, Y).anova()
+    assert table['Source'] == expected['Source']
+    for column in ('df', 'SS', 'MS', 'F', 'PS', 'PI', 'p'):
+        np.testing.assert_allclose(table[column], expected[column], rtol=1e-9, atol=1e-12,
+                                   err_msg=column)
+
+
+def test_effects_match_yates(runs):
+    X, Y = runs
+    design = factorial.Design.from_data({f: X[:, j] for j, f in enumerate(LEVELS)},
+                                        tuple(LEVELS))
+    expected = design.effects(Y[:, 1])
+    effects = _filled(X, Y).effects('Width')
+    assert effects == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+
+def test_extend_matches_add(runs):
+    X, Y = runs
+    online = _filled(X, Y)
+    batched = OnlineDOE(LEVELS, ['Length', 'Width'])
+    batched.extend(X[:10], Y[:10])
+    batched.extend(X[10:], Y[10:])
+    np.testing.assert_array_equal(batched.count, online.count)
+    np.testing.assert_allclose(batched.mean, online.mean, rtol=1e-12)
+    np.testing.assert_allclose(batched.M2, online.M2, rtol=1e-9, atol=1e-15)
+
+
+def test_empty_cells_give_nan(runs):
+    X, Y = runs
+    online = _filled(X[:5], Y[:5])
+    assert np.isnan(online.contrasts()[1]).all()
+    assert np.isnan(online.anova()['SS'][:-2]).all()
+
+
+def test_snapshot_and_save_continue_the_analysis(runs, tmp_path):
+    X, Y = runs
+    online = _filled(X, Y)
+    restored = OnlineDOE.restore(json.loads(json.dumps(online.snapshot())))
+    path = str(tmp_path / 'online.json')
+    online.save(path)
+    online.save(path)
+    loaded = OnlineDOE.load(path)
+    assert os.listdir(str(tmp_path)) == ['online.json']
+    for other in (restored, loaded):
+        other.add(X[0], [40, 41])
+    online.add(X[0], [40, 41])
+    for other in (restored, loaded):
+        np.testing.assert_array_equal(other.count, online.count)
+        np.testing.assert_array_equal(other.mean, online.mean)
+        np.testing.assert_array_equal(other.M2, online.M2)
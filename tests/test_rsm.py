@@ -0,0 +1,80 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from fuzzyzones import doe
+from fuzzyzones.rsm import ResponseSurface
+
+
+def _true(X):
+    return 5 + X[..., 0] - 2 * X[..., 1] + 0.5 * X[..., 0] * X[..., 2] \
+        - 1.5 * X[..., 1]**2 + 0.7 * X[..., 2]**2
+
+
+@pytest.fixture
+def ccd():
+    """Central composite design of _true() and twice it."""
+    X = np.vstack([np.array(list(itertools.product([-1, 1], repeat=3))),
+                   np.eye(3) * 1.68, -np.eye(3) * 1.68, np.zeros((4, 3))])
+    return {'a': X[:, 0], 'b': X[:, 1], 'c': X[:, 2], 'y': _true(X), 'w': 2 * _true(X)}
+
+
+def _points(xs, ys, value, at):
+    """Grid points (ys, xs, 3) with the third factor ``value`` in column ``at``."""
+    P = np.stack(np.meshgrid(xs, ys), axis=-1)
+    return np.insert(P, at, value, axis=-1)
+
+
+def test_two_level_coefficients_are_half_the_effects():
+    model = ResponseSurface.fit(doe.MOLD_RUNS, doe.MOLD_FACTORS, 'Length', 'interaction')
+    coef = dict(zip(model.term_names(), model.coef[:, 0]))
+    for term, effect in doe.effects(doe.MOLD_RUNS).items():
+        assert 2 * coef[term] == pytest.approx(effect, abs=1e-12)
+    X = np.column_stack([doe.MOLD_RUNS[f] for f in doe.MOLD_FACTORS])
+    fitted = model.predict(X)[:, 0]
+    assert model.r2[0] == pytest.approx(1 - ((fitted - doe.MOLD_RUNS['Length'])**2).sum()
+                                        / np.var(doe.MOLD_RUNS['Length']) / 8)
+
+
+def test_quadratic_needs_more_than_two_levels(ccd):
+    with pytest.raises(ValueError):
+        ResponseSurface.fit(doe.MOLD_RUNS, doe.MOLD_FACTORS, 'Length', 'quadratic')
+    model = ResponseSurface.fit(ccd, ('a', 'b', 'c'), ['y', 'w'], 'quadratic')
+    np.testing.assert_allclose(model.r2, 1, atol=1e-12)
+    point = np.array([0.3, -0.2, 1.1])
+    np.testing.assert_allclose(model.predict(point), [_true(point), 2 * _true(point)],
+                               rtol=1e-10)
+
+
+def test_grid_matches_predict(ccd):
+    model = ResponseSurface.fit(ccd, ('a', 'b', 'c'), ['y', 'w'], 'quadratic')
+    xs, ys, Z = model.grid('a', 'c', fixed={'b': 0.3}, n=41)
+    assert Z.shape == (2, 41, 41)
+    expected = np.moveaxis(model.predict(_points(xs, ys, 0.3, 1)), -1, 0)
+    np.testing.assert_allclose(Z, expected, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(Z[0], _true(_points(xs, ys, 0.3, 1)), rtol=1e-10)
+
+
+@pytest.mark.parametrize('model', ['interaction', 'quadratic'])
+def test_contours_lie_on_their_levels(ccd, model):
+    fit = ResponseSurface.fit(ccd, ('a', 'b', 'c'), 'y', model)
+    levels = np.array([3.0, 4.0, 5.0])
+    xs, Ys = fit.contours('a', 'b', levels, fixed={'c': 0.3})
+    assert Ys.shape == ((2 if model == 'quadratic' else 1), 3, len(xs))
+    for branch in Ys:
+        X = np.stack([np.broadcast_to(xs, branch.shape), branch,
+                      np.full(branch.shape, 0.3)], axis=-1)
+        found = ~np.isnan(branch)
+        assert found.any()
+        np.testing.assert_allclose(fit.predict(X)[..., 0][found],
+                                   np.broadcast_to(levels[:, None], branch.shape)[found],
+                                   atol=1e-9)
+
+
+def test_window_is_the_mask_of_the_limits(ccd):
+    model = ResponseSurface.fit(ccd, ('a', 'b', 'c'), ['y', 'w'], 'quadratic')
+    xs, ys, mask = model.window('a', 'b', {'y': (3, 6), 'w': (None, 11)}, n=51)
+    _, _, Z = model.grid('a', 'b', n=51)
+    np.testing.assert_array_equal(mask, (Z[0] >= 3) & (Z[0] <= 6) & (Z[1] <= 11))
+    assert 0 < mask.mean() < 1
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from fuzzyzones.inference import controller
+from fuzzyzones.rules import RuleBase
+from fuzzyzones.sets import (ERR_TERMS, ERRRATE_TERMS, OUTPOWER_TERMS, RULES, x_err, x_errRate,
+                             x_outPower)
+
+INPUTS = [('err', x_err, ERR_TERMS), ('errRate', x_errRate, ERRRATE_TERMS)]
+OUTPUT = ('outPower', x_outPower, OUTPOWER_TERMS)
+
+
+def test_table_gives_the_same_rule_base():
+    table = [['C', 'C', 'C'],
+             ['H', 'NC', 'C'],
+             ['H', 'H', 'H']]
+    rulebase = RuleBase.from_table(INPUTS, OUTPUT, table)
+    assert sorted(rulebase.rules) == sorted(RULES)
+    rng = np.random.default_rng(0)
+    err, errRate = rng.uniform(-4, 3.9, 200), rng.uniform(-10, 9.9, 200)
+    for name in ('mamdani', 'rss_cog', 'rss_wa', 'tsk'):
+        np.testing.assert_array_equal(getattr(rulebase, name)(err, errRate),
+                                      getattr(controller, name)(err, errRate))
+
+
+def test_fire_and_aggregate():
+    _, memberships = controller.fuzzify(-1.0, 2.5)
+    R = controller.fire(memberships)
+    assert R.shape == (1, 9)
+    # err -1 is half N and half Z; errRate 2.5 is half Z and half P
+    np.testing.assert_allclose(R[0], [0, 0, 0, 0.5, 0.5, 0, 0.5, 0.5, 0])
+    np.testing.assert_allclose(controller.aggregate(R, 'max'), [[0.5, 0.5, 0]])
+    np.testing.assert_allclose(controller.aggregate(R, 'rss'), [[np.sqrt(0.75), 0.5, 0]])
+
+
+def test_missing_rules_leave_their_consequent_empty():
+    rulebase = RuleBase(INPUTS, OUTPUT, [r for r in RULES if r[2] != 'NC'])
+    _, memberships = rulebase.fuzzify(0.0, 0.0)
+    heights = rulebase.aggregate(rulebase.fire(memberships))
+    assert heights[0, 1] == 0
+    assert np.isclose(controller.aggregate(controller.fire(memberships))[0, 1], 1)
+
+
+def test_bad_rules():
+    with pytest.raises(ValueError):
+        RuleBase(INPUTS, OUTPUT, [('N', 'C')])
+    with pytest.raises(ValueError):
+        RuleBase(INPUTS, OUTPUT, [('N', 'Q', 'C')])
+    with pytest.raises(ValueError):
+        RuleBase.from_table(INPUTS, OUTPUT, [['C', 'C'], ['H', 'H']])
+    with pytest.raises(ValueError):
+        controller.aggregate(np.zeros((1, 9)), 'sum')
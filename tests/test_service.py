@@ -0,0 +1,81 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from fuzzyzones.inference import tsk
+from fuzzyzones.service import SimulatedPlant, ZoneService, simulate
+
+
+def test_setpoint_far_from_ambient():
+    service = ZoneService('tsk', period=0.005)
+    plant = SimulatedPlant(50)
+    asyncio.run(simulate(service, plant, setpoint=25, duration=0.3, speedup=200))
+    assert service.zones > 0
+    assert np.isfinite(plant.outPower).all()
+    assert np.isfinite(plant.temperature).all()
+    assert (plant.temperature > plant.ambient).all()
+
+
+def test_tick_clamps_inputs_to_the_universes():
+    service = ZoneService('tsk')
+
+    async def main():
+        futures = [service.submit(0, 0.0, 100.0, 20.0), service.submit(1, 0.0, -100.0, 20.0)]
+        service.tick()
+        return [f.result() for f in futures]
+
+    hot, cold = asyncio.run(main())
+    assert hot == tsk(3.9, 0.0)
+    assert cold == tsk(-4.0, 0.0)
+
+
+def test_nan_output_holds_the_last_one():
+    outputs = iter([np.array([10.0]), np.array([np.nan])])
+    service = ZoneService(lambda err, errRate: next(outputs))
+
+    async def main():
+        values = []
+        for t in (0.0, 1.0):
+            future = service.submit('zone', t, 25.0, 20.0)
+            service.tick()
+            values.append(await future)
+        return values
+
+    assert asyncio.run(main()) == [10.0, 10.0]
+
+
+def test_a_failing_tick_fails_its_futures():
+    outputs = iter([RuntimeError('sensor bus'), np.array([10.0])])
+
+    def infer(err, errRate):
+        out = next(outputs)
+        if isinstance(out, Exception):
+            raise out
+        return out
+
+    service = ZoneService(infer)
+
+    async def main():
+        future = service.submit('zone', 0.0, 25.0, 20.0)
+        service.tick()
+        with pytest.raises(RuntimeError):
+            await future
+        future = service.submit('zone', 1.0, 25.0, 21.0)
+        service.tick()
+        return await future
+
+    assert asyncio.run(main()) == 10.0
+    # the failed sample left no state behind for errRate
+    assert service.zones == 1 and service._errRate[0] == 0.0
+
+
+def test_metrics_report_throughput_and_jitter():
+    service = ZoneService('tsk', period=0.002)
+    assert service.metrics()['zones_per_second'] == 0.0
+    asyncio.run(simulate(service, SimulatedPlant(20), setpoint=25, duration=0.1))
+    metrics = service.metrics()
+    assert metrics['ticks'] == service.ticks > 0 and metrics['zones'] == service.zones > 0
+    assert metrics['zones_per_second'] == pytest.approx(service.zones / service.elapsed)
+    assert metrics['inference_zones_per_second'] >= metrics['zones_per_second'] > 0
+    assert 0 <= metrics['jitter_p50'] <= metrics['jitter_p99'] <= metrics['jitter_max']
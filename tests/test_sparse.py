@@ -0,0 +1,54 @@
+import itertools
+
+import numpy as np
+
+from fuzzyzones.inference import make_controller
+from fuzzyzones.rules import RuleBase
+
+METHODS = ('mamdani', 'rss_cog', 'rss_wa', 'tsk')
+
+
+def _seven_by_four(sparse):
+    x = np.linspace(-1, 1, 201)
+    terms = [(str(k), [c - 0.34, c, c + 0.34]) for k, c in enumerate(np.linspace(-1, 1, 7))]
+    rules = [tuple(str(v) for v in combo) + (str(sum(combo) % 7),)
+             for combo in itertools.product(range(7), repeat=4)]
+    return RuleBase([('a{}'.format(i), x, terms) for i in range(4)], ('o', x, terms), rules,
+                    sparse=sparse)
+
+
+def test_sparse_matches_dense():
+    sparse, dense = _seven_by_four(True), _seven_by_four(False)
+    values = list(np.random.default_rng(0).uniform(-1.1, 1.1, (4, 500)))
+    for name in METHODS:
+        for method in ('grid', 'exact'):
+            np.testing.assert_allclose(getattr(sparse, name)(*values, method=method),
+                                       getattr(dense, name)(*values, method=method),
+                                       rtol=0, atol=1e-12, equal_nan=True)
+    assert sparse.firing_stats()['fraction'] <= 2**4 / 7**4
+    assert dense.firing_stats()['fraction'] == 1
+
+
+def test_sparse_is_picked_for_large_rule_bases():
+    assert _seven_by_four(None).sparse
+    assert not make_controller().sparse
+
+
+def test_sparse_blog_controller():
+    sparse = make_controller()
+    sparse.sparse = True
+    dense = make_controller()
+    E, R = np.meshgrid(np.linspace(-4.5, 4.5, 61), np.linspace(-11, 11, 61))
+    for name in METHODS:
+        np.testing.assert_allclose(getattr(sparse, name)(E, R), getattr(dense, name)(E, R),
+                                   rtol=0, atol=1e-12, equal_nan=True)
+
+
+def test_sparse_without_rules_fires_nothing():
+    x = np.linspace(-1, 1, 21)
+    terms = [('lo', [-1, -1, 1]), ('hi', [-1, 1, 1])]
+    rb = RuleBase([('a', x, terms), ('b', x, terms)], ('o', x, terms), [], sparse=True)
+    values = [np.array([-0.5, 0.5]), np.array([0.0, 0.9])]
+    rule, strength = rb.fire_sparse(values, rb.fuzzify(*values)[1])
+    assert (rule == -1).all() and not strength.any()
+    assert np.isnan(rb.mamdani(*values)).all()
@@ -0,0 +1,8 @@
+from fuzzyzones.bench import cold_start
+
+
+def test_library_imports_stay_light():
+    modules = ('fuzzyzones.inference', 'fuzzyzones.surface', 'fuzzyzones.stream',
+               'fuzzyzones.doe', 'fuzzyzones.factorial', 'fuzzyzones.online')
+    times = cold_start(modules, runs=1)
+    assert set(times) == set(modules)
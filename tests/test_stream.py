@@ -0,0 +1,56 @@
+import math
+
+from fuzzyzones.inference import mamdani
+from fuzzyzones.stream import StreamController
+
+
+def test_inputs_outside_the_universes_saturate():
+    stream = StreamController('mamdani')
+    assert stream.update(0.0, 30.0, 20.0) == mamdani(3.9, 0.0)
+    outPower = stream.update(0.1, 30.0, 40.0)
+    assert stream.err == -10.0 and stream.errRate < -10
+    assert outPower == mamdani(-4.0, -10.0)
+    assert not math.isnan(outPower)
+
+
+def test_errRate_follows_the_stream():
+    stream = StreamController('tsk', tau=0.0)
+    samples = [(0.0, 22.0, 20.0), (1.0, 22.0, 20.5), (2.0, 22.0, 21.5)]
+    rows = list(stream.run(samples))
+    assert [r[1] for r in rows] == [2.0, 1.5, 0.5]
+    assert [r[2] for r in rows] == [0.0, -0.5, -1.0]
+    assert stream.latency()['ticks'] == 3
+
+
+def test_out_of_order_samples_are_dropped():
+    stream = StreamController('tsk')
+    stream.update(1.0, 22.0, 20.0)
+    assert stream.update(0.5, 22.0, 25.0) == stream.update(1.0, 22.0, 25.0)
+    stream.update(1.5, 22.0, 20.5)
+    assert stream.err == 1.5 and stream.errRate == -1.0
+    assert stream.dropped == 2 and stream.latency()['ticks'] == 2
+
+
+def test_small_moves_reuse_the_last_outPower():
+    calls = []
+
+    def infer(err, errRate):
+        calls.append((err, errRate))
+        return err
+
+    stream = StreamController(infer, tau=1.0, tol=0.05)
+    outPowers = [stream.update(float(t), 22.0, measurement)
+                 for t, measurement in enumerate([20.0, 20.01, 20.03, 20.5])]
+    assert outPowers == [2.0, 2.0, 2.0, 1.5]
+    assert len(calls) == 2 and stream.skipped == 2
+
+
+def test_latency_percentiles_cover_the_window():
+    stream = StreamController(lambda err, errRate: 0.0, window=4)
+    assert stream.latency()['p50'] is None
+    for t in range(10):
+        stream.update(float(t), 22.0, 20.0 + t)
+    stream._latency[:] = [1.0, 2.0, 3.0, 4.0]
+    stats = stream.latency()
+    assert stats['ticks'] == 10 and stats['max'] == 4.0
+    assert stats['p50'] == 2.5 and 3.9 < stats['p99'] < 4.0
@@ -0,0 +1,64 @@
+import numpy as np
+
+from fuzzyzones.inference import METHODS
+from fuzzyzones.rules import RuleBase
+from fuzzyzones.surface import Surface, compile_surface
+
+
+def _dense_error(surface, f, k=6):
+    """Worst bilinear error on a k x k interior lattice of every cell."""
+    fr = np.arange(1, k + 1) / (k + 1)
+    e = (surface.err_grid[:-1, None] + np.diff(surface.err_grid)[:, None] * fr).ravel()
+    r = (surface.errRate_grid[:-1, None] + np.diff(surface.errRate_grid)[:, None] * fr).ravel()
+    return np.nanmax(np.abs(f(e[:, None], r[None, :]) - surface(e[:, None], r[None, :])))
+
+
+def test_max_error_holds_on_a_denser_probe():
+    for tol in (2.0, 1.0):
+        surface = compile_surface('rss_wa', tol=tol)
+        assert surface.max_error <= tol
+        assert _dense_error(surface, METHODS['rss_wa']) <= 1.05 * surface.max_error
+
+
+def test_nodes_are_exact():
+    surface = compile_surface('tsk', tol=1.0)
+    e, r = surface.err_grid[::3], surface.errRate_grid[::5]
+    np.testing.assert_allclose(surface(e[:, None], r[None, :]),
+                               METHODS['tsk'](e[:, None], r[None, :]), atol=1e-12)
+
+
+def test_scalar_value_matches_the_batch_lookup():
+    surface = compile_surface('tsk', tol=1.0)
+    rng = np.random.default_rng(0)
+    err, errRate = rng.uniform(-6, 6, 500), rng.uniform(-15, 15, 500)
+    expected = surface(err, errRate)
+    assert max(abs(surface.value(e, r) - x) for e, r, x in zip(err, errRate, expected)) < 1e-9
+    out = np.empty(500)
+    assert surface(err, errRate, out=out) is out
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_inputs_are_clamped_to_the_grid():
+    surface = Surface([0, 1, 2], [0, 1], [[0, 1], [2, 3], [4, 5]])
+    assert surface(-5, -5) == 0 and surface(9, 9) == 5
+    assert surface.value(9, 0.5) == 4.5
+    assert surface(0.5, 0.5) == 1.5
+
+
+def test_rule_base_and_callable_use_their_own_ranges():
+    x = np.arange(0, 10.01, 0.1)
+    terms = [('lo', [0, 0, 10]), ('hi', [0, 10, 10])]
+    wide = [('lo', [0, 0, 20]), ('hi', [0, 20, 20])]
+    rulebase = RuleBase([('a', x, terms), ('b', x * 2, wide)], ('y', x, terms),
+                        [('lo', 'lo', 'lo'), ('hi', 'lo', 'hi'), ('lo', 'hi', 'hi'),
+                         ('hi', 'hi', 'lo')])
+    surface = compile_surface(rulebase, tol=0.2)
+    assert (surface.err_grid[0], surface.err_grid[-1]) == (0, 10)
+    assert (surface.errRate_grid[0], surface.errRate_grid[-1]) == (0, 20)
+    e, r = surface.err_grid[::2], surface.errRate_grid[::2]
+    np.testing.assert_allclose(surface(e[:, None], r[None, :]),
+                               rulebase.mamdani(e[:, None], r[None, :]), atol=1e-12)
+
+    plane = compile_surface(lambda a, b: a + 2 * b, ranges=((1, 3), (-1, 1)))
+    assert plane.shape == (9, 9) and plane.max_error < 1e-12
+    assert plane(2.5, 0.5) == 3.5 and plane(9, 9) == 5
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from fuzzyzones.inference import make_controller
+from fuzzyzones.telemetry import STAGES
+
+METHODS = ('mamdani', 'rss_cog', 'rss_wa', 'tsk')
+
+
+def _inputs(n=2000):
+    rng = np.random.default_rng(0)
+    return rng.uniform(-5, 5, n), rng.uniform(-12, 12, n)
+
+
+def test_instrumented_results_are_unchanged():
+    err, errRate = _inputs()
+    rulebase = make_controller()
+    expected = {m: getattr(rulebase, m)(err, errRate, method='exact') for m in METHODS}
+    telemetry = rulebase.instrument()
+    for m in METHODS:
+        np.testing.assert_array_equal(getattr(rulebase, m)(err, errRate, method='exact'),
+                                      expected[m])
+    report = telemetry.report()
+    assert report['samples'] == 4 * len(err)
+    assert [s['stage'] for s in report['stages']] == list(STAGES)
+    assert all(s['calls'] == 4 for s in report['stages'])
+    assert report['degenerate'] == 4 * np.isnan(expected['mamdani']).sum()
+    rulebase.instrument(False)
+    assert rulebase.telemetry is None
+
+
+def test_rule_counts():
+    rulebase = make_controller()
+    telemetry = rulebase.instrument(bins=4)
+    rulebase.mamdani(-1.0, 2.5)
+    rules = telemetry.report()['rules']
+    assert [r['fired'] for r in rules] == [0, 0, 0, 1, 1, 0, 1, 1, 0]
+    assert rules[3]['histogram'] == [0, 1, 0, 0]
+    assert rules[0]['text'] == 'err is N and errRate is N --> outPower is C'
+    assert telemetry.never_fired() == ['R1', 'R2', 'R3', 'R6', 'R9']
+
+
+def test_write(tmp_path):
+    rulebase = make_controller()
+    telemetry = rulebase.instrument()
+    rulebase.tsk(*_inputs(100))
+    telemetry.write(tmp_path / 't.json')
+    telemetry.write(tmp_path / 't.csv')
+    lines = (tmp_path / 't.csv').read_text().splitlines()
+    assert len(lines) == 1 + len(STAGES) + 9 + 1
+    with pytest.raises(ValueError):
+        telemetry.write(tmp_path / 't.txt', fmt='xml')
@@ -0,0 +1,49 @@
+import numpy as np
+
+from fuzzyzones.inference import controller
+from fuzzyzones.rules import RuleBase
+from fuzzyzones.sets import (ERR_TERMS, ERRRATE_TERMS, OUTPOWER_TERMS, RULES, x_err,
+                             x_errRate, x_outPower)
+from fuzzyzones.tsk import LinearTSK, _sets
+
+
+def _one_consequent_per_rule():
+    """The blog rule base with a copy of the consequent set per rule, so
+    RuleBase.tsk's RSS reduces to the plain weighted average."""
+    points = dict(OUTPOWER_TERMS)
+    outputs = [('R{}'.format(i), points[out]) for i, (_, _, out) in enumerate(RULES)]
+    rules = [(e, r, 'R{}'.format(i)) for i, (e, r, _) in enumerate(RULES)]
+    return RuleBase([('err', x_err, ERR_TERMS), ('errRate', x_errRate, ERRRATE_TERMS)],
+                    ('outPower', x_outPower, outputs), rules)
+
+
+def test_zero_order_matches_rulebase_on_the_whole_grid():
+    rulebase = _one_consequent_per_rule()
+    E, R = np.meshgrid(x_err, x_errRate, indexing='ij')
+    expected = rulebase.tsk(E, R)
+    assert not np.isnan(expected).any()
+    np.testing.assert_allclose(LinearTSK.from_rulebase(rulebase)(E, R), expected,
+                               rtol=0, atol=1e-9)
+
+
+def test_universe_endpoints():
+    model = LinearTSK.from_rulebase(controller)
+    for err in (x_err[0], x_err[-1]):
+        for errRate in (x_errRate[0], 0.0, x_errRate[-1]):
+            assert np.isclose(model(err, errRate), controller.tsk(err, errRate), atol=1e-9)
+    assert np.isclose(model(-4, 0), controller.tsk(-4, 0))
+
+
+def test_vertical_shoulders_include_their_end_point():
+    abcd = np.array([[-4, -4, -2, 0], [0, 2, 4, 4]], dtype=float)
+    mu = _sets(np.array([-4.0, -5.0, 4.0, 5.0]), abcd)
+    np.testing.assert_array_equal(mu, [[1, 0], [0, 0], [0, 1], [0, 0]])
+
+
+def test_consequents_recover_a_linear_surface():
+    E, R = np.meshgrid(x_err[::4], x_errRate[::4], indexing='ij')
+    X = np.column_stack([E.ravel(), R.ravel()])
+    target = 3 * X[:, 0] - 2 * X[:, 1] + 1
+    model = LinearTSK.from_rulebase(controller)
+    model.fit_consequents(X, target, ridge=0)
+    np.testing.assert_allclose(model(X[:, 0], X[:, 1]), target, atol=1e-6)
@@ -0,0 +1,77 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from fuzzyzones.montecarlo import FOPDTPlants
+from fuzzyzones.sets import ERR_TERMS, ERRRATE_TERMS, OUTPOWER_TERMS
+from fuzzyzones.tune import CMAES, TERMS, cost, decode, encode, optimize
+
+
+def _sphere(X):
+    return [float(((x - 0.3)**2).sum()) for x in X]
+
+
+def test_decode_inverts_encode():
+    assert decode(encode()) == tuple(tuple((name, sorted(points)) for name, points in terms)
+                                     for terms in TERMS)
+    with pytest.raises(ValueError):
+        decode(np.zeros(3))
+
+
+def test_encode_lays_out_the_given_terms():
+    err_terms = (('N', [-4, -4, -4, 0]),) + tuple(ERR_TERMS[1:])
+    x = encode((err_terms, ERRRATE_TERMS, OUTPOWER_TERMS))
+    assert len(x) == len(encode()) - 1
+    np.testing.assert_array_equal(x, encode()[1:])
+
+
+def test_decode_keeps_every_set_valid():
+    for x in np.random.default_rng(0).uniform(-3, 3, (20, len(encode()))):
+        for terms, (lo, hi) in zip(decode(x), ((-4, 4), (-10, 10), (-100, 100))):
+            for _, points in terms:
+                assert points == sorted(points) and lo <= points[0] and points[-1] <= hi
+
+
+def test_cmaes_minimizes_and_resumes_exactly():
+    es = CMAES(np.zeros(4), 0.3, seed=1)
+    for _ in range(60):
+        X = es.ask()
+        es.tell(X, _sphere(X))
+    assert es.best[0] < 1e-6
+
+    a = CMAES(np.zeros(4), 0.3, seed=2)
+    for _ in range(3):
+        X = a.ask()
+        a.tell(X, _sphere(X))
+    b = CMAES.from_state(a.state())
+    np.testing.assert_array_equal(a.ask(), b.ask())
+
+
+def test_optimize_resumes_from_its_checkpoint(tmp_path):
+    plants = FOPDTPlants.random(8, seed=1)
+    options = dict(steps=120, velocity=0.05, popsize=4, seed=3, workers=1)
+    straight = optimize(plants, 25.0, generations=2, **options)
+    path = str(tmp_path / 'run.json')
+    optimize(plants, 25.0, generations=1, checkpoint=path, **options)
+    resumed = optimize(plants, 25.0, generations=2, checkpoint=path, **options)
+    assert resumed['cost'] == straight['cost'] <= straight['baseline']
+    np.testing.assert_array_equal(resumed['x'], straight['x'])
+    assert straight['baseline'] == cost(encode(), plants, 25.0, steps=120, velocity=0.05)
+
+
+def test_workers_do_not_change_the_result():
+    plants = FOPDTPlants.random(8, seed=1)
+    options = dict(generations=2, steps=120, velocity=0.05, popsize=4, seed=3)
+    serial = optimize(plants, 25.0, workers=1, **options)
+    pooled = optimize(plants, 25.0, workers=2, **options)
+    assert pooled['cost'] == serial['cost']
+    assert pooled['history'] == serial['history']
+
+
+def test_a_failing_evaluation_stops_the_pool():
+    plants = FOPDTPlants.random(4, seed=1)
+    with pytest.raises(AttributeError):
+        optimize(plants, 25.0, generations=1, steps=20, popsize=4, seed=3, workers=2,
+                 variant='nope')
+    assert not multiprocessing.active_children()
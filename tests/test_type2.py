@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from fuzzyzones.bench import sample_inputs
+from fuzzyzones.centroid import centroid_weights
+from fuzzyzones.inference import make_controller
+from fuzzyzones.type2 import _km_scan, km_centroid, make_type2_controller
+
+
+def _fou(n=120, M=301, seed=0):
+    """Random upper and lower sets with empty heads, tails and rows."""
+    rng = np.random.default_rng(seed)
+    U = rng.random((n, M))
+    U[:20, :M // 2] = 0
+    U[20:25] = 0
+    U[25:40, M // 3:] = 0
+    L = U * rng.random((n, M))
+    L[:50] = 0
+    return U, L
+
+
+def _brute(U, L, weights):
+    """Every switch point, one at a time."""
+    M = U.shape[1]
+    yl, yr = [], []
+    for u, l in zip(U, L):
+        if not u.any():
+            yl.append(np.nan)
+            yr.append(np.nan)
+            continue
+        left, right = [], []
+        for k in range(-1, M):
+            for out, mu in ((left, np.where(np.arange(M) <= k, u, l)),
+                            (right, np.where(np.arange(M) <= k, l, u))):
+                num, den = mu @ weights
+                if den > 0:
+                    out.append(num / den)
+        yl.append(min(left))
+        yr.append(max(right))
+    return np.array(yl), np.array(yr)
+
+
+@pytest.mark.parametrize('uneven', [False, True])
+def test_km_is_the_best_switch_point(uneven):
+    U, L = _fou()
+    x = np.linspace(-100, 100, U.shape[1])
+    if uneven:
+        x = np.sort(np.random.default_rng(1).uniform(-100, 100, U.shape[1]))
+    weights = np.column_stack(centroid_weights(x))
+    expected = _brute(U, L, weights)
+    for block in (None, 1, 7, 300, 301):
+        np.testing.assert_allclose(km_centroid(U, L, weights, block), expected,
+                                   rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(_km_scan(U, L, weights), expected, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(np.column_stack([km_centroid(U[i:i + 1], L[i:i + 1], weights)
+                                                for i in range(len(U))]), expected,
+                               rtol=1e-12, atol=1e-12)
+
+
+def test_no_set_in_the_fou_has_a_centroid_outside_the_interval():
+    U, L = _fou(n=1)
+    U, L = U + 0.1, L + 0.05
+    weights = np.column_stack(centroid_weights(np.linspace(0, 10, U.shape[1])))
+    yl, yr = km_centroid(U, L, weights)
+    mu = L + (U - L) * np.random.default_rng(2).random((5000, U.shape[1]))
+    c = (mu @ weights[:, 0]) / (mu @ weights[:, 1])
+    assert yl[0] <= c.min() and c.max() <= yr[0]
+
+
+def test_equal_sets_reduce_to_the_type1_grid_centroid():
+    e, r = sample_inputs(500)
+    type1 = make_controller()
+    type2 = make_type2_controller(spread=(0, 0, 0))
+    yl, yr = type2.interval(e, r)
+    np.testing.assert_allclose(yl, yr, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(type2.mamdani(e, r), type1.mamdani(e, r), rtol=1e-12,
+                               atol=1e-12)
+
+
+@pytest.mark.parametrize('adaptive', [False, True])
+def test_batch_matches_scalar_calls(adaptive):
+    type2 = make_type2_controller(lower_height=0.8, adaptive=adaptive)
+    e, r = sample_inputs(150)
+    yl, yr = type2.interval(e, r)
+    scalar = np.array([type2.interval(a, b) for a, b in zip(e, r)]).T
+    np.testing.assert_allclose([yl, yr], scalar, rtol=1e-12, atol=1e-12)
+    assert (yl <= yr).all()
+    assert np.isscalar(type2.mamdani(float(e[0]), float(r[0])))
@@ -0,0 +1,46 @@
+import numpy as np
+
+from fuzzyzones.inference import make_controller
+from fuzzyzones.sets import OUTPOWER_TERMS, adaptive_universe, adaptive_universes, universes
+
+METHODS = ('mamdani', 'rss_cog', 'rss_wa', 'tsk')
+
+
+def _inputs(n=1000):
+    rng = np.random.default_rng(0)
+    return rng.uniform(-4.5, 4.5, n), rng.uniform(-11, 11, n)
+
+
+def test_adaptive_matches_uniform():
+    err, errRate = _inputs()
+    uniform, adaptive = make_controller(), make_controller(adaptive=True)
+    for name in METHODS:
+        for method in ('grid', 'exact'):
+            np.testing.assert_allclose(getattr(adaptive, name)(err, errRate, method=method),
+                                       getattr(uniform, name)(err, errRate, method=method),
+                                       rtol=0, atol=1e-12, equal_nan=True)
+
+
+def test_adaptive_point_counts():
+    x_err, x_errRate, x_outPower = adaptive_universes()
+    assert (len(x_err), len(x_errRate)) == (5, 5)
+    # only the flat stretches of the output go: -100..-50 and 50..100
+    assert len(x_outPower) == 1005
+    assert len(adaptive_universe(OUTPOWER_TERMS, universes()[2], slopes=False)) == 5
+
+
+def test_float32():
+    err, errRate = _inputs()
+    double = make_controller()
+    # the sampled input sets are rounded to float32
+    for adaptive in (False, True):
+        single = make_controller(dtype=np.float32, adaptive=adaptive)
+        assert single.output.mf.dtype == np.float32
+        assert single.output.universe.dtype == np.float32
+        for name in METHODS:
+            np.testing.assert_allclose(getattr(single, name)(err, errRate),
+                                       getattr(double, name)(err, errRate),
+                                       rtol=0, atol=1e-3, equal_nan=True)
+            np.testing.assert_allclose(getattr(single, name)(err, errRate, method='exact'),
+                                       getattr(double, name)(err, errRate, method='exact'),
+                                       rtol=0, atol=1e-4, equal_nan=True)
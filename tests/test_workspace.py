@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from fuzzyzones.inference import make_controller
+from fuzzyzones.workspace import INFERENCES, Workspace, allocations
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+@pytest.mark.parametrize('inference', INFERENCES)
+def test_matches_rulebase_without_allocating(inference, dtype):
+    rulebase = make_controller(dtype=dtype)
+    rng = np.random.default_rng(0)
+    for n in (1, 200):
+        err, errRate = rng.uniform(-5, 5, n), rng.uniform(-12, 12, n)
+        ws = Workspace(rulebase, n, inference)
+        ws(err, errRate)
+        ws.check()
+        expected = getattr(rulebase, inference)(err, errRate)
+        np.testing.assert_allclose(ws.out, expected, rtol=0, atol=1e-12,
+                                   equal_nan=True)
+
+
+def test_out_is_reused():
+    ws = Workspace(make_controller(), 4, 'tsk')
+    out = ws(np.zeros(4), np.zeros(4))
+    assert ws(np.ones(4), np.ones(4)) is out is ws.out
+
+
+def test_unknown_inference():
+    with pytest.raises(ValueError):
+        Workspace(make_controller(), 4, 'rss_wa')
+
+
+def test_allocations_sees_new_arrays():
+    peak, retained = allocations(lambda: np.ones(100000))
+    assert peak >= 800000 and retained < 1000